@@ -1,17 +1,35 @@
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for
+from flask import (
+    Flask, request, jsonify, render_template, session, redirect, url_for, Response, stream_with_context
+)
 import os
+import base64
+import io
 import datetime
+import hashlib
+import hmac
 import json
 import random
+import atexit
+import concurrent.futures
+import threading
 import requests
+import click
 from functools import wraps
 
 # Import our modules
-from database.db_handler import DatabaseHandler, init_db
+from database.db_handler import DatabaseHandler, init_db, get_request_query_count, EXPORT_DATASETS
 from models.llm_handler import LLMHandler
-from models.progress_tracker import ProgressTracker
-from utils.language_utils import LanguageUtils
-from config import SUPPORTED_LANGUAGES, CONVERSATION_TOPICS, OPENROUTER_MODEL, OPENROUTER_API_KEY
+from models.progress_tracker import ProgressTracker, CHART_TYPES
+from utils.language_utils import LanguageUtils, SPACY_AVAILABLE
+from utils.nlp_executor import NLPExecutor, NLPExecutorBusy
+from utils.vocabulary_io import detect_format, read_vocabulary_rows, write_vocabulary_rows, chunked
+from utils.data_export import write_csv_chunks, write_parquet_chunks, available_formats
+from config import (
+    SUPPORTED_LANGUAGES, CONVERSATION_TOPICS, OPENROUTER_MODEL, OPENROUTER_API_KEY,
+    MAX_CONVERSATION_HISTORY, CONVERSATION_PAGE_SIZE, VOCABULARY_IMPORT_CHUNK_SIZE, REVIEW_QUEUE_SIZE,
+    ANALYTICS_WEEKS, LEADERBOARD_SIZE, ADMIN_API_TOKEN, EXPORT_CHUNK_SIZE, QUERY_COUNT_HEADER,
+    INIT_DB_ON_STARTUP, SPACY_PRELOAD_LANGUAGES, SPACY_PRELOAD_TOP
+)
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -27,10 +45,58 @@ print("=============================================")
 db_handler = DatabaseHandler()
 llm_handler = LLMHandler()
 language_utils = LanguageUtils()
+# CPU-bound LanguageUtils work (e.g. send_message's text analysis) goes through here, off the request threads
+nlp_executor = NLPExecutor(language_utils)
+atexit.register(nlp_executor.shutdown, wait=False)
 progress_tracker = ProgressTracker(db_handler)
 
-# Initialize database
-init_db()
+# Schema creation and upgrades run once per deploy with "flask init-db", not on every worker import;
+# set INIT_DB_ON_STARTUP to run them here instead
+if INIT_DB_ON_STARTUP:
+    init_db()
+
+def preload_spacy_models():
+    """Load the configured and the most learned languages' spaCy models ahead of first use."""
+    languages = list(SPACY_PRELOAD_LANGUAGES)
+    if SPACY_PRELOAD_TOP:
+        try:
+            languages += db_handler.get_popular_target_languages(SPACY_PRELOAD_TOP)
+        except Exception as e:
+            print(f"Warning: could not look up the languages to preload: {e}")
+        finally:
+            db_handler.close()
+    loaded = language_utils.spacy_models.preload(dict.fromkeys(languages))
+    print(f"Preloaded spaCy models: {', '.join(loaded) or 'none'}")
+
+if SPACY_AVAILABLE and (SPACY_PRELOAD_LANGUAGES or SPACY_PRELOAD_TOP):
+    # In the background, so the app starts serving right away
+    threading.Thread(target=preload_spacy_models, name="spacy-preload", daemon=True).start()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create missing tables and upgrade the schema."""
+    init_db()
+    print("Database initialized")
+
+@app.cli.command('classify-vocabulary')
+@click.option('--language', default=None, help='Only classify words of this language')
+@click.option('--all', 'reclassify', is_flag=True, help='Also reclassify words that already have a level')
+def classify_vocabulary_command(language, reclassify):
+    """Set missing vocabulary difficulty levels from word-frequency ranks."""
+    classified = db_handler.classify_vocabulary_difficulty(language=language, reclassify=reclassify)
+    print(f"Classified {classified} words")
+
+@app.after_request
+def add_query_count_header(response):
+    """Report the SQL statements the request executed, when QUERY_COUNT_HEADER is on (or in debug mode)."""
+    if QUERY_COUNT_HEADER or app.debug:
+        response.headers['X-Query-Count'] = str(get_request_query_count())
+    return response
+
+@app.teardown_appcontext
+def shutdown_session(exception=None):
+    """Release the request's database session back to the pool."""
+    db_handler.close()
 
 # Authentication decorator
 def login_required(f):
@@ -41,6 +107,19 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def admin_required(f):
+    """Require the ADMIN_API_TOKEN as a bearer token; admin endpoints don't exist without one."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not ADMIN_API_TOKEN:
+            return jsonify({"error": "Not found"}), 404
+        auth_header = request.headers.get('Authorization', '')
+        token = auth_header[7:] if auth_header.startswith('Bearer ') else ''
+        if not hmac.compare_digest(token.encode(), ADMIN_API_TOKEN.encode()):
+            return jsonify({"error": "Unauthorized"}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
 # Routes
 @app.route('/')
 def index():
@@ -118,7 +197,7 @@ def logout():
 def dashboard():
     """Render the user dashboard."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     if not user:
         # Clear the invalid session and redirect to login
         session.clear()
@@ -130,13 +209,9 @@ def dashboard():
     # Get recent conversations
     recent_conversations = db_handler.get_user_conversations(user_id)
     
-    # Get vocabulary to review
-    vocab_to_review = db_handler.get_user_vocabulary(
-        user_id=user_id,
-        min_proficiency=0.3,
-        max_proficiency=0.7,
-        limit=10
-    )
+    # Get vocabulary to review: the head of the spaced-repetition queue
+    vocab_to_review = db_handler.get_review_queue(user_id=user_id, limit=10)
+    due_count = db_handler.count_due_reviews(user_id)
     
     # Generate recommendations for practice
     level_topics = CONVERSATION_TOPICS.get(user.current_level, [])
@@ -148,6 +223,7 @@ def dashboard():
                           recommendations=recommendations,
                           recent_conversations=recent_conversations,
                           vocab_to_review=vocab_to_review,
+                          due_count=due_count,
                           recommended_topics=recommended_topics,
                           languages=SUPPORTED_LANGUAGES,
                           now=datetime.datetime.now())
@@ -157,15 +233,15 @@ def dashboard():
 def conversation():
     """Render the conversation page."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
     # Get conversation ID from query params or create new
     conversation_id = request.args.get('id')
     topic = request.args.get('topic', '')
     
     if conversation_id:
-        # Load existing conversation
-        conversation, messages = db_handler.get_conversation(conversation_id)
+        # Load existing conversation with its most recent messages
+        conversation, messages, has_older = db_handler.get_conversation_window(conversation_id)
         if not conversation or conversation.user_id != user_id:
             # Invalid or unauthorized access
             return redirect(url_for('conversation'))
@@ -200,12 +276,13 @@ def conversation():
         )
         
         # Reload conversation with the initial message
-        conversation, messages = db_handler.get_conversation(conversation.id)
+        conversation, messages, has_older = db_handler.get_conversation_window(conversation.id)
     
     return render_template('conversation.html',
                           user=user,
                           conversation=conversation,
                           messages=messages,
+                          older_cursor=encode_keyset_cursor((messages[0].timestamp, messages[0].id)) if has_older else None,
                           topic=topic,
                           languages=SUPPORTED_LANGUAGES)
 
@@ -214,7 +291,7 @@ def conversation():
 def send_message():
     """API endpoint to send a message in a conversation."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
     data = request.json
     conversation_id = data.get('conversation_id')
@@ -223,8 +300,10 @@ def send_message():
     if not conversation_id or not message_content:
         return jsonify({"error": "Missing conversation ID or message content"}), 400
     
-    # Verify conversation belongs to user
-    conversation, _ = db_handler.get_conversation(conversation_id)
+    # Verify conversation belongs to user, loading just the history the prompt needs
+    conversation, recent_messages, _ = db_handler.get_conversation_window(
+        conversation_id, limit=MAX_CONVERSATION_HISTORY
+    )
     if not conversation or conversation.user_id != user_id:
         return jsonify({"error": "Invalid conversation"}), 403
     
@@ -235,19 +314,46 @@ def send_message():
         content=message_content
     )
     
+    # Local complexity and grammar checks. Long messages go to the NLP pool and are analysed
+    # while the LLM works; short ones (most chat messages) run here, as IPC would cost more.
+    text_tasks = {"language_code": user.target_language, "tasks": ("complexity", "grammar")}
+    try:
+        text_analysis = nlp_executor.submit("analyze_texts", [message_content], **text_tasks)
+    except NLPExecutorBusy as e:
+        print(f"Warning: skipping text analysis: {e}")
+        text_analysis = None
+    
     # Analyze user's message for language learning insights
     analysis = llm_handler.analyze_user_message(
         user_message=message_content,
         language=user.target_language,
         level=user.current_level
     )
+    result = None
+    if text_analysis is not None:
+        try:
+            result = text_analysis.result(timeout=nlp_executor.submit_timeout)[0]
+        except concurrent.futures.TimeoutError:
+            # The pool is stuck or backed up; analyse in this thread instead
+            text_analysis.cancel()
+            print("Warning: NLP pool timed out; analysing the message inline")
+            result = language_utils.analyze_texts([message_content], **text_tasks)[0]
+        except Exception as e:
+            print(f"Warning: text analysis failed: {e}")
+    if result is not None:
+        analysis["text_analysis"] = {
+            "complexity": result["complexity"],
+            "grammar_errors": result["grammar"]
+        }
+    if "error" not in analysis:
+        db_handler.record_message_analysis(user_message, user_id, user.target_language, analysis)
     
-    # Get conversation history
-    _, messages = db_handler.get_conversation(conversation_id)
+    # Get conversation history (the window read above plus the message just sent)
     conversation_history = [
         {"is_user": msg.is_user, "content": msg.content}
-        for msg in messages
+        for msg in recent_messages
     ]
+    conversation_history.append({"is_user": True, "content": message_content})
     
     # Generate AI response
     ai_response = llm_handler.generate_response(
@@ -270,35 +376,13 @@ def send_message():
     
     # Update user's vocabulary and progress based on analysis
     if "vocabulary" in analysis:
-        for vocab_item in analysis.get("vocabulary", []):
-            word = vocab_item.get("word", "")
-            if word:
-                # Update or add word to user's vocabulary
-                existing_vocab = db_handler.get_user_vocabulary(
-                    user_id=user_id,
-                    min_proficiency=0,
-                    max_proficiency=1,
-                    limit=1000
-                )
-                
-                existing_words = [v.get("word", "").lower() for v in existing_vocab]
-                
-                if word.lower() in existing_words:
-                    # Update existing word proficiency
-                    db_handler.update_word_proficiency(
-                        user_id=user_id,
-                        word=word,
-                        language=user.target_language,
-                        proficiency_delta=0.05  # Small increase for using the word
-                    )
-                else:
-                    # Add new word
-                    db_handler.add_word_to_user(
-                        user_id=user_id,
-                        word=word,
-                        language=user.target_language,
-                        proficiency=0.2  # Initial proficiency
-                    )
+        db_handler.add_words_to_user(
+            user_id=user_id,
+            words=[vocab_item.get("word", "") for vocab_item in analysis.get("vocabulary", [])],
+            language=user.target_language,
+            proficiency=0.2,  # Initial proficiency for new words
+            proficiency_delta=0.05  # Small increase for using a known word
+        )
     
     # Track conversation duration (simplified: assume 1 minute per exchange)
     db_handler.record_progress(
@@ -321,38 +405,243 @@ def send_message():
         "analysis": analysis
     })
 
+@app.route('/api/conversation/<int:conversation_id>/messages', methods=['GET'])
+@login_required
+def conversation_messages(conversation_id):
+    """API endpoint to page back through older messages in a conversation."""
+    user_id = session['user_id']
+    cursor = request.args.get('before')
+    
+    try:
+        limit = min(100, max(1, int(request.args.get('limit', CONVERSATION_PAGE_SIZE))))
+        before = decode_keyset_cursor(cursor) if cursor else None
+    except (ValueError, UnicodeDecodeError):
+        return jsonify({"error": "Invalid cursor or limit"}), 400
+    
+    conversation, messages, has_older = db_handler.get_conversation_window(
+        conversation_id, limit=limit, before=before
+    )
+    if not conversation or conversation.user_id != user_id:
+        return jsonify({"error": "Invalid conversation"}), 403
+    
+    return jsonify({
+        "messages": [
+            {
+                "id": msg.id,
+                "is_user": msg.is_user,
+                "content": msg.content,
+                "timestamp": msg.timestamp.isoformat()
+            }
+            for msg in messages
+        ],
+        "next_cursor": encode_keyset_cursor((messages[0].timestamp, messages[0].id)) if has_older else None
+    })
+
 @app.route('/vocabulary')
 @login_required
 def vocabulary():
     """Render the vocabulary management page."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
-    # Get all user vocabulary
-    all_vocabulary = db_handler.get_user_vocabulary(
-        user_id=user_id,
-        limit=1000
-    )
+    # Counts come from the stats projection; the list itself is paged in via /api/vocabulary
+    stats = db_handler.get_user_stats(user_id)
     
-    # Group by proficiency level
-    beginner_vocab = [v for v in all_vocabulary if v.get("proficiency", 0) < 0.3]
-    intermediate_vocab = [v for v in all_vocabulary if 0.3 <= v.get("proficiency", 0) < 0.7]
-    advanced_vocab = [v for v in all_vocabulary if v.get("proficiency", 0) >= 0.7]
+    # Words for flashcard practice, weakest first
+    practice_words, _ = db_handler.get_user_vocabulary_page(user_id=user_id, bucket="low", limit=10)
+    if len(practice_words) < 10:
+        medium_words, _ = db_handler.get_user_vocabulary_page(
+            user_id=user_id, bucket="medium", limit=10 - len(practice_words)
+        )
+        practice_words += medium_words
     
     return render_template('vocabulary.html',
                           user=user,
-                          beginner_vocab=beginner_vocab,
-                          intermediate_vocab=intermediate_vocab,
-                          advanced_vocab=advanced_vocab,
-                          total_count=len(all_vocabulary),
+                          stats=stats,
+                          practice_words=practice_words,
+                          total_count=stats.vocab_total,
                           languages=SUPPORTED_LANGUAGES)
 
+# Vocabulary list tabs mapped to proficiency buckets
+VOCABULARY_LEVEL_BUCKETS = {
+    "beginner": "low",
+    "intermediate": "medium",
+    "advanced": "high"
+}
+
+def encode_keyset_cursor(keyset):
+    """Encode a (timestamp, id) keyset as an opaque cursor string."""
+    if not keyset:
+        return None
+    timestamp, row_id = keyset
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_keyset_cursor(cursor):
+    """Decode a cursor produced by encode_keyset_cursor, raising ValueError if invalid."""
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    timestamp, row_id = raw.split("|")
+    return datetime.datetime.fromisoformat(timestamp), int(row_id)
+
+@app.route('/api/vocabulary', methods=['GET'])
+@login_required
+def api_vocabulary():
+    """API endpoint to page through the user's vocabulary."""
+    user_id = session['user_id']
+    
+    level = request.args.get('level', 'all')
+    search = request.args.get('q', '').strip()
+    cursor = request.args.get('cursor')
+    
+    try:
+        limit = min(200, max(1, int(request.args.get('limit', 50))))
+        after = decode_keyset_cursor(cursor) if cursor else None
+    except (ValueError, UnicodeDecodeError):
+        return jsonify({"error": "Invalid cursor or limit"}), 400
+    
+    words, next_keyset = db_handler.get_user_vocabulary_page(
+        user_id=user_id,
+        bucket=VOCABULARY_LEVEL_BUCKETS.get(level),
+        search=search or None,
+        after=after,
+        limit=limit
+    )
+    
+    # Copies, since the page may be memoized for the rest of the request
+    items = [
+        dict(word, last_reviewed=word["last_reviewed"].isoformat() if word["last_reviewed"] else None)
+        for word in words
+    ]
+    
+    return jsonify({
+        "items": items,
+        "next_cursor": encode_keyset_cursor(next_keyset)
+    })
+
+@app.route('/api/vocabulary/import', methods=['POST'])
+@login_required
+def import_vocabulary():
+    """
+    API endpoint to bulk import vocabulary from a CSV or Anki-style TSV upload.
+    
+    The upload is parsed as it is read and committed in chunks, one transaction
+    per chunk. Progress is streamed back as newline-delimited JSON, one line per
+    chunk, followed by a final line with the totals.
+    """
+    user_id = session['user_id']
+    user = db_handler.get_user_profile(user_id)
+    
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({"error": "No file uploaded"}), 400
+    
+    fmt = detect_format(upload.filename, request.form.get('format'))
+    language = request.form.get('language') or user.target_language
+    if language not in SUPPORTED_LANGUAGES:
+        return jsonify({"error": "Unsupported language"}), 400
+    
+    # Take ownership of the spooled upload: newer Flask versions close request.files
+    # when the view returns, before a streamed response body has been generated
+    source = upload.stream
+    upload.stream = io.BytesIO()
+    
+    def generate():
+        totals = {"processed": 0, "added": 0, "skipped": 0}
+        stream = io.TextIOWrapper(source, encoding='utf-8-sig', errors='replace', newline='')
+        try:
+            for chunk in chunked(read_vocabulary_rows(stream, fmt), VOCABULARY_IMPORT_CHUNK_SIZE):
+                counts = db_handler.import_vocabulary_chunk(user_id, chunk, language)
+                for key in totals:
+                    totals[key] += counts[key]
+                yield json.dumps(dict(totals, done=False)) + "\n"
+        except Exception as e:
+            # Chunks already committed stay imported; report how far we got
+            yield json.dumps(dict(totals, done=True, error=str(e))) + "\n"
+            return
+        finally:
+            stream.close()
+        yield json.dumps(dict(totals, done=True)) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/vocabulary/export', methods=['GET'])
+@login_required
+def export_vocabulary():
+    """API endpoint to download the user's whole vocabulary as CSV or Anki-style TSV."""
+    user_id = session['user_id']
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'tsv'):
+        return jsonify({"error": "Format must be csv or tsv"}), 400
+    
+    # Rows come off a streaming cursor and are written out as they arrive
+    body = write_vocabulary_rows(db_handler.iter_user_vocabulary(user_id), fmt)
+    filename = f"vocabulary-{datetime.date.today().isoformat()}.{fmt}"
+    mimetype = 'text/csv' if fmt == 'csv' else 'text/tab-separated-values'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.route('/api/review/queue', methods=['GET'])
+@login_required
+def review_queue():
+    """API endpoint to get the user's next due flashcards."""
+    user_id = session['user_id']
+    try:
+        limit = min(100, max(1, int(request.args.get('limit', REVIEW_QUEUE_SIZE))))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    
+    # Copies, since the queue may be memoized for the rest of the request
+    cards = [
+        dict(card, **{key: card[key].isoformat() if card[key] else None for key in ("last_reviewed", "due_at")})
+        for card in db_handler.get_review_queue(user_id=user_id, limit=limit)
+    ]
+    
+    return jsonify({
+        "cards": cards,
+        "due_count": db_handler.count_due_reviews(user_id)
+    })
+
+@app.route('/api/review/submit', methods=['POST'])
+@login_required
+def submit_reviews():
+    """
+    API endpoint to record a batch of review answers.
+    
+    Expects {"reviews": [{"vocabulary_id": 1, "grade": 4}, ...]}, with grades
+    from 0 (forgot) to 5 (perfect recall).
+    """
+    user_id = session['user_id']
+    data = request.json or {}
+    
+    reviews = []
+    try:
+        for review in data.get('reviews', []):
+            grade = int(review['grade'])
+            if not 0 <= grade <= 5:
+                raise ValueError
+            reviews.append({"vocabulary_id": int(review['vocabulary_id']), "grade": grade})
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Each review needs a vocabulary_id and a grade from 0 to 5"}), 400
+    
+    states = db_handler.submit_reviews(user_id=user_id, reviews=reviews)
+    
+    return jsonify({
+        "success": True,
+        "reviewed": len(states),
+        "next_due": {
+            str(vocab_id): state["due_at"].isoformat() for vocab_id, state in states.items()
+        }
+    })
+
 @app.route('/api/vocabulary_suggestions', methods=['GET'])
 @login_required
 def vocabulary_suggestions():
     """API endpoint to get vocabulary suggestions."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
     topic = request.args.get('topic', '')
     count = int(request.args.get('count', 5))
@@ -375,7 +664,7 @@ def vocabulary_suggestions():
 def add_vocabulary():
     """API endpoint to add vocabulary to user's list."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
     data = request.json
     word = data.get('word', '').strip()
@@ -408,7 +697,7 @@ def add_vocabulary():
 def update_vocabulary_proficiency():
     """API endpoint to update vocabulary proficiency."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
     data = request.json
     word = data.get('word', '').strip()
@@ -431,7 +720,7 @@ def update_vocabulary_proficiency():
 def translate_text():
     """API endpoint to translate text."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
     data = request.json
     text = data.get('text', '').strip()
@@ -454,7 +743,7 @@ def translate_text():
 def get_practice_activity():
     """API endpoint to get a practice activity."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
     activity_type = request.args.get('type', 'conversation')
     topic = request.args.get('topic', '')
@@ -552,30 +841,178 @@ def get_practice_activity():
 def view_progress():
     """Render the progress tracking page."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
-    # Generate progress report
+    # Generate progress report; the charts are fetched separately by the page
     progress_report = progress_tracker.generate_progress_report(user_id)
     
-    # Generate charts
-    vocab_chart = progress_tracker.generate_progress_chart(user_id, "vocabulary")
-    fluency_chart = progress_tracker.generate_progress_chart(user_id, "fluency")
-    time_chart = progress_tracker.generate_progress_chart(user_id, "time")
-    
     return render_template('progress.html',
                           user=user,
                           progress=progress_report,
-                          vocab_chart=vocab_chart,
-                          fluency_chart=fluency_chart,
-                          time_chart=time_chart,
                           languages=SUPPORTED_LANGUAGES)
 
+@app.route('/progress/chart/<chart_type>.png')
+@login_required
+def progress_chart(chart_type):
+    """
+    Serve one progress chart as a PNG.
+    
+    Renders are cached per data version, which is also the ETag, so a browser
+    revalidating an unchanged chart gets a 304 without anything being drawn.
+    """
+    user_id = session['user_id']
+    if chart_type not in CHART_TYPES:
+        return jsonify({"error": "Unknown chart type"}), 404
+    
+    try:
+        days = min(365, max(1, int(request.args.get('days', 30))))
+    except ValueError:
+        return jsonify({"error": "Invalid number of days"}), 400
+    
+    etag = hashlib.sha1(progress_tracker.get_chart_version(user_id, chart_type, days).encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        png, _ = progress_tracker.get_progress_chart(user_id, chart_type, days)
+        if not png:
+            return jsonify({"error": "Not enough data to display chart"}), 404
+        response = Response(png, mimetype='image/png')
+    
+    response.set_etag(etag)
+    # Private to the user, and always revalidated so new progress shows up straight away
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def isoformat_dates(rows):
+    """Make date and datetime values in row dictionaries JSON-friendly."""
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                row[key] = value.isoformat()
+    return rows
+
+@app.route('/api/analytics/cohorts', methods=['GET'])
+@login_required
+def cohort_analytics():
+    """
+    API endpoint for weekly cohort statistics per target language.
+    
+    Serves the summary table written by the analytics job
+    (python -m database.analytics); nothing is computed per request.
+    """
+    try:
+        weeks = min(104, max(1, int(request.args.get('weeks', ANALYTICS_WEEKS))))
+    except ValueError:
+        return jsonify({"error": "Invalid number of weeks"}), 400
+    
+    stats = db_handler.get_cohort_weekly_stats(language=request.args.get('language'), weeks=weeks)
+    return jsonify({"weeks": isoformat_dates(stats)})
+
+@app.route('/api/analytics/vocabulary', methods=['GET'])
+@login_required
+def vocabulary_analytics():
+    """API endpoint for the latest per-language vocabulary-size snapshot."""
+    return jsonify({"languages": isoformat_dates(db_handler.get_cohort_vocabulary_stats())})
+
+@app.route('/api/analytics/leaderboard', methods=['GET'])
+@login_required
+def leaderboard():
+    """
+    API endpoint for a weekly leaderboard.
+    
+    Defaults to the user's target language and the latest computed week;
+    ?week=YYYY-MM-DD selects the week starting on that Monday. Other learners
+    are anonymous: entries carry ranks and scores only, and the caller's own
+    entry, if they are on the board, is marked and also returned as "you".
+    """
+    user_id = session['user_id']
+    user = db_handler.get_user_profile(user_id)
+    language = request.args.get('language') or user.target_language
+    try:
+        limit = min(100, max(1, int(request.args.get('limit', LEADERBOARD_SIZE))))
+        week = request.args.get('week')
+        week_start = datetime.date.fromisoformat(week) if week else None
+    except ValueError:
+        return jsonify({"error": "Invalid limit or week"}), 400
+    
+    # The whole board (at most LEADERBOARD_SIZE per week), so the caller is found beyond the limit too
+    week_start, ranked = db_handler.get_leaderboard(language, week_start=week_start, limit=None)
+    entries = [
+        {
+            "rank": entry["rank"],
+            "vocabulary_added": entry["vocabulary_added"],
+            "conversation_minutes": entry["conversation_minutes"],
+            "mean_fluency": entry["mean_fluency"],
+            "is_you": entry["user_id"] == user_id
+        }
+        for entry in ranked
+    ]
+    return jsonify({
+        "language": language,
+        "week_start": week_start.isoformat() if week_start else None,
+        "entries": entries[:limit],
+        "you": next((entry for entry in entries if entry["is_you"]), None)
+    })
+
+@app.route('/admin/export/<dataset>', methods=['GET'])
+@admin_required
+def admin_export(dataset):
+    """
+    Stream a full export of progress_records, user_vocabulary or message_analysis.
+    
+    Query parameters: format (csv or parquet), start and end (inclusive
+    YYYY-MM-DD dates) and language. Filters run in SQL, and rows are read from
+    a streaming cursor and written out chunk by chunk, so memory use stays
+    constant whatever the size of the export.
+    """
+    if dataset not in EXPORT_DATASETS:
+        return jsonify({"error": "Unknown dataset", "datasets": list(EXPORT_DATASETS)}), 404
+    
+    fmt = request.args.get('format', 'csv')
+    if fmt not in available_formats():
+        return jsonify({"error": "Unsupported format", "formats": available_formats()}), 400
+    
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        start = datetime.date.fromisoformat(start) if start else None
+        end = datetime.date.fromisoformat(end) if end else None
+    except ValueError:
+        return jsonify({"error": "Dates must be YYYY-MM-DD"}), 400
+    language = request.args.get('language') or None
+    
+    columns = db_handler.export_columns(dataset)
+    chunks = db_handler.iter_export_columns(
+        dataset, start=start, end=end, language=language, chunk_size=EXPORT_CHUNK_SIZE
+    )
+    if fmt == 'parquet':
+        body, mimetype = write_parquet_chunks(columns, chunks), 'application/vnd.apache.parquet'
+    else:
+        body, mimetype = write_csv_chunks(columns, chunks), 'text/csv'
+    
+    filename = f"{dataset}-{datetime.date.today().isoformat()}.{fmt}"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.route('/admin/nlp/stats', methods=['GET'])
+@admin_required
+def admin_nlp_stats():
+    """This worker's NLP analysis cache, spaCy model and NLP pool statistics."""
+    return jsonify({
+        "analysis_cache": language_utils.cache_stats(),
+        "spacy_models": language_utils.model_stats(),
+        "executor": nlp_executor.stats()
+    })
+
 @app.route('/activities')
 @login_required
 def activities():
     """Render the language activities page."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
     # Get topics appropriate for user's level
     level_topics = CONVERSATION_TOPICS.get(user.current_level, [])
@@ -590,7 +1027,7 @@ def activities():
 def settings():
     """Render the user settings page."""
     user_id = session['user_id']
-    user = db_handler.get_user(user_id=user_id)
+    user = db_handler.get_user_profile(user_id)
     
     return render_template('settings.html',
                           user=user,
@@ -630,12 +1067,10 @@ def update_settings():
         valid_levels = ["Beginner", "Intermediate", "Advanced", "Fluent"]
         if current_level in valid_levels:
             # Update user in database
-            user.current_level = current_level
+            db_handler.set_user_level(user_id, current_level)
             
             # Update session
             session['current_level'] = current_level
-            
-            db_handler.session.commit()
     
     elif form_type == 'account':
         # Update account information
@@ -654,6 +1089,9 @@ def update_settings():
         
         db_handler.session.commit()
     
+    # Cached profiles must not outlive the change
+    db_handler.invalidate_user(user_id)
+    
     # Redirect back to settings page with success message
     return redirect(url_for('settings', success=True))
 
@@ -811,5 +1249,8 @@ def server_error(e):
     return render_template('error.html', error="Server error"), 500
 
 if __name__ == '__main__':
+    # Local development server: make sure the schema exists before serving
+    if not INIT_DB_ON_STARTUP:
+        init_db()
     # Run the app in debug mode
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Concurrency stress test for request-scoped database sessions.
+
+Registers one user per worker thread, then has every worker hammer the
+database-backed routes at the same time through Flask's test client.
+Any session shared across threads shows up as errors or wrong data.
+
+Usage:
+    python benchmarks/concurrency_stress.py [--threads 32] [--iterations 25]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def run(threads, iterations):
+    from app import app
+
+    app.config["TESTING"] = True
+    errors = []
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        client = app.test_client()
+        username = f"stress_{index}_{uuid.uuid4().hex[:8]}"
+        try:
+            client.post("/register", data={
+                "username": username,
+                "email": f"{username}@example.com",
+                "password": "secret",
+                "native_language": "en",
+                "target_language": "es"
+            })
+        except Exception as e:
+            with lock:
+                errors.append(f"{username} /register: {e!r}")
+        barrier.wait()
+
+        for i in range(iterations):
+            word = f"palabra{index}_{i}"
+            for method, path, payload in (
+                ("post", "/api/add_vocabulary", {"word": word, "translation": "word"}),
+                ("post", "/api/update_vocabulary_proficiency", {"word": word, "change": 0.1}),
+                ("get", "/vocabulary", None),
+                ("get", "/settings", None),
+            ):
+                start = time.perf_counter()
+                try:
+                    if method == "post":
+                        response = client.post(path, json=payload)
+                    else:
+                        response = client.get(path)
+                except Exception as e:
+                    # The test client re-raises view exceptions when TESTING is set
+                    with lock:
+                        errors.append(f"{username} {path}: {e!r}")
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if response.status_code != 200:
+                        errors.append(f"{username} {path}: HTTP {response.status_code}")
+                    elif path == "/settings" and username.encode() not in response.data:
+                        errors.append(f"{username} {path}: rendered another user's profile")
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"threads={threads} iterations={iterations} requests={len(latencies)}")
+    print(f"total={total:.2f}s throughput={len(latencies) / total:.1f} req/s")
+    if latencies:
+        print(f"p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+              f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms")
+    print(f"errors={len(errors)}")
+    for error in errors[:20]:
+        print(f"  {error}")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=25)
+    args = parser.parse_args()
+
+    # Use a throwaway database unless one is explicitly configured
+    if "DATABASE_URL" not in os.environ:
+        db_path = os.path.join(tempfile.mkdtemp(), "stress.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    sys.exit(run(args.threads, args.iterations))
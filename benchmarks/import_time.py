@@ -0,0 +1,85 @@
+"""
+Import-time benchmark for the web application.
+
+Imports app.py in a fresh interpreter under `python -X importtime`, reports
+the total and the slowest modules, and fails (exit status 1) if the import
+is slower than --max-ms or pulls in any of the heavy optional stacks that
+must only load on first use (matplotlib, torch, transformers, nltk, spacy,
+pyarrow). Run it in CI to catch startup regressions.
+
+The import runs against a throwaway SQLite database with INIT_DB_ON_STARTUP
+off, so only import cost is measured.
+
+Usage:
+    python benchmarks/import_time.py [--module app] [--max-ms 1000] [--top 15] [--repeat 3]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that must not be imported just by importing the application
+LAZY_PACKAGES = ("matplotlib", "torch", "transformers", "nltk", "spacy", "pyarrow")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+def measure(module):
+    """Import a module in a fresh interpreter; return [(module, self_us, cumulative_us, depth)]."""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "import_bench.db"))
+    env["INIT_DB_ON_STARTUP"] = "false"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and check the import time of the application.")
+    parser.add_argument("--module", default="app", help="module to import")
+    parser.add_argument("--max-ms", type=float, default=1000.0, help="fail if the best import is slower than this")
+    parser.add_argument("--top", type=int, default=15, help="slowest top-level imports to list")
+    parser.add_argument("--repeat", type=int, default=3, help="runs; the fastest one is reported")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.repeat)]
+    totals = [next(cumulative for name, _, cumulative, _ in entries if name == args.module) for entries in runs]
+    best = min(range(len(runs)), key=totals.__getitem__)
+    entries = runs[best]
+    total_ms = totals[best] / 1000
+
+    print(f"import {args.module}: {total_ms:.0f} ms (best of {args.repeat}, "
+          f"runs: {', '.join(f'{total / 1000:.0f}' for total in totals)} ms)")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    direct = [entry for entry in entries if entry[3] == 1]
+    for name, self_us, cumulative_us, _ in sorted(direct, key=lambda entry: -entry[2])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+
+    failures = []
+    imported = {name.split(".")[0] for name, _, _, _ in entries}
+    eager = [package for package in LAZY_PACKAGES if package in imported]
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if total_ms > args.max_ms:
+        failures.append(f"{total_ms:.0f} ms exceeds the {args.max_ms:.0f} ms budget")
+
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Accuracy and throughput benchmark for the character n-gram language identifier.
+
+Accuracy is measured on three sets:
+
+- built-in learner-style sentences, two per supported language;
+- synthetic messages of held-out words (never seen in training), drawn by
+  frequency from the same word lists the model is built from; needs
+  wordfreq and pythainlp, and is skipped without them;
+- optionally a TSV file of real labelled messages, one "language<TAB>text"
+  per line (e.g. Tatoeba sentence exports).
+
+Throughput is the time of single-message identify() calls, the way
+LanguageUtils.detect_language uses it.
+
+Usage:
+    python benchmarks/langid_benchmark.py [--messages 200] [--min-words 3] [--max-words 10] [--tsv FILE]
+"""
+import argparse
+import collections
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import SUPPORTED_LANGUAGES
+from utils.langid import (LanguageIdentifier, NON_LETTERS, WORDFREQ_CODES, MODEL_PATH,
+                          is_holdout_word)
+
+# Languages written without spaces between words
+UNSPACED_LANGUAGES = {"ja", "th", "zh"}
+
+SAMPLE_SENTENCES = {
+    "ar": ["أريد أن أتحدث العربية بطلاقة مع أصدقائي.", "أين محطة القطار؟ كم سعر التذكرة؟"],
+    "bn": ["আমি প্রতিদিন বাংলা বলতে অনুশীলন করতে চাই।", "ট্রেন স্টেশন কোথায়? টিকিটের দাম কত?"],
+    "cs": ["Chtěl bych každý den mluvit česky se svými přáteli.", "Kde je nádraží? Kolik stojí jízdenka?"],
+    "da": ["Jeg vil gerne øve mig i at tale dansk hver dag.", "Hvor er togstationen? Hvad koster billetten?"],
+    "de": ["Ich möchte jeden Tag mit meinen Freunden Deutsch üben.", "Wo ist der Bahnhof? Wie viel kostet die Fahrkarte?"],
+    "el": ["Θα ήθελα να εξασκούμαι στα ελληνικά κάθε μέρα.", "Πού είναι ο σιδηροδρομικός σταθμός; Πόσο κοστίζει το εισιτήριο;"],
+    "en": ["I would like to practice speaking English every day.", "Where is the train station? How much does the ticket cost?"],
+    "es": ["Me gustaría practicar español todos los días con mis amigos.", "¿Dónde está la estación de tren? ¿Cuánto cuesta el billete?"],
+    "fi": ["Haluaisin harjoitella suomen puhumista joka päivä.", "Missä rautatieasema on? Paljonko lippu maksaa?"],
+    "fr": ["Je voudrais pratiquer le français tous les jours avec mes amis.", "Où est la gare ? Combien coûte le billet ?"],
+    "he": ["אני רוצה לתרגל עברית כל יום עם החברים שלי.", "איפה תחנת הרכבת? כמה עולה הכרטיס?"],
+    "hi": ["मैं हर दिन अपने दोस्तों के साथ हिंदी बोलने का अभ्यास करना चाहता हूँ।", "रेलवे स्टेशन कहाँ है? टिकट कितने का है?"],
+    "hu": ["Szeretnék minden nap magyarul gyakorolni a barátaimmal.", "Hol van a vasútállomás? Mennyibe kerül a jegy?"],
+    "id": ["Saya ingin berlatih berbicara bahasa Indonesia setiap hari.", "Di mana stasiun kereta? Berapa harga tiketnya?"],
+    "it": ["Vorrei esercitarmi a parlare italiano ogni giorno con i miei amici.", "Dov'è la stazione ferroviaria? Quanto costa il biglietto?"],
+    "ja": ["私は毎日友達と日本語を話す練習をしたいです。", "駅はどこですか？切符はいくらですか？"],
+    "ko": ["저는 매일 친구들과 한국어 말하기를 연습하고 싶어요.", "기차역은 어디에 있어요? 표는 얼마예요?"],
+    "ms": ["Saya mahu berlatih bercakap bahasa Melayu setiap hari.", "Di manakah stesen kereta api? Berapakah harga tiket itu?"],
+    "nl": ["Ik wil graag elke dag Nederlands oefenen met mijn vrienden.", "Waar is het station? Hoeveel kost het kaartje?"],
+    "no": ["Jeg vil gjerne øve på å snakke norsk hver dag.", "Hvor er jernbanestasjonen? Hva koster billetten?"],
+    "pl": ["Chciałbym codziennie ćwiczyć mówienie po polsku z przyjaciółmi.", "Gdzie jest dworzec kolejowy? Ile kosztuje bilet?"],
+    "pt": ["Eu gostaria de praticar português todos os dias com os meus amigos.", "Onde fica a estação de comboios? Quanto custa o bilhete?"],
+    "ro": ["Aș vrea să exersez limba română în fiecare zi cu prietenii mei.", "Unde este gara? Cât costă biletul?"],
+    "ru": ["Я хотел бы каждый день практиковать русский язык с друзьями.", "Где находится вокзал? Сколько стоит билет?"],
+    "sv": ["Jag skulle vilja öva på att prata svenska varje dag.", "Var ligger tågstationen? Vad kostar biljetten?"],
+    "th": ["ฉันอยากฝึกพูดภาษาไทยทุกวันกับเพื่อนของฉัน", "สถานีรถไฟอยู่ที่ไหน ตั๋วราคาเท่าไร"],
+    "tr": ["Her gün arkadaşlarımla Türkçe konuşma pratiği yapmak istiyorum.", "Tren istasyonu nerede? Bilet ne kadar?"],
+    "uk": ["Я хотів би щодня практикувати українську мову з друзями.", "Де знаходиться вокзал? Скільки коштує квиток?"],
+    "vi": ["Tôi muốn luyện nói tiếng Việt mỗi ngày với bạn bè của tôi.", "Ga tàu hỏa ở đâu? Vé giá bao nhiêu?"],
+    "zh": ["我想每天练习说中文，因为我喜欢旅行。", "火车站在哪里？票价是多少？"],
+}
+
+def holdout_words(language_code, max_words=50000):
+    """Held-out words of a language and their sampling weights, or None without the word lists."""
+    try:
+        if language_code == "th":
+            from pythainlp.corpus import thai_words
+            words = sorted(word for word in thai_words() if is_holdout_word(word))
+            return words, [1.0] * len(words)
+        from wordfreq import get_frequency_dict, top_n_list
+    except ImportError:
+        return None
+    source = WORDFREQ_CODES.get(language_code, language_code)
+    table = get_frequency_dict(source)
+    words = [word for word in top_n_list(source, max_words)
+             if is_holdout_word(word) and NON_LETTERS.sub("", word)]
+    return words, [table[word] for word in words]
+
+def synthetic_messages(messages, min_words, max_words, seed=13):
+    """(language, text) pairs of random held-out words, or None without the word lists."""
+    rng = random.Random(seed)
+    samples = []
+    for code in sorted(SUPPORTED_LANGUAGES):
+        pool = holdout_words(code)
+        if pool is None:
+            return None
+        words, weights = pool
+        separator = "" if code in UNSPACED_LANGUAGES else " "
+        for _ in range(messages):
+            samples.append((code, separator.join(rng.choices(words, weights, k=rng.randint(min_words, max_words)))))
+    return samples
+
+def read_tsv(path):
+    """(language, text) pairs of a labelled TSV file, restricted to supported languages."""
+    samples = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            code, _, text = line.rstrip("\n").partition("\t")
+            if code in SUPPORTED_LANGUAGES and text:
+                samples.append((code, text))
+    return samples
+
+def evaluate(identifier, name, samples):
+    """Print overall and per-language accuracy and the most common confusions."""
+    correct = collections.Counter()
+    total = collections.Counter()
+    confusions = collections.Counter()
+    for code, text in samples:
+        predicted = identifier.identify(text)
+        total[code] += 1
+        if predicted == code:
+            correct[code] += 1
+        else:
+            confusions[(code, predicted)] += 1
+
+    accuracy = sum(correct.values()) / max(1, len(samples))
+    print(f"\n{name}: {len(samples)} messages, accuracy {accuracy:.1%}")
+    worst = sorted(total, key=lambda code: correct[code] / total[code])[:8]
+    print("  lowest: " + ", ".join(f"{code} {correct[code] / total[code]:.0%}" for code in worst))
+    if confusions:
+        print("  confusions: " + ", ".join(f"{actual}->{predicted} x{count}"
+                                           for (actual, predicted), count in confusions.most_common(8)))
+
+def throughput(identifier, texts, repeat=3):
+    """Best-of-repeat mean time per identify() call, in microseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            identifier.identify(text)
+        best = min(best, (time.perf_counter() - start) / len(texts))
+    return best * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure accuracy and speed of the language identifier.")
+    parser.add_argument("--messages", type=int, default=200, help="synthetic messages per language")
+    parser.add_argument("--min-words", type=int, default=3, help="fewest words per synthetic message")
+    parser.add_argument("--max-words", type=int, default=10, help="most words per synthetic message")
+    parser.add_argument("--tsv", help="labelled messages, one 'language<TAB>text' per line")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    identifier = LanguageIdentifier()
+    print(f"Model: {len(identifier.languages)} languages, {os.path.getsize(MODEL_PATH) / 1024:.0f} KiB on disk, "
+          f"{identifier.weights.nbytes / 2 ** 20:.1f} MiB loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+    missing = sorted(set(SUPPORTED_LANGUAGES) - set(identifier.languages))
+    if missing:
+        print(f"Not covered: {', '.join(missing)}")
+
+    sentences = [(code, text) for code, texts in SAMPLE_SENTENCES.items() for text in texts]
+    evaluate(identifier, "Sample sentences", sentences)
+    samples = synthetic_messages(args.messages, args.min_words, args.max_words)
+    if samples is None:
+        print("\nHeld-out words: skipped (pip install wordfreq pythainlp)")
+    else:
+        evaluate(identifier, f"Held-out words ({args.min_words}-{args.max_words} per message)", samples)
+    if args.tsv:
+        evaluate(identifier, args.tsv, read_tsv(args.tsv))
+
+    texts = [text for _, text in (samples or sentences)]
+    micros = throughput(identifier, texts)
+    mean_chars = sum(map(len, texts)) / len(texts)
+    print(f"\nThroughput: {micros:.1f} us per message ({1e6 / micros:,.0f} messages/s, "
+          f"mean {mean_chars:.0f} characters)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+GIL-stall benchmark for the NLP process pool.
+
+Analyses batches of messages from several threads while a "ping" thread, the
+stand-in for other requests on the same worker, sleeps 1 ms at a time and
+records how late it wakes up. It runs once with the analysis inline in the
+threads and once through NLPExecutor, and reports wall time and the ping
+thread's median and worst delays for each.
+
+Without an installed spaCy model the analysis falls back to NLTK or a regex
+tokenizer, which barely holds the GIL; pass --model with a spaCy model name
+or path to measure real pipelines.
+
+Usage:
+    python benchmarks/nlp_executor_benchmark.py [--model en_core_web_sm] [--threads 4] [--batches 8] [--batch-size 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.language_utils import LanguageUtils
+from utils.nlp_executor import NLPExecutor
+from utils.spacy_models import SpacyModelManager
+
+WORDS = ("the learner practices new words every day and they goes to class while I likes "
+         "reading short stories about travel food music and the weather in other countries").split()
+
+def make_batches(batches, batch_size, seed=3):
+    """Distinct messages, so the analysis cache doesn't answer them."""
+    rng = random.Random(seed)
+    return [[" ".join(rng.choices(WORDS, k=rng.randint(8, 25))) + f" {i}-{j}." for j in range(batch_size)]
+            for i in range(batches)]
+
+def ping(stop, delays):
+    while not stop.is_set():
+        started = time.perf_counter()
+        time.sleep(0.001)
+        delays.append(time.perf_counter() - started - 0.001)
+
+def measure(analyse, batches, threads):
+    """Run analyse over the batches from several threads; return (seconds, ping delays in ms)."""
+    stop = threading.Event()
+    delays = []
+    pinger = threading.Thread(target=ping, args=(stop, delays))
+    pinger.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    work = [batches[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=lambda share: [analyse(batch) for batch in share], args=(share,))
+               for share in work]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    pinger.join()
+    return elapsed, [delay * 1000 for delay in delays]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare request-thread stalls of inline and pooled NLP work.")
+    parser.add_argument("--model", help="spaCy model name or path used for English")
+    parser.add_argument("--threads", type=int, default=4, help="threads submitting analyses")
+    parser.add_argument("--batches", type=int, default=8, help="batches of messages")
+    parser.add_argument("--batch-size", type=int, default=50, help="messages per batch")
+    parser.add_argument("--workers", type=int, default=2, help="pool worker processes")
+    args = parser.parse_args()
+
+    model_names = {"en": args.model} if args.model else None
+    inline_utils = LanguageUtils(spacy_models=SpacyModelManager(model_names=model_names))
+    executor = NLPExecutor(LanguageUtils(spacy_models=SpacyModelManager(model_names=model_names)),
+                           max_workers=args.workers, preload_languages=["en"], model_names=model_names)
+    # Warm up both sides: model loads and worker start-up aren't what is measured
+    inline_utils.analyze_texts(["Warm up the model."], "en")
+    warm_up = [executor.submit("analyze_texts", batch, language_code="en")
+               for batch in make_batches(args.workers * 4, 20, seed=99)]
+    for future in warm_up:
+        future.result()
+
+    results = {
+        "inline": measure(lambda batch: inline_utils.analyze_texts(batch, "en"),
+                          make_batches(args.batches, args.batch_size, seed=1), args.threads),
+        "process pool": measure(lambda batch: executor.call("analyze_texts", batch, language_code="en"),
+                                make_batches(args.batches, args.batch_size, seed=2), args.threads)
+    }
+    executor.shutdown()
+
+    print(f"{args.batches} batches x {args.batch_size} messages from {args.threads} threads, "
+          f"model: {args.model or 'none (fallback tokenizer)'}")
+    print(f"{'':14} {'wall s':>8} {'ping p50 ms':>12} {'ping max ms':>12}")
+    for label, (elapsed, delays) in results.items():
+        print(f"{label:14} {elapsed:>8.2f} {statistics.median(delays):>12.2f} {max(delays):>12.2f}")
+    print(f"Executor: {executor.stats()}")
+
+if __name__ == "__main__":
+    main()
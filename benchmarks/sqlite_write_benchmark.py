@@ -0,0 +1,109 @@
+"""
+Write throughput benchmark for the SQLite performance profile.
+
+Measures add_message / record_progress throughput while reader threads
+continuously load conversations and progress history, once with SQLite's
+defaults and once with SQLITE_PERFORMANCE_PROFILE enabled. Each run uses
+a fresh database file in its own subprocess, since the engine is
+configured at import time.
+
+Usage:
+    python benchmarks/sqlite_write_benchmark.py [--writes 500] [--readers 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def run_once(writes, readers):
+    """Run a single measurement against the database configured in the environment."""
+    from database.db_handler import DatabaseHandler, init_db
+
+    init_db()
+    db = DatabaseHandler()
+    user = db.create_user("bench", "bench@example.com", "secret", "en", "es")
+    conversation = db.create_conversation(user.id, "Benchmark", "es")
+    user_id, conversation_id = user.id, conversation.id
+    db.close()
+
+    stop = threading.Event()
+    reads = []
+    errors = []
+
+    def reader():
+        handler = DatabaseHandler()
+        count = 0
+        while not stop.is_set():
+            try:
+                handler.get_conversation(conversation_id)
+                handler.get_user_progress(user_id)
+                count += 1
+            except Exception as e:
+                errors.append(f"read: {e}")
+            finally:
+                handler.close()
+        reads.append(count)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+
+    start = time.perf_counter()
+    for i in range(writes):
+        try:
+            db.add_message(conversation_id, is_user=(i % 2 == 0), content=f"Mensaje número {i}")
+            db.record_progress(user_id, conversation_duration=1, fluency_score=0.5)
+        except Exception as e:
+            db.session.rollback()
+            errors.append(f"write: {e}")
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for t in threads:
+        t.join()
+    db.close()
+
+    return {
+        "writes_per_sec": round(writes * 2 / elapsed, 1),
+        "reads_per_sec": round(sum(reads) / elapsed, 1),
+        "elapsed_sec": round(elapsed, 3),
+        "errors": len(errors)
+    }
+
+def run_profile(enabled, writes, readers):
+    """Run the benchmark in a subprocess with the profile switched on or off."""
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{db_path}",
+               SQLITE_PERFORMANCE_PROFILE="true" if enabled else "false")
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", "--writes", str(writes), "--readers", str(readers)],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_once(args.writes, args.readers)))
+        sys.exit(0)
+
+    before = run_profile(False, args.writes, args.readers)
+    after = run_profile(True, args.writes, args.readers)
+    print(f"writes={args.writes} (x2 statements) readers={args.readers}")
+    print(f"{'profile':<10}{'writes/s':>12}{'reads/s':>12}{'errors':>8}")
+    for name, result in (("default", before), ("wal", after)):
+        print(f"{name:<10}{result['writes_per_sec']:>12}{result['reads_per_sec']:>12}{result['errors']:>8}")
+    print(f"write speedup: {after['writes_per_sec'] / max(before['writes_per_sec'], 0.1):.2f}x")
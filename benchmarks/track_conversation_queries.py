@@ -0,0 +1,130 @@
+"""
+Query-count benchmark for ProgressTracker.track_conversation.
+
+Replays the same synthetic conversation session twice for fresh users: once
+through the old per-item flow (a user lookup and a committed add_word_to_user
+per vocabulary item, then record_progress, update_user_level and a final
+user lookup) and once through the batched track_conversation. Reports SQL
+statements, commits and wall time for each.
+
+Runs against a throwaway SQLite file unless DATABASE_URL is set.
+
+Usage:
+    python benchmarks/track_conversation_queries.py [--analyses 40] [--words 8] [--vocabulary 150]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "track_bench.db")
+
+from sqlalchemy import event
+
+from database.db_handler import DatabaseHandler, engine, init_db
+from models.progress_tracker import ProgressTracker
+
+class QueryCounter:
+    """Counts statements and commits issued through the engine."""
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+def make_session(analyses, words_per_analysis, vocabulary_size, seed=7):
+    """Build messages and analysis results with realistic word repetition."""
+    rng = random.Random(seed)
+    pool = [f"palabra{i}" for i in range(vocabulary_size)]
+    analysis_results = []
+    messages = []
+    for _ in range(analyses):
+        words = rng.sample(pool, words_per_analysis)
+        messages.append({"is_user": True, "content": " ".join(words)})
+        messages.append({"is_user": False, "content": "respuesta"})
+        analysis_results.append({
+            "errors": [{"type": "grammar", "text": rng.choice(words)}] if rng.random() < 0.3 else [],
+            "vocabulary": [{"word": word, "mastery": round(rng.uniform(0.1, 0.5), 2)} for word in words],
+            "fluency": round(rng.uniform(0.3, 0.9), 2)
+        })
+    return messages, analysis_results
+
+def legacy_track_conversation(db, user_id, duration_minutes, analysis_results):
+    """The per-item persistence track_conversation used to do, for comparison."""
+    added = 0
+    for analysis in analysis_results:
+        for vocab_item in analysis.get("vocabulary", []):
+            word = vocab_item.get("word", "")
+            if word and db.add_word_to_user(
+                user_id=user_id,
+                word=word,
+                language=db.get_user(user_id=user_id).target_language,
+                proficiency=vocab_item.get("mastery", 0.1)
+            ):
+                added += 1
+    fluency = [analysis["fluency"] for analysis in analysis_results if "fluency" in analysis]
+    db.record_progress(
+        user_id=user_id,
+        vocab_count=added,
+        conversation_duration=duration_minutes,
+        fluency_score=sum(fluency) / len(fluency) if fluency else None
+    )
+    db.update_user_level(user_id)
+    return added, db.get_user(user_id=user_id).current_level
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare query counts of per-item and batched session tracking.")
+    parser.add_argument("--analyses", type=int, default=40, help="analysed messages in the session")
+    parser.add_argument("--words", type=int, default=8, help="vocabulary items per analysis")
+    parser.add_argument("--vocabulary", type=int, default=150, help="distinct words the session draws from")
+    args = parser.parse_args()
+
+    init_db()
+    db = DatabaseHandler()
+    tracker = ProgressTracker(db)
+    counter = QueryCounter()
+    messages, analysis_results = make_session(args.analyses, args.words, args.vocabulary)
+    suffix = random.randint(0, 10 ** 9)
+
+    results = {}
+    for label in ("per-item (before)", "batched (after)"):
+        user = db.create_user(f"bench{suffix}{len(results)}", f"bench{suffix}{len(results)}@example.com",
+                              "secret", "en", "es")
+        user_id = user.id
+        db.close()
+
+        counter.reset()
+        start = time.perf_counter()
+        if label.startswith("per-item"):
+            added, _ = legacy_track_conversation(db, user_id, 20, analysis_results)
+        else:
+            added = tracker.track_conversation(user_id, 0, 20, messages, analysis_results)["new_vocabulary_added"]
+        elapsed = time.perf_counter() - start
+        db.close()
+        results[label] = (counter.statements, counter.commits, elapsed, added)
+
+    mentions = sum(len(analysis["vocabulary"]) for analysis in analysis_results)
+    print(f"Session: {args.analyses} analyses, {mentions} vocabulary mentions, backend {engine.dialect.name}")
+    print(f"{'':20} {'statements':>10} {'commits':>8} {'ms':>8} {'added':>6}")
+    for label, (statements, commits, elapsed, added) in results.items():
+        print(f"{label:20} {statements:>10} {commits:>8} {elapsed * 1000:>8.1f} {added:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Rebuild the cohort analytics summary tables.
+
+Streams progress_records and user_vocabulary in columnar chunks, computes
+per-language weekly cohort statistics (activity, fluency trend, percentiles of
+words added per learner), a vocabulary-size snapshot per language and weekly
+leaderboards with NumPy, then replaces the summary tables in one transaction.
+Cohorts are keyed by the learners' target language. Meant to be run
+periodically (e.g. hourly from cron); the API only reads its output.
+
+Usage:
+    python -m database.analytics [--weeks 12] [--top 10] [--chunk-size 1000]
+"""
+import argparse
+import datetime
+
+import numpy as np
+
+from database.db_handler import DatabaseHandler, init_db, HIGH_PROFICIENCY
+from config import ANALYTICS_WEEKS, LEADERBOARD_SIZE, DB_STREAM_CHUNK_SIZE
+
+PERCENTILES = (25, 50, 75, 90)
+
+EPOCH = datetime.date(1970, 1, 1)
+
+def week_start(day):
+    """Monday of the week containing a date."""
+    return day - datetime.timedelta(days=day.weekday())
+
+def _to_date(days_since_epoch):
+    return EPOCH + datetime.timedelta(days=int(days_since_epoch))
+
+def _optional(value):
+    """NaN (no samples) becomes NULL in the summary tables."""
+    return None if np.isnan(value) else float(value)
+
+def group_percentiles(values, groups, qs=PERCENTILES):
+    """
+    Percentiles of values within each group, without a Python loop over groups.
+
+    Uses the same linear interpolation as numpy.percentile.
+
+    Args:
+        values: 1-D array of values
+        groups: Group index of each value, 0..G-1 with every group non-empty
+        qs: Percentiles to compute (0 to 100)
+
+    Returns:
+        Array of shape (G, len(qs))
+    """
+    counts = np.bincount(groups)
+    ordered = values[np.lexsort((values, groups))].astype(np.float64)
+    starts = np.cumsum(counts) - counts
+    positions = starts[:, None] + (counts[:, None] - 1) * (np.asarray(qs, dtype=np.float64) / 100.0)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (positions - lower)
+
+def load_progress(db, since_day, chunk_size=DB_STREAM_CHUNK_SIZE):
+    """
+    Read progress records since a day into NumPy columns.
+
+    Returns:
+        Dictionary of arrays: user_id, language (object), week (days since
+        the epoch of each record's Monday), vocabulary_count,
+        conversation_duration, fluency_sum and fluency_count
+    """
+    chunks = []
+    for chunk in db.iter_progress_columns(since_day, chunk_size):
+        days = np.array(chunk["day"], dtype="datetime64[D]").astype(np.int64)
+        chunks.append({
+            "user_id": np.array(chunk["user_id"], dtype=np.int64),
+            "language": np.array(chunk["language"], dtype=object),
+            # 1970-01-01 was a Thursday, so (days + 3) % 7 is the weekday with Monday as 0
+            "week": days - (days + 3) % 7,
+            "vocabulary_count": np.array(chunk["vocabulary_count"], dtype=np.int64),
+            "conversation_duration": np.array(chunk["conversation_duration"], dtype=np.int64),
+            "fluency_sum": np.array(chunk["fluency_sum"], dtype=np.float64),
+            "fluency_count": np.array(chunk["fluency_count"], dtype=np.int64)
+        })
+    if not chunks:
+        return None
+    return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+
+def weekly_cohorts(progress, top=LEADERBOARD_SIZE, computed_at=None):
+    """
+    Compute weekly cohort statistics and leaderboards from progress columns.
+
+    Args:
+        progress: Columns from load_progress
+        top: Users ranked per language and week
+        computed_at: Timestamp stored with the statistics
+
+    Returns:
+        Tuple of (cohort_weekly_stats rows, leaderboard_entries rows)
+    """
+    languages, language_codes = np.unique(progress["language"], return_inverse=True)
+
+    # Per user and week
+    user_weeks, first_row, user_week = np.unique(
+        np.stack([progress["user_id"], progress["week"]], axis=1),
+        axis=0, return_index=True, return_inverse=True
+    )
+    user_week = user_week.ravel()
+    weeks_of_users = len(user_weeks)
+    uw_user, uw_week = user_weeks[:, 0], user_weeks[:, 1]
+    uw_language = language_codes[first_row]
+    uw_vocabulary = np.bincount(user_week, progress["vocabulary_count"], weeks_of_users)
+    uw_minutes = np.bincount(user_week, progress["conversation_duration"], weeks_of_users)
+    uw_fluency_sum = np.bincount(user_week, progress["fluency_sum"], weeks_of_users)
+    uw_fluency_count = np.bincount(user_week, progress["fluency_count"], weeks_of_users)
+
+    # Per language and week
+    cohorts, cohort = np.unique(np.stack([uw_language, uw_week], axis=1), axis=0, return_inverse=True)
+    cohort = cohort.ravel()
+    active_users = np.bincount(cohort)
+    vocabulary = np.bincount(cohort, uw_vocabulary)
+    minutes = np.bincount(cohort, uw_minutes)
+    fluency_sum = np.bincount(cohort, uw_fluency_sum)
+    fluency_count = np.bincount(cohort, uw_fluency_count)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_fluency = np.where(fluency_count > 0, fluency_sum / fluency_count, np.nan)
+    growth = group_percentiles(uw_vocabulary, cohort)
+
+    weekly = [{
+        "language": languages[cohorts[i, 0]],
+        "week_start": _to_date(cohorts[i, 1]),
+        "active_users": int(active_users[i]),
+        "vocabulary_added": int(vocabulary[i]),
+        "conversation_minutes": int(minutes[i]),
+        "fluency_samples": int(fluency_count[i]),
+        "mean_fluency": _optional(mean_fluency[i]),
+        "vocab_growth_p25": float(growth[i, 0]),
+        "vocab_growth_p50": float(growth[i, 1]),
+        "vocab_growth_p75": float(growth[i, 2]),
+        "vocab_growth_p90": float(growth[i, 3]),
+        "computed_at": computed_at
+    } for i in range(len(cohorts))]
+
+    # Rank within each cohort: most words, then most minutes, then lowest user ID
+    order = np.lexsort((uw_user, -uw_minutes, -uw_vocabulary, cohort))
+    starts = np.cumsum(active_users) - active_users
+    ranks = np.arange(len(order)) - starts[cohort[order]] + 1
+    ranked = order[ranks <= top]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        uw_mean_fluency = np.where(uw_fluency_count > 0, uw_fluency_sum / uw_fluency_count, np.nan)
+
+    leaderboard = [{
+        "language": languages[uw_language[i]],
+        "week_start": _to_date(uw_week[i]),
+        "rank": int(rank),
+        "user_id": int(uw_user[i]),
+        "vocabulary_added": int(uw_vocabulary[i]),
+        "conversation_minutes": int(uw_minutes[i]),
+        "mean_fluency": _optional(uw_mean_fluency[i])
+    } for i, rank in zip(ranked, ranks[ranks <= top])]
+
+    return weekly, leaderboard
+
+def vocabulary_snapshot(db, chunk_size=DB_STREAM_CHUNK_SIZE, computed_at=None):
+    """
+    Compute per-language vocabulary-size statistics from user_vocabulary.
+
+    Rows are folded into per-user counters chunk by chunk, so memory grows
+    with the number of users rather than the number of vocabulary entries.
+
+    Returns:
+        List of cohort_vocabulary_stats rows
+    """
+    words = np.zeros(0, dtype=np.int64)
+    mastered = np.zeros(0, dtype=np.int64)
+    proficiency = np.zeros(0, dtype=np.float64)
+    user_language = np.zeros(0, dtype=np.int64)
+    language_codes = {}
+
+    for chunk in db.iter_vocabulary_columns(chunk_size):
+        user_ids = np.array(chunk["user_id"], dtype=np.int64)
+        values = np.array(chunk["proficiency"], dtype=np.float64)
+        size = int(user_ids.max()) + 1
+        if size > len(words):
+            grow = size - len(words)
+            words = np.pad(words, (0, grow))
+            mastered = np.pad(mastered, (0, grow))
+            proficiency = np.pad(proficiency, (0, grow))
+            user_language = np.pad(user_language, (0, grow), constant_values=-1)
+        words += np.bincount(user_ids, minlength=len(words))
+        mastered += np.bincount(user_ids, values >= HIGH_PROFICIENCY, len(words)).astype(np.int64)
+        proficiency += np.bincount(user_ids, values, len(words))
+        names, codes = np.unique(np.array(chunk["language"], dtype=object), return_inverse=True)
+        codes = np.array([language_codes.setdefault(name, len(language_codes)) for name in names])[codes.ravel()]
+        user_language[user_ids] = codes
+
+    learners = np.flatnonzero(words)
+    if not len(learners):
+        return []
+    names = np.array(sorted(language_codes, key=language_codes.get), dtype=object)
+    cohorts, cohort = np.unique(user_language[learners], return_inverse=True)
+    cohort = cohort.ravel()
+    sizes = words[learners]
+    counts = np.bincount(cohort)
+    total_words = np.bincount(cohort, sizes)
+    mean_proficiency = np.bincount(cohort, proficiency[learners]) / total_words
+    mastered_share = np.bincount(cohort, mastered[learners]) / total_words
+    vocab_size = group_percentiles(sizes, cohort)
+
+    return [{
+        "language": names[code],
+        "learners": int(counts[i]),
+        "vocab_size_p25": float(vocab_size[i, 0]),
+        "vocab_size_p50": float(vocab_size[i, 1]),
+        "vocab_size_p75": float(vocab_size[i, 2]),
+        "vocab_size_p90": float(vocab_size[i, 3]),
+        "mean_proficiency": float(mean_proficiency[i]),
+        "mastered_share": float(mastered_share[i]),
+        "computed_at": computed_at
+    } for i, code in enumerate(cohorts)]
+
+def run(weeks=ANALYTICS_WEEKS, top=LEADERBOARD_SIZE, chunk_size=DB_STREAM_CHUNK_SIZE):
+    """Run the analytics job and return the number of rows written per table."""
+    init_db()
+    db = DatabaseHandler()
+    computed_at = datetime.datetime.utcnow()
+    since_week = week_start(computed_at.date()) - datetime.timedelta(weeks=weeks - 1)
+    try:
+        progress = load_progress(db, since_week, chunk_size)
+        if progress is None:
+            weekly, leaderboard = [], []
+        else:
+            weekly, leaderboard = weekly_cohorts(progress, top=top, computed_at=computed_at)
+        vocabulary = vocabulary_snapshot(db, chunk_size, computed_at=computed_at)
+        db.replace_cohort_analytics(since_week, weekly, vocabulary, leaderboard)
+    finally:
+        db.close()
+
+    return {
+        "since_week": since_week,
+        "progress_records": 0 if progress is None else len(progress["user_id"]),
+        "weekly": len(weekly),
+        "vocabulary": len(vocabulary),
+        "leaderboard": len(leaderboard)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the cohort analytics summary tables.")
+    parser.add_argument("--weeks", type=int, default=ANALYTICS_WEEKS,
+                        help="weeks of statistics and leaderboards to rebuild, including the current one")
+    parser.add_argument("--top", type=int, default=LEADERBOARD_SIZE,
+                        help="users ranked per language and week")
+    parser.add_argument("--chunk-size", type=int, default=DB_STREAM_CHUNK_SIZE,
+                        help="rows fetched from the database per round trip")
+    args = parser.parse_args()
+
+    totals = run(weeks=args.weeks, top=args.top, chunk_size=args.chunk_size)
+
+    print(f"Read {totals['progress_records']} progress records since {totals['since_week'].isoformat()}")
+    print(f"Wrote {totals['weekly']} weekly cohort rows, {totals['vocabulary']} language snapshots "
+          f"and {totals['leaderboard']} leaderboard entries")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Archive idle conversations into compressed cold storage.
+
+Packs the messages of every conversation that has been idle for more than
+--idle-days into a single compressed blob per conversation, then reports the
+database size before and after.
+
+Usage:
+    python -m database.archiver [--idle-days 90] [--batch-size 100] [--vacuum]
+"""
+import argparse
+
+from database.db_handler import DatabaseHandler, init_db, get_database_size, vacuum_database
+from config import ARCHIVE_IDLE_DAYS
+
+def format_size(num_bytes):
+    """Human-readable byte count."""
+    if num_bytes is None:
+        return "unknown"
+    size = float(num_bytes)
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+def run(idle_days=ARCHIVE_IDLE_DAYS, batch_size=100, vacuum=False):
+    """Run the archival job and return its statistics."""
+    init_db()
+    db = DatabaseHandler()
+    try:
+        size_before = get_database_size()
+        totals = db.archive_idle_conversations(idle_days=idle_days, batch_size=batch_size)
+    finally:
+        db.close()
+
+    if vacuum:
+        vacuum_database()
+
+    totals["size_before"] = size_before
+    totals["size_after"] = get_database_size()
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive idle conversations into compressed cold storage.")
+    parser.add_argument("--idle-days", type=int, default=ARCHIVE_IDLE_DAYS,
+                        help="days without new messages before a conversation is archived")
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="conversations to look up per round trip")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="run VACUUM afterwards so freed pages are returned")
+    args = parser.parse_args()
+
+    totals = run(idle_days=args.idle_days, batch_size=args.batch_size, vacuum=args.vacuum)
+
+    ratio = totals["compressed_bytes"] / totals["original_bytes"] if totals["original_bytes"] else 0
+    print(f"Archived {totals['messages']} messages from {totals['conversations']} conversations")
+    print(f"Message payload: {format_size(totals['original_bytes'])} -> "
+          f"{format_size(totals['compressed_bytes'])} ({ratio:.0%} of original)")
+    print(f"Database size: {format_size(totals['size_before'])} -> {format_size(totals['size_after'])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Read-through cache backends for the database layer.
+
+Two interchangeable backends share the same get/set/delete/clear interface:
+
+- MemoryCache: in-process, with per-entry TTL and LRU eviction. Each worker
+  process has its own copy, so writes in one process are only seen by others
+  once their entries expire.
+- RedisCache: shared between processes through any client with the redis-py
+  get/set/delete/scan_iter interface. LocalRedis is a dictionary-backed
+  stand-in for running without a Redis server (tests, scripts, development).
+"""
+import fnmatch
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# Redis is optional; without it only the in-process backend is available
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from config import CACHE_URL, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES
+
+class MemoryCache:
+    """Thread-safe in-process cache with TTL expiry and LRU eviction."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entries beyond max_entries."""
+        expires_at = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        """Remove entries; missing keys are ignored."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisCache:
+    """Cache stored in Redis (or anything speaking its client interface), shared across processes."""
+
+    def __init__(self, client, prefix="linguadex:", default_ttl=CACHE_TTL_SECONDS):
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+
+    def get(self, key):
+        """Return the cached value, or None if it is missing or expired."""
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        """Store a value; Redis applies the TTL and its own eviction policy."""
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=int(ttl or self.default_ttl))
+
+    def delete(self, *keys):
+        """Remove entries; missing keys are ignored."""
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        """Remove every entry under this cache's prefix."""
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+class LocalRedis:
+    """
+    Minimal in-memory stand-in for a redis-py client.
+
+    Implements just the commands RedisCache uses, with the same argument
+    conventions and expiry semantics, so RedisCache can run without a server.
+    """
+
+    def __init__(self):
+        self._data = {}  # key -> (expires_at or None, bytes)
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] <= time.monotonic():
+                del self._data[name]
+                return None
+            return entry[1]
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+    def scan_iter(self, match=None):
+        with self._lock:
+            names = list(self._data)
+        return iter([name for name in names if match is None or fnmatch.fnmatchcase(name, match)])
+
+def create_cache(url=CACHE_URL, prefix="linguadex:", max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL_SECONDS):
+    """
+    Build the cache backend named by a URL.
+
+    Args:
+        url: "memory" for the in-process cache, "redis://..." for a Redis
+             server, "local-redis" for RedisCache over LocalRedis, or "none"
+             to disable caching
+        prefix: Key prefix for Redis backends, keeping separate caches apart
+        max_entries: Capacity of the in-process cache
+        default_ttl: Seconds an entry lives unless set() says otherwise
+
+    Returns:
+        A cache backend, or None if caching is disabled
+    """
+    if not url or url == "none":
+        return None
+    if url == "memory":
+        return MemoryCache(max_entries=max_entries, default_ttl=default_ttl)
+    if url == "local-redis":
+        return RedisCache(LocalRedis(), prefix=prefix, default_ttl=default_ttl)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if not REDIS_AVAILABLE:
+            print("Warning: redis package not installed, falling back to the in-process cache")
+            return MemoryCache(max_entries=max_entries, default_ttl=default_ttl)
+        return RedisCache(redis.Redis.from_url(url), prefix=prefix, default_ttl=default_ttl)
+    raise ValueError(f"Unknown cache backend: {url}")
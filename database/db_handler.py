@@ -1,33 +1,558 @@
-from sqlalchemy import create_engine, func
+from sqlalchemy import create_engine, event, func, and_, bindparam, case, inspect, or_, select, text, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
 import datetime
 import hashlib
+import json
 import os
+import threading
+import zlib
+from functools import wraps
+from types import SimpleNamespace
 
-from database.schema import Base, User, Vocabulary, Conversation, Message, ProgressRecord, user_vocabulary
-from config import DATABASE_URL, WORDS_PER_LEVEL
+# Flask is optional here so the database layer can be used from scripts
+try:
+    from flask import has_app_context, g
+    FLASK_AVAILABLE = True
+except ImportError:
+    FLASK_AVAILABLE = False
+
+from database.schema import (
+    Base, User, Vocabulary, Conversation, ConversationArchive, Message, MessageAnalysis, ProgressRecord, UserStats,
+    user_vocabulary, CohortWeeklyStats, CohortVocabularyStats, LeaderboardEntry
+)
+from config import (
+    DATABASE_URL, WORDS_PER_LEVEL, CONVERSATION_PAGE_SIZE, ARCHIVE_IDLE_DAYS,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS, DB_STREAM_CHUNK_SIZE,
+    SQLITE_PERFORMANCE_PROFILE, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE_KB, SQLITE_BUSY_TIMEOUT_MS,
+    SRS_INITIAL_EASE, REVIEW_QUEUE_SIZE, ANALYTICS_WEEKS, LEADERBOARD_SIZE
+)
+from database.cache import create_cache
+from models.scheduler import schedule_review
+
+# Proficiency bucket boundaries used by the stats projection and the reports
+LOW_PROFICIENCY = 0.3
+HIGH_PROFICIENCY = 0.7
+
+# Rows per multi-row INSERT, well within SQLite's limit on bound parameters
+_INSERT_ROWS_PER_STATEMENT = 500
+
+def _engine_options(database_url):
+    """Build connection pool options appropriate for the database backend."""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    backend = make_url(database_url).get_backend_name()
+    if backend == "sqlite":
+        # SQLite connections are cheap and file-locked; keep SQLAlchemy's default pool
+        options["connect_args"] = {"check_same_thread": False}
+        return options
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        # Reuse the most recently returned connection so surplus ones can idle out
+        pool_use_lifo=True
+    )
+    if backend == "postgresql":
+        server_options = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}" if DB_STATEMENT_TIMEOUT_MS else ""
+        options["connect_args"] = {
+            "application_name": "linguadex",
+            "options": server_options,
+            # Detect dead peers on long-lived pooled connections
+            "keepalives": 1,
+            "keepalives_idle": 60
+        }
+    return options
+
+def _apply_sqlite_profile(dbapi_connection, connection_record):
+    """Apply the SQLite performance pragmas to a freshly opened connection."""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a writer commits; NORMAL sync only fsyncs at checkpoints
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}")
+    # A negative cache_size is interpreted by SQLite as KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{int(SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def _session_scope():
+    """Scope sessions to the active Flask app context, or to the thread outside of one."""
+    if FLASK_AVAILABLE and has_app_context():
+        return id(g._get_current_object())
+    return threading.get_ident()
 
 # Create database engine
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+if SQLITE_PERFORMANCE_PROFILE and engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _apply_sqlite_profile)
 session_factory = sessionmaker(bind=engine)
-Session = scoped_session(session_factory)
+Session = scoped_session(session_factory, scopefunc=_session_scope)
+
+# Request-scoped memoization of reads
+def _request_memo():
+    """The current request's memo of read results, or None outside a Flask app context."""
+    if FLASK_AVAILABLE and has_app_context():
+        return g.setdefault("_db_memo", {})
+    return None
+
+def clear_request_memo(*args):
+    """Forget every memoized read of the current request (also used as an event listener)."""
+    if FLASK_AVAILABLE and has_app_context():
+        g.pop("_db_memo", None)
+
+def _clear_memo_on_write(orm_execute_state):
+    if not orm_execute_state.is_select:
+        clear_request_memo()
+
+# Any write in the request invalidates what was read before it, whether it goes
+# through the unit of work, a Core statement on the session, a commit or a rollback
+event.listen(session_factory, "after_flush", clear_request_memo)
+event.listen(session_factory, "do_orm_execute", _clear_memo_on_write)
+event.listen(session_factory, "after_commit", clear_request_memo)
+event.listen(session_factory, "after_rollback", clear_request_memo)
+
+def request_memoized(method):
+    """
+    Run a read method once per request for each distinct set of arguments.
+    
+    Later identical calls in the same request return the first result, which
+    also keeps loaded ORM objects alive (the session only holds them weakly).
+    Outside a request, or with unhashable arguments, the method runs as usual.
+    Memoized results are shared between callers and must not be mutated.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        memo = _request_memo()
+        if memo is None:
+            return method(self, *args, **kwargs)
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            if key in memo:
+                return memo[key]
+        except TypeError:
+            return method(self, *args, **kwargs)
+        result = method(self, *args, **kwargs)
+        # A write during the call clears the memo, so look it up again
+        _request_memo()[key] = result
+        return result
+    return wrapper
+
+def _count_request_query(*args):
+    if FLASK_AVAILABLE and has_app_context():
+        g._query_count = g.get("_query_count", 0) + 1
+
+event.listen(engine, "before_cursor_execute", _count_request_query)
+
+def get_request_query_count():
+    """Number of SQL statements executed so far in the current request."""
+    if FLASK_AVAILABLE and has_app_context():
+        return g.get("_query_count", 0)
+    return 0
 
 def init_db():
     """Initialize the database, creating all tables."""
     Base.metadata.create_all(engine)
+    _upgrade_schema()
+
+def _upgrade_schema():
+    """Bring tables created by older versions up to the current schema."""
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns("progress_records")}
+    if "day" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE progress_records ADD COLUMN day DATE"))
+            conn.execute(text("UPDATE progress_records SET day = DATE(date)"))
+            # Fold any duplicate daily rows into the earliest one before enforcing uniqueness
+            conn.execute(text("""
+                UPDATE progress_records SET
+                    vocabulary_count = (SELECT SUM(p.vocabulary_count) FROM progress_records p
+                                        WHERE p.user_id = progress_records.user_id AND p.day = progress_records.day),
+                    conversation_duration = (SELECT SUM(p.conversation_duration) FROM progress_records p
+                                             WHERE p.user_id = progress_records.user_id AND p.day = progress_records.day),
+                    mistakes_made = (SELECT SUM(p.mistakes_made) FROM progress_records p
+                                     WHERE p.user_id = progress_records.user_id AND p.day = progress_records.day),
+                    mistakes_corrected = (SELECT SUM(p.mistakes_corrected) FROM progress_records p
+                                          WHERE p.user_id = progress_records.user_id AND p.day = progress_records.day),
+                    fluency_score = COALESCE((SELECT AVG(p.fluency_score) FROM progress_records p
+                                              WHERE p.user_id = progress_records.user_id AND p.day = progress_records.day
+                                              AND p.fluency_score > 0), 0)
+                WHERE id IN (SELECT MIN(id) FROM progress_records GROUP BY user_id, day HAVING COUNT(*) > 1)
+            """))
+            conn.execute(text(
+                "DELETE FROM progress_records WHERE id NOT IN "
+                "(SELECT MIN(id) FROM progress_records GROUP BY user_id, day)"
+            ))
+            conn.execute(text("CREATE UNIQUE INDEX uq_progress_user_day ON progress_records (user_id, day)"))
+    
+    # Exact fluency means: keep the sum and count of samples alongside the score
+    columns = {column["name"] for column in inspector.get_columns("progress_records")}
+    if "fluency_count" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE progress_records ADD COLUMN fluency_sum FLOAT DEFAULT 0"))
+            conn.execute(text("ALTER TABLE progress_records ADD COLUMN fluency_count INTEGER DEFAULT 0"))
+            conn.execute(text(
+                "UPDATE progress_records SET fluency_sum = fluency_score, fluency_count = 1 WHERE fluency_score > 0"
+            ))
+    
+    # Cold-storage marker on conversations
+    columns = {column["name"] for column in inspector.get_columns("conversations")}
+    if "archived_at" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE conversations ADD COLUMN archived_at TIMESTAMP"))
+    
+    # Message ids are never reused on SQLite: rebuild tables created without AUTOINCREMENT
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            table_sql = conn.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'messages'"
+            )).scalar()
+            if "AUTOINCREMENT" not in table_sql.upper():
+                _rebuild_messages_with_autoincrement(conn)
+    
+    # Spaced-repetition state; existing words fall due from when they were last reviewed
+    columns = {column["name"] for column in inspector.get_columns("user_vocabulary")}
+    if "due_at" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE user_vocabulary ADD COLUMN due_at TIMESTAMP"))
+            conn.execute(text("ALTER TABLE user_vocabulary ADD COLUMN interval_days FLOAT DEFAULT 0"))
+            conn.execute(text(f"ALTER TABLE user_vocabulary ADD COLUMN ease_factor FLOAT DEFAULT {SRS_INITIAL_EASE}"))
+            conn.execute(text("ALTER TABLE user_vocabulary ADD COLUMN repetitions INTEGER DEFAULT 0"))
+            conn.execute(text(
+                "UPDATE user_vocabulary SET due_at = COALESCE(last_reviewed, CURRENT_TIMESTAMP) WHERE due_at IS NULL"
+            ))
+    
+    # Collapse duplicate user/word links so the unique index below can be created
+    existing_indexes = {index["name"] for index in inspector.get_indexes("user_vocabulary")}
+    if "uq_user_vocabulary_user_word" not in existing_indexes:
+        with engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TEMPORARY TABLE user_vocabulary_dedup AS
+                SELECT user_id, vocabulary_id, MAX(proficiency) AS proficiency, MAX(last_reviewed) AS last_reviewed
+                FROM user_vocabulary GROUP BY user_id, vocabulary_id HAVING COUNT(*) > 1
+            """))
+            conn.execute(text(
+                "DELETE FROM user_vocabulary WHERE (user_id, vocabulary_id) IN "
+                "(SELECT user_id, vocabulary_id FROM user_vocabulary_dedup)"
+            ))
+            conn.execute(text(
+                "INSERT INTO user_vocabulary (user_id, vocabulary_id, proficiency, last_reviewed, due_at) "
+                "SELECT user_id, vocabulary_id, proficiency, last_reviewed, COALESCE(last_reviewed, CURRENT_TIMESTAMP) "
+                "FROM user_vocabulary_dedup"
+            ))
+            conn.execute(text("DROP TABLE user_vocabulary_dedup"))
+    
+    # Case-insensitive vocabulary: lower-case the words and merge the rows that then coincide
+    existing_indexes = {index["name"] for index in inspector.get_indexes("vocabulary")}
+    if "uq_vocabulary_language_word" not in existing_indexes:
+        with engine.begin() as conn:
+            _merge_duplicate_vocabulary(conn)
+    
+    # Indexes added after their tables were first released
+    for table in (user_vocabulary, Vocabulary.__table__, Message.__table__):
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(engine)
+    
+    # Progress data version, used to key rendered chart caches
+    columns = {column["name"] for column in inspector.get_columns("user_stats")}
+    if "progress_version" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE user_stats ADD COLUMN progress_version INTEGER NOT NULL DEFAULT 0"))
+    
+    # Backfill the stats projection for users created before it existed
+    with engine.begin() as conn:
+        missing_users = select(User.id).where(~User.id.in_(select(UserStats.user_id)))
+        conn.execute(UserStats.__table__.insert().from_select(
+            _STATS_COLUMNS, _stats_select(User.id.in_(missing_users))
+        ))
+
+def _highest_message_id(conn):
+    """Highest message id ever issued, counting archived messages and their analyses."""
+    highest = max(
+        conn.execute(select(func.max(Message.id))).scalar() or 0,
+        conn.execute(select(func.max(MessageAnalysis.message_id))).scalar() or 0
+    )
+    for conversation_id, payload in conn.execute(
+        select(ConversationArchive.conversation_id, ConversationArchive.payload)
+    ):
+        highest = max([highest] + [message.id for message in _unpack_messages(conversation_id, payload)])
+    return highest
+
+def _rebuild_messages_with_autoincrement(conn):
+    """Recreate the SQLite messages table with AUTOINCREMENT, starting after every id already issued."""
+    highest = _highest_message_id(conn)
+    conn.execute(text("DROP INDEX IF EXISTS ix_messages_conversation_timestamp"))
+    conn.execute(text("ALTER TABLE messages RENAME TO messages_old"))
+    Message.__table__.create(conn)
+    conn.execute(text(
+        "INSERT INTO messages (id, conversation_id, is_user, content, timestamp) "
+        "SELECT id, conversation_id, is_user, content, timestamp FROM messages_old"
+    ))
+    conn.execute(text("DROP TABLE messages_old"))
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'messages'"))
+    conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('messages', :seq)"), {"seq": highest})
+
+def _merge_duplicate_vocabulary(conn):
+    """
+    Lower-case stored vocabulary words and fold rows that then share a word into the oldest one.
+    
+    Users' links move to the surviving row. A user who had both keeps the link
+    to the oldest row, and their stats lose the other word.
+    """
+    vocabulary = Vocabulary.__table__
+    uv = user_vocabulary.c
+    keepers, renames, duplicates = {}, [], {}
+    rows = conn.execute(select(vocabulary.c.id, vocabulary.c.word, vocabulary.c.language).order_by(vocabulary.c.id))
+    for row in rows:
+        key = (row.language, _normalize_word(row.word))
+        if key not in keepers:
+            keepers[key] = row.id
+            if row.word != key[1]:
+                renames.append({"b_id": row.id, "b_word": key[1]})
+        else:
+            duplicates[row.id] = keepers[key]
+    
+    stats = UserStats.__table__
+    for duplicate_id, keeper_id in duplicates.items():
+        has_keeper = uv.user_id.in_(select(uv.user_id).where(uv.vocabulary_id == keeper_id))
+        for link in conn.execute(select(uv.user_id, uv.proficiency).where(uv.vocabulary_id == duplicate_id, has_keeper)):
+            bucket = _proficiency_bucket(link.proficiency or 0.0)
+            conn.execute(stats.update().where(stats.c.user_id == link.user_id).values(
+                vocab_total=stats.c.vocab_total - 1, **{bucket: stats.c[bucket] - 1}
+            ))
+        conn.execute(user_vocabulary.delete().where(uv.vocabulary_id == duplicate_id, has_keeper))
+        conn.execute(user_vocabulary.update().where(uv.vocabulary_id == duplicate_id).values(vocabulary_id=keeper_id))
+        conn.execute(vocabulary.delete().where(vocabulary.c.id == duplicate_id))
+    if renames:
+        conn.execute(
+            vocabulary.update().where(vocabulary.c.id == bindparam("b_id")).values(word=bindparam("b_word")),
+            renames
+        )
+
+def _normalize_word(word):
+    """Form in which vocabulary words are stored and matched, so "Hola" and "hola" are one word."""
+    return word.strip().lower()
+
+def _by_normalized_word(mapping):
+    """Re-key a word mapping by normalized word; the first of several spellings wins."""
+    normalized = {}
+    for word, value in (mapping or {}).items():
+        normalized.setdefault(_normalize_word(word), value)
+    return normalized
+
+def _proficiency_bucket(proficiency):
+    """Name of the user_stats column counting words at this proficiency."""
+    if proficiency < LOW_PROFICIENCY:
+        return "vocab_low"
+    if proficiency < HIGH_PROFICIENCY:
+        return "vocab_medium"
+    return "vocab_high"
+
+def _classify_difficulty(words, language):
+    """Learning level of each word from its frequency rank; None where the language has no rank table."""
+    # Imported here so that importing the handler doesn't load NumPy
+    from utils.word_ranks import get_word_ranks
+    return dict(zip(words, get_word_ranks().difficulty_levels(words, language)))
+
+def _level_for_count(vocab_count):
+    """Return the level for a vocabulary count and the word count needed for the next one."""
+    level = "Beginner"
+    for name, threshold in WORDS_PER_LEVEL.items():
+        if vocab_count >= threshold:
+            level = name
+        else:
+            break
+    return level, _next_level_threshold(level)
+
+def _next_level_threshold(level):
+    """Word count required to reach the level after the given one (0 at the top level)."""
+    levels = list(WORDS_PER_LEVEL)
+    index = levels.index(level) if level in levels else 0
+    return WORDS_PER_LEVEL[levels[index + 1]] if index + 1 < len(levels) else 0
+
+def _vocabulary_row_to_dict(row):
+    """Convert a (Vocabulary, proficiency, last_reviewed) row into a word dictionary."""
+    vocab, proficiency, last_reviewed = row
+    return {
+        "id": vocab.id,
+        "word": vocab.word,
+        "language": vocab.language,
+        "translation": vocab.translation,
+        "difficulty_level": vocab.difficulty_level,
+        "part_of_speech": vocab.part_of_speech,
+        "example_sentence": vocab.example_sentence,
+        "proficiency": proficiency,
+        "last_reviewed": last_reviewed
+    }
+
+_STATS_COLUMNS = [
+    "user_id", "vocab_total", "vocab_low", "vocab_medium", "vocab_high",
+    "vocabulary_learned", "conversation_minutes", "next_level_threshold", "updated_at"
+]
+
+def _stats_select(user_filter):
+    """SELECT recomputing user_stats rows from the source tables, in _STATS_COLUMNS order."""
+    uv = user_vocabulary.c
+    
+    def vocab_count(*conditions):
+        return select(func.count()).select_from(user_vocabulary).where(
+            uv.user_id == User.id, *conditions
+        ).scalar_subquery()
+    
+    def progress_sum(column):
+        return select(func.coalesce(func.sum(column), 0)).where(
+            ProgressRecord.user_id == User.id
+        ).scalar_subquery()
+    
+    levels = list(WORDS_PER_LEVEL)
+    return select(
+        User.id,
+        vocab_count(),
+        vocab_count(uv.proficiency < LOW_PROFICIENCY),
+        vocab_count(uv.proficiency >= LOW_PROFICIENCY, uv.proficiency < HIGH_PROFICIENCY),
+        vocab_count(uv.proficiency >= HIGH_PROFICIENCY),
+        progress_sum(ProgressRecord.vocabulary_count),
+        progress_sum(ProgressRecord.conversation_duration),
+        case({level: _next_level_threshold(level) for level in levels},
+             value=User.current_level, else_=_next_level_threshold(levels[0])),
+        func.now()
+    ).where(user_filter)
+
+def get_database_size():
+    """Return the number of bytes the database occupies, or None if unknown for this backend."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            page_count = conn.execute(text("PRAGMA page_count")).scalar()
+            freelist_count = conn.execute(text("PRAGMA freelist_count")).scalar()
+            page_size = conn.execute(text("PRAGMA page_size")).scalar()
+            return (page_count - freelist_count) * page_size
+        if engine.dialect.name == "postgresql":
+            return conn.execute(text("SELECT pg_database_size(current_database())")).scalar()
+    return None
+
+def vacuum_database():
+    """Reclaim space freed by deletes (VACUUM must run outside a transaction)."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+
+def _pack_messages(messages):
+    """Serialize and compress messages for cold storage. Returns (payload, uncompressed size)."""
+    raw = json.dumps([
+        {
+            "id": message.id,
+            "is_user": message.is_user,
+            "content": message.content,
+            "timestamp": message.timestamp.isoformat()
+        }
+        for message in messages
+    ], ensure_ascii=False).encode("utf-8")
+    return zlib.compress(raw, 9), len(raw)
+
+def _unpack_messages(conversation_id, payload):
+    """Rebuild detached Message objects from a cold-storage payload."""
+    return [
+        Message(
+            id=item["id"],
+            conversation_id=conversation_id,
+            is_user=item["is_user"],
+            content=item["content"],
+            timestamp=datetime.datetime.fromisoformat(item["timestamp"])
+        )
+        for item in json.loads(zlib.decompress(payload))
+    ]
+
+# Datasets served by DatabaseHandler.iter_export_columns
+EXPORT_DATASETS = ("progress", "user_vocabulary", "message_analysis")
+
+def _export_select(dataset, start=None, end=None, language=None):
+    """
+    Build the SELECT behind an export dataset, with its filters applied in SQL.
+    
+    Progress is filtered on its day and the user's target language, vocabulary
+    on last_reviewed and the word's language, and message analyses on
+    created_at and the message language. start and end are inclusive dates.
+    """
+    if dataset == "progress":
+        p = ProgressRecord
+        stmt = select(
+            p.user_id, User.target_language.label("language"), p.day, p.vocabulary_count,
+            p.conversation_duration, p.mistakes_made, p.mistakes_corrected,
+            p.fluency_score, p.fluency_sum, p.fluency_count
+        ).join(User, User.id == p.user_id).order_by(p.user_id, p.day)
+        date_column, language_column = p.day, User.target_language
+    elif dataset == "user_vocabulary":
+        uv = user_vocabulary.c
+        stmt = select(
+            uv.user_id, uv.vocabulary_id, Vocabulary.word, Vocabulary.language, uv.proficiency,
+            uv.last_reviewed, uv.due_at, uv.interval_days, uv.ease_factor, uv.repetitions
+        ).join(Vocabulary, Vocabulary.id == uv.vocabulary_id).order_by(uv.user_id, uv.vocabulary_id)
+        date_column, language_column = uv.last_reviewed, Vocabulary.language
+    elif dataset == "message_analysis":
+        m = MessageAnalysis
+        stmt = select(
+            m.message_id, m.conversation_id, m.user_id, m.language, m.created_at, m.fluency_score,
+            m.error_count, m.vocabulary_count, m.grammar_complexity, m.analysis
+        ).order_by(m.message_id)
+        date_column, language_column = m.created_at, m.language
+    else:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    
+    # Datetime columns compare against the start of the day after the end date
+    is_day = dataset == "progress"
+    if start is not None:
+        stmt = stmt.where(date_column >= (start if is_day else datetime.datetime.combine(start, datetime.time())))
+    if end is not None:
+        if is_day:
+            stmt = stmt.where(date_column <= end)
+        else:
+            stmt = stmt.where(date_column < datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time()))
+    if language:
+        stmt = stmt.where(language_column == language)
+    return stmt
+
+def _dialect_insert(table):
+    """Return an INSERT construct supporting ON CONFLICT for the active backend."""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
 
 def get_session():
-    """Get a new database session."""
+    """Get the database session for the current request or thread."""
     return Session()
 
+def remove_session():
+    """Close and discard the database session for the current request or thread."""
+    Session.remove()
+
+# Columns copied into cached snapshots (credentials are never cached)
+_USER_PROFILE_COLUMNS = ("id", "username", "email", "native_language", "target_language",
+                         "current_level", "joined_date", "last_active")
+_CONVERSATION_HEADER_COLUMNS = ("id", "user_id", "topic", "language", "timestamp")
+
+def _snapshot(instance, columns):
+    """Copy mapped columns into a plain, session-independent object that can be cached."""
+    return SimpleNamespace(**{column: getattr(instance, column) for column in columns})
+
 class DatabaseHandler:
-    def __init__(self):
-        self.session = get_session()
+    def __init__(self, cache=None):
+        # Sessions are resolved per request/thread, so one handler can be shared safely
+        self._registry = Session
+        self.cache = cache if cache is not None else create_cache()
+    
+    @property
+    def session(self):
+        """The database session bound to the current request or thread."""
+        return self._registry()
     
     def close(self):
-        """Close the database session."""
-        self.session.close()
+        """Close the database session for the current request or thread."""
+        self._registry.remove()
     
     # User operations
     def create_user(self, username, email, password, native_language, target_language):
@@ -40,10 +565,16 @@ class DatabaseHandler:
             native_language=native_language,
             target_language=target_language
         )
+        user.stats = UserStats(
+            vocab_total=0, vocab_low=0, vocab_medium=0, vocab_high=0,
+            vocabulary_learned=0, conversation_minutes=0, progress_version=0,
+            next_level_threshold=_next_level_threshold(user.current_level or "Beginner")
+        )
         self.session.add(user)
         self.session.commit()
         return user
     
+    @request_memoized
     def get_user(self, user_id=None, username=None, email=None):
         """Get a user by ID, username, or email."""
         if user_id:
@@ -54,6 +585,38 @@ class DatabaseHandler:
             return self.session.query(User).filter_by(email=email).first()
         return None
     
+    @request_memoized
+    def get_user_profile(self, user_id):
+        """
+        Get a read-only snapshot of a user's profile, served from the cache when possible.
+        
+        Use this wherever the user is only read; use get_user to modify it.
+        
+        Args:
+            user_id: User ID
+            
+        Returns:
+            Object with the user's profile columns as attributes, or None if not found
+        """
+        key = f"user:{user_id}"
+        if self.cache is not None:
+            profile = self.cache.get(key)
+            if profile is not None:
+                return profile
+        
+        user = self.session.get(User, user_id)
+        if not user:
+            return None
+        profile = _snapshot(user, _USER_PROFILE_COLUMNS)
+        if self.cache is not None:
+            self.cache.set(key, profile)
+        return profile
+    
+    def invalidate_user(self, user_id):
+        """Drop cached data about a user after their profile changes."""
+        if self.cache is not None:
+            self.cache.delete(f"user:{user_id}")
+    
     def authenticate_user(self, username, password):
         """Authenticate a user."""
         password_hash = hashlib.sha256(password.encode()).hexdigest()
@@ -61,6 +624,7 @@ class DatabaseHandler:
         if user:
             user.last_active = datetime.datetime.utcnow()
             self.session.commit()
+            self.invalidate_user(user.id)
         return user
     
     def update_user_level(self, user_id):
@@ -69,77 +633,117 @@ class DatabaseHandler:
         if not user:
             return False
         
-        # Count user's vocabulary words
-        vocab_count = self.session.query(func.count(user_vocabulary.c.vocabulary_id)).filter(
-            user_vocabulary.c.user_id == user_id
-        ).scalar()
-        
-        # Determine appropriate level
-        new_level = "Beginner"
-        for level, threshold in WORDS_PER_LEVEL.items():
-            if vocab_count >= threshold:
-                new_level = level
-            else:
-                break
+        if self._update_user_level(user):
+            self.session.commit()
+            self.invalidate_user(user_id)
+            return True
+        return False
+    
+    def _update_user_level(self, user):
+        """Set the level implied by the user's vocabulary count, without committing."""
+        # Vocabulary count is maintained incrementally in the stats projection; re-read it
+        # in case counters were adjusted earlier in this transaction
+        stats = self.get_user_stats(user.id)
+        self.session.refresh(stats)
+        new_level, next_threshold = _level_for_count(stats.vocab_total)
         
         # Update if changed
         if user.current_level != new_level:
             user.current_level = new_level
-            self.session.commit()
+            stats.next_level_threshold = next_threshold
             return True
         return False
     
+    def set_user_level(self, user_id, level):
+        """Explicitly set a user's level, keeping the stats threshold in step."""
+        user = self.get_user(user_id=user_id)
+        if not user:
+            return False
+        user.current_level = level
+        self.get_user_stats(user_id).next_level_threshold = _next_level_threshold(level)
+        self.session.commit()
+        self.invalidate_user(user_id)
+        return True
+    
+    @request_memoized
+    def get_user_stats(self, user_id):
+        """Get a user's stats row, rebuilding it from the source tables if it is missing."""
+        stats = self.session.get(UserStats, user_id)
+        if stats is None:
+            self.session.execute(UserStats.__table__.insert().from_select(
+                _STATS_COLUMNS, _stats_select(User.id == user_id)
+            ))
+            self.session.commit()
+            stats = self.session.get(UserStats, user_id)
+        return stats
+    
+    def _adjust_stats(self, user_id, **deltas):
+        """Apply counter deltas to a user's stats row inside the current transaction."""
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        table = UserStats.__table__
+        self.session.execute(
+            table.update().where(table.c.user_id == user_id).values(
+                updated_at=datetime.datetime.utcnow(),
+                **{column: table.c[column] + delta for column, delta in deltas.items()}
+            )
+        )
+    
     # Vocabulary operations
     def add_vocabulary(self, word, language, translation=None, difficulty_level=None, 
                        part_of_speech=None, example_sentence=None):
-        """Add a new vocabulary word to the database."""
+        """
+        Add a new vocabulary word to the database.
+        
+        The word is stored lower-cased. Without a difficulty_level, it is
+        classified by its frequency rank.
+        """
+        word = _normalize_word(word)
         vocab = self.session.query(Vocabulary).filter_by(word=word, language=language).first()
         if not vocab:
-            vocab = Vocabulary(
+            if difficulty_level is None:
+                difficulty_level = _classify_difficulty([word], language)[word]
+            # A concurrent request may add the same word first; then use its row
+            self.session.execute(_dialect_insert(Vocabulary.__table__).values(
                 word=word,
                 language=language,
                 translation=translation,
                 difficulty_level=difficulty_level,
                 part_of_speech=part_of_speech,
                 example_sentence=example_sentence
-            )
-            self.session.add(vocab)
+            ).on_conflict_do_nothing(index_elements=[Vocabulary.language, Vocabulary.word]))
             self.session.commit()
+            vocab = self.session.query(Vocabulary).filter_by(word=word, language=language).one()
         return vocab
     
     def add_word_to_user(self, user_id, word, language, proficiency=0.1):
         """Add a word to a user's vocabulary list."""
-        user = self.get_user(user_id=user_id)
+        user = self.get_user_profile(user_id)
         if not user:
             return False
         
         # Get or create the vocabulary word
-        vocab = self.session.query(Vocabulary).filter_by(word=word, language=language).first()
-        if not vocab:
-            vocab = self.add_vocabulary(word, language)
-        
-        # Check if user already has this word
-        existing = self.session.query(user_vocabulary).filter_by(
-            user_id=user_id, vocabulary_id=vocab.id
-        ).first()
-        
-        if not existing:
-            # Add association with proficiency
-            stmt = user_vocabulary.insert().values(
-                user_id=user_id,
-                vocabulary_id=vocab.id,
-                proficiency=proficiency,
-                last_reviewed=datetime.datetime.utcnow()
-            )
-            self.session.execute(stmt)
+        vocab = self.add_vocabulary(word, language)
+        
+        # Add association with proficiency, unless the user already has this word
+        stmt = _dialect_insert(user_vocabulary).values(
+            user_id=user_id,
+            vocabulary_id=vocab.id,
+            proficiency=proficiency,
+            last_reviewed=datetime.datetime.utcnow()
+        ).on_conflict_do_nothing(index_elements=[user_vocabulary.c.user_id, user_vocabulary.c.vocabulary_id])
+        
+        if self.session.execute(stmt).rowcount:
+            self._adjust_stats(user_id, vocab_total=1, **{_proficiency_bucket(proficiency): 1})
             self.session.commit()
             return True
         return False
     
     def update_word_proficiency(self, user_id, word, language, proficiency_delta):
         """Update a user's proficiency with a word."""
-        user = self.get_user(user_id=user_id)
-        vocab = self.session.query(Vocabulary).filter_by(word=word, language=language).first()
+        user = self.get_user_profile(user_id)
+        vocab = self.session.query(Vocabulary).filter_by(word=_normalize_word(word), language=language).first()
         
         if not user or not vocab:
             return False
@@ -164,10 +768,192 @@ class DatabaseHandler:
                 last_reviewed=datetime.datetime.utcnow()
             )
             self.session.execute(update_stmt)
+            old_bucket = _proficiency_bucket(result.proficiency)
+            new_bucket = _proficiency_bucket(new_proficiency)
+            if old_bucket != new_bucket:
+                self._adjust_stats(user_id, **{old_bucket: -1, new_bucket: 1})
             self.session.commit()
             return True
         return False
     
+    def add_words_to_user(self, user_id, words, language, proficiency=0.2, proficiency_delta=0.05,
+                          details=None, word_proficiency=None, word_last_reviewed=None):
+        """
+        Add or reinforce many words in a user's vocabulary in a single transaction.
+        
+        Words the user doesn't have yet are linked with the initial proficiency;
+        words they already have get their proficiency bumped by proficiency_delta.
+        Words are matched and stored lower-cased.
+        
+        Args:
+            user_id: ID of an existing user
+            words: Iterable of words (duplicates, in any case, and blanks are ignored)
+            language: Language code of the words
+            proficiency: Initial proficiency for newly added words
+            proficiency_delta: Change applied to words already in the vocabulary,
+                or None to leave them untouched
+            details: Optional mapping of word to translation, part_of_speech and
+                example_sentence, used for words new to the vocabulary table
+            word_proficiency: Optional mapping of word to its own initial proficiency,
+                overriding proficiency for that word
+            word_last_reviewed: Optional mapping of word to when a newly added word
+                was last reviewed (now by default)
+            
+        Returns:
+            Dictionary with the number of words added and updated
+        """
+        counts = self._add_words_to_user(user_id, words, language, proficiency, proficiency_delta,
+                                         details, word_proficiency, word_last_reviewed)
+        self.session.commit()
+        return counts
+    
+    def _add_words_to_user(self, user_id, words, language, proficiency=0.2, proficiency_delta=0.05,
+                           details=None, word_proficiency=None, word_last_reviewed=None):
+        """The work of add_words_to_user, inside the caller's transaction."""
+        word_proficiency = _by_normalized_word(word_proficiency)
+        word_last_reviewed = _by_normalized_word(word_last_reviewed)
+        
+        # Normalize and deduplicate while preserving order
+        seen = set()
+        words = [_normalize_word(word) for word in words if word]
+        words = [word for word in words if word and not (word in seen or seen.add(word))]
+        if not words:
+            return {"added": 0, "updated": 0}
+        
+        # Resolve vocabulary IDs in one query, creating any missing words
+        vocab_ids = dict(self.session.query(Vocabulary.word, Vocabulary.id).filter(
+            Vocabulary.language == language,
+            Vocabulary.word.in_(words)
+        ).all())
+        missing = [word for word in words if word not in vocab_ids]
+        if missing:
+            details = _by_normalized_word(details)
+            levels = _classify_difficulty(missing, language)
+            # Words a concurrent request added first are skipped, and picked up by the lookup below
+            self.session.execute(
+                _dialect_insert(Vocabulary.__table__).on_conflict_do_nothing(
+                    index_elements=[Vocabulary.language, Vocabulary.word]
+                ),
+                [
+                    {
+                        "word": word,
+                        "language": language,
+                        "translation": details.get(word, {}).get("translation"),
+                        "difficulty_level": details.get(word, {}).get("difficulty_level") or levels[word],
+                        "part_of_speech": details.get(word, {}).get("part_of_speech"),
+                        "example_sentence": details.get(word, {}).get("example_sentence")
+                    }
+                    for word in missing
+                ]
+            )
+            vocab_ids.update(self.session.query(Vocabulary.word, Vocabulary.id).filter(
+                Vocabulary.language == language,
+                Vocabulary.word.in_(missing)
+            ).all())
+        
+        # Find which of these words the user already has, and at what proficiency
+        known = dict(self.session.query(
+            user_vocabulary.c.vocabulary_id, user_vocabulary.c.proficiency
+        ).filter(
+            user_vocabulary.c.user_id == user_id,
+            user_vocabulary.c.vocabulary_id.in_(list(vocab_ids.values()))
+        ).all())
+        known_ids = set(known)
+        now = datetime.datetime.utcnow()
+        
+        new_words = [word for word in words if vocab_ids[word] not in known_ids]
+        initial = {word: word_proficiency.get(word, proficiency) for word in new_words}
+        
+        # Link the new words one proficiency bucket per statement: each statement's
+        # rowcount then says how many were really added, leaving out any that a
+        # concurrent request linked first
+        added = 0
+        stats_deltas = {}
+        by_bucket = {}
+        for word in new_words:
+            by_bucket.setdefault(_proficiency_bucket(initial[word]), []).append(word)
+        for bucket, bucket_words in by_bucket.items():
+            for start in range(0, len(bucket_words), _INSERT_ROWS_PER_STATEMENT):
+                inserted = self.session.execute(_dialect_insert(user_vocabulary).values([
+                    {
+                        "user_id": user_id,
+                        "vocabulary_id": vocab_ids[word],
+                        "proficiency": initial[word],
+                        "last_reviewed": word_last_reviewed.get(word) or now
+                    }
+                    for word in bucket_words[start:start + _INSERT_ROWS_PER_STATEMENT]
+                ]).on_conflict_do_nothing(
+                    index_elements=[user_vocabulary.c.user_id, user_vocabulary.c.vocabulary_id]
+                )).rowcount
+                added += inserted
+                stats_deltas[bucket] = stats_deltas.get(bucket, 0) + inserted
+        stats_deltas["vocab_total"] = added
+        
+        # Work out how the proficiency buckets shift for the stats projection
+        if proficiency_delta is None:
+            known = {}
+        for old_proficiency in known.values():
+            old_bucket = _proficiency_bucket(old_proficiency)
+            new_bucket = _proficiency_bucket(min(1.0, max(0.0, old_proficiency + proficiency_delta)))
+            if old_bucket != new_bucket:
+                stats_deltas[old_bucket] = stats_deltas.get(old_bucket, 0) - 1
+                stats_deltas[new_bucket] = stats_deltas.get(new_bucket, 0) + 1
+        
+        if known_ids and proficiency_delta is not None:
+            # Bounded between 0 and 1, computed in SQL so no rows are fetched
+            bumped = user_vocabulary.c.proficiency + proficiency_delta
+            self.session.execute(
+                user_vocabulary.update().where(
+                    (user_vocabulary.c.user_id == user_id) &
+                    (user_vocabulary.c.vocabulary_id.in_(known_ids))
+                ).values(
+                    proficiency=case((bumped > 1.0, 1.0), (bumped < 0.0, 0.0), else_=bumped),
+                    last_reviewed=now
+                )
+            )
+        
+        self._adjust_stats(user_id, **stats_deltas)
+        return {"added": added, "updated": len(known)}
+    
+    def import_vocabulary_chunk(self, user_id, entries, language, proficiency=0.1):
+        """
+        Import one chunk of parsed vocabulary entries in a single transaction.
+        
+        Words the user already has are left as they are, so re-running an
+        import is harmless. Entries carrying a proficiency or last_reviewed
+        (as exports do) keep them, so progress survives an export and import.
+        
+        Args:
+            user_id: ID of an existing user
+            entries: Entry dictionaries from utils.vocabulary_io.read_vocabulary_rows
+            language: Language code of the words
+            proficiency: Initial proficiency for imported entries that have none
+            
+        Returns:
+            Dictionary with the number of entries processed, added and skipped
+        """
+        details = {}
+        for entry in entries:
+            details.setdefault(entry["word"], entry)
+        try:
+            counts = self.add_words_to_user(
+                user_id, list(details), language,
+                proficiency=proficiency, proficiency_delta=None, details=details,
+                word_proficiency={word: entry["proficiency"] for word, entry in details.items()
+                                  if entry.get("proficiency") is not None},
+                word_last_reviewed={word: entry["last_reviewed"] for word, entry in details.items()
+                                    if entry.get("last_reviewed")}
+            )
+        except Exception:
+            self.session.rollback()
+            raise
+        return {
+            "processed": len(entries),
+            "added": counts["added"],
+            "skipped": len(entries) - counts["added"]
+        }
+    
+    @request_memoized
     def get_user_vocabulary(self, user_id, min_proficiency=None, max_proficiency=None, limit=100):
         """Get a user's vocabulary words, optionally filtered by proficiency level."""
         query = self.session.query(
@@ -187,19 +973,227 @@ class DatabaseHandler:
         # Order by last reviewed (oldest first) and limit
         result = query.order_by(user_vocabulary.c.last_reviewed).limit(limit).all()
         
-        return [
-            {
-                "word": item[0].word,
-                "language": item[0].language,
-                "translation": item[0].translation,
-                "difficulty_level": item[0].difficulty_level,
-                "part_of_speech": item[0].part_of_speech,
-                "example_sentence": item[0].example_sentence,
-                "proficiency": item[1],
-                "last_reviewed": item[2]
-            }
-            for item in result
-        ]
+        return [_vocabulary_row_to_dict(item) for item in result]
+    
+    def iter_user_vocabulary(self, user_id, chunk_size=DB_STREAM_CHUNK_SIZE):
+        """
+        Stream a user's whole vocabulary without loading it into memory at once.
+        
+        Args:
+            user_id: User ID
+            chunk_size: Rows fetched from the database per round trip
+            
+        Yields:
+            Word dictionaries, in the same shape as get_user_vocabulary
+        """
+        uv = user_vocabulary.c
+        # Plain columns rather than ORM entities, so no identity map builds up while streaming
+        stmt = select(
+            Vocabulary.id, Vocabulary.word, Vocabulary.language, Vocabulary.translation,
+            Vocabulary.difficulty_level, Vocabulary.part_of_speech, Vocabulary.example_sentence,
+            uv.proficiency, uv.last_reviewed
+        ).join(
+            user_vocabulary, Vocabulary.id == uv.vocabulary_id
+        ).where(
+            uv.user_id == user_id
+        ).order_by(uv.last_reviewed, uv.vocabulary_id)
+        
+        for row in self._stream(stmt, chunk_size):
+            yield dict(row._mapping)
+    
+    def _stream(self, stmt, chunk_size=DB_STREAM_CHUNK_SIZE):
+        """
+        Execute a SELECT and yield its rows in bounded chunks.
+        
+        On PostgreSQL this uses a server-side (named) cursor, so memory use is
+        bounded by chunk_size rather than by the size of the result.
+        """
+        result = self.session.execute(
+            stmt.execution_options(stream_results=True, max_row_buffer=chunk_size)
+        )
+        for partition in result.partitions(chunk_size):
+            yield from partition
+    
+    def _stream_columns(self, stmt, chunk_size=DB_STREAM_CHUNK_SIZE):
+        """Like _stream, but yield each chunk as a dictionary of column lists."""
+        result = self.session.execute(
+            stmt.execution_options(stream_results=True, max_row_buffer=chunk_size)
+        )
+        keys = list(result.keys())
+        for partition in result.partitions(chunk_size):
+            yield dict(zip(keys, (list(column) for column in zip(*partition))))
+    
+    @request_memoized
+    def get_user_vocabulary_page(self, user_id, bucket=None, search=None, after=None, limit=50):
+        """
+        Get one page of a user's vocabulary using keyset pagination.
+        
+        Rows are ordered by (last_reviewed, vocabulary id), oldest first, so every
+        page is an indexed range scan no matter how deep into the list it is.
+        
+        Args:
+            user_id: User ID
+            bucket: Optional proficiency bucket ("low", "medium" or "high")
+            search: Optional text matched against the word and its translation
+            after: (last_reviewed, vocabulary_id) of the last row on the previous page
+            limit: Maximum number of words to return
+            
+        Returns:
+            Tuple of (list of word dictionaries, keyset for the next page or None)
+        """
+        uv = user_vocabulary.c
+        query = self.session.query(
+            Vocabulary, uv.proficiency, uv.last_reviewed
+        ).join(
+            user_vocabulary, Vocabulary.id == uv.vocabulary_id
+        ).filter(
+            uv.user_id == user_id
+        )
+        
+        if bucket == "low":
+            query = query.filter(uv.proficiency < LOW_PROFICIENCY)
+        elif bucket == "medium":
+            query = query.filter(uv.proficiency >= LOW_PROFICIENCY, uv.proficiency < HIGH_PROFICIENCY)
+        elif bucket == "high":
+            query = query.filter(uv.proficiency >= HIGH_PROFICIENCY)
+        
+        if search:
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            query = query.filter(or_(
+                Vocabulary.word.ilike(pattern, escape="\\"),
+                Vocabulary.translation.ilike(pattern, escape="\\")
+            ))
+        
+        if after:
+            query = query.filter(tuple_(uv.last_reviewed, uv.vocabulary_id) > tuple_(*after))
+        
+        # Fetch one extra row to learn whether another page follows
+        rows = query.order_by(uv.last_reviewed, uv.vocabulary_id).limit(limit + 1).all()
+        words = [_vocabulary_row_to_dict(row) for row in rows[:limit]]
+        next_key = None
+        if len(rows) > limit:
+            next_key = (words[-1]["last_reviewed"], words[-1]["id"])
+        return words, next_key
+    
+    # Spaced-repetition review queue
+    @request_memoized
+    def get_review_queue(self, user_id, limit=REVIEW_QUEUE_SIZE, now=None):
+        """
+        Get the user's next due cards, soonest first.
+        
+        Served by the (user_id, due_at) index, so only the returned rows are
+        read no matter how large the vocabulary is.
+        
+        Args:
+            user_id: User ID
+            limit: Maximum number of cards to return
+            now: Cards due at or before this time are returned (defaults to now)
+            
+        Returns:
+            List of word dictionaries with their scheduling state
+        """
+        now = now or datetime.datetime.utcnow()
+        uv = user_vocabulary.c
+        rows = self.session.query(
+            Vocabulary, uv.proficiency, uv.last_reviewed,
+            uv.due_at, uv.interval_days, uv.ease_factor, uv.repetitions
+        ).join(
+            user_vocabulary, Vocabulary.id == uv.vocabulary_id
+        ).filter(
+            uv.user_id == user_id,
+            uv.due_at <= now
+        ).order_by(uv.due_at, uv.vocabulary_id).limit(limit).all()
+        
+        cards = []
+        for row in rows:
+            card = _vocabulary_row_to_dict(row[:3])
+            card.update(due_at=row.due_at, interval_days=row.interval_days,
+                        ease_factor=row.ease_factor, repetitions=row.repetitions)
+            cards.append(card)
+        return cards
+    
+    @request_memoized
+    def count_due_reviews(self, user_id, now=None):
+        """Count the user's cards that are due for review."""
+        now = now or datetime.datetime.utcnow()
+        return self.session.query(func.count()).select_from(user_vocabulary).filter(
+            user_vocabulary.c.user_id == user_id,
+            user_vocabulary.c.due_at <= now
+        ).scalar()
+    
+    def submit_reviews(self, user_id, reviews, now=None):
+        """
+        Record a batch of review answers in a single transaction.
+        
+        Args:
+            user_id: User ID
+            reviews: Iterable of {"vocabulary_id": int, "grade": 0-5} dictionaries,
+                applied in order
+            now: Time of the reviews (defaults to now)
+            
+        Returns:
+            Dictionary mapping vocabulary ID to its new scheduling state; words
+            not in the user's vocabulary are left out
+        """
+        now = now or datetime.datetime.utcnow()
+        reviews = list(reviews)
+        if not reviews:
+            return {}
+        
+        uv = user_vocabulary.c
+        ids = {review["vocabulary_id"] for review in reviews}
+        current = {
+            row.vocabulary_id: row
+            for row in self.session.execute(
+                select(uv.vocabulary_id, uv.proficiency, uv.interval_days, uv.ease_factor, uv.repetitions).where(
+                    uv.user_id == user_id,
+                    uv.vocabulary_id.in_(ids)
+                )
+            )
+        }
+        
+        states = {}
+        for review in reviews:
+            vocab_id = review["vocabulary_id"]
+            if vocab_id not in current:
+                continue
+            previous = states.get(vocab_id) or current[vocab_id]._mapping
+            states[vocab_id] = schedule_review(
+                previous["ease_factor"], previous["interval_days"], previous["repetitions"],
+                previous["proficiency"], review["grade"], now
+            )
+        if not states:
+            return {}
+        
+        # Shift the stats buckets for words whose proficiency crossed a boundary
+        stats_deltas = {}
+        for vocab_id, state in states.items():
+            old_bucket = _proficiency_bucket(current[vocab_id].proficiency or 0.0)
+            new_bucket = _proficiency_bucket(state["proficiency"])
+            if old_bucket != new_bucket:
+                stats_deltas[old_bucket] = stats_deltas.get(old_bucket, 0) - 1
+                stats_deltas[new_bucket] = stats_deltas.get(new_bucket, 0) + 1
+        
+        update_stmt = user_vocabulary.update().where(
+            (uv.user_id == bindparam("b_user_id")) &
+            (uv.vocabulary_id == bindparam("b_vocabulary_id"))
+        ).values(
+            proficiency=bindparam("b_proficiency"),
+            last_reviewed=bindparam("b_last_reviewed"),
+            due_at=bindparam("b_due_at"),
+            interval_days=bindparam("b_interval_days"),
+            ease_factor=bindparam("b_ease_factor"),
+            repetitions=bindparam("b_repetitions")
+        )
+        self.session.execute(update_stmt, [
+            dict({f"b_{key}": value for key, value in state.items()},
+                 b_user_id=user_id, b_vocabulary_id=vocab_id)
+            for vocab_id, state in states.items()
+        ])
+        self._adjust_stats(user_id, **stats_deltas)
+        self.session.commit()
+        return states
     
     # Conversation operations
     def create_conversation(self, user_id, topic, language):
@@ -211,6 +1205,8 @@ class DatabaseHandler:
         )
         self.session.add(conversation)
         self.session.commit()
+        if self.cache is not None:
+            self.cache.delete(f"conversations:{user_id}")
         return conversation
     
     def add_message(self, conversation_id, is_user, content):
@@ -224,67 +1220,546 @@ class DatabaseHandler:
         self.session.commit()
         return message
     
+    def record_message_analysis(self, message, user_id, language, analysis):
+        """
+        Store the language analysis of a user message.
+        
+        Args:
+            message: The analysed Message
+            user_id: Author of the message
+            language: Language code the message was written in
+            analysis: Analysis dictionary from LLMHandler.analyze_user_message
+        """
+        grammar = analysis.get("grammar") or {}
+        self.session.add(MessageAnalysis(
+            message_id=message.id,
+            conversation_id=message.conversation_id,
+            user_id=user_id,
+            language=language,
+            fluency_score=analysis.get("fluency"),
+            error_count=len(analysis.get("errors") or []),
+            vocabulary_count=len(analysis.get("vocabulary") or []),
+            grammar_complexity=grammar.get("complexity") if isinstance(grammar, dict) else None,
+            analysis=json.dumps(analysis, ensure_ascii=False),
+            created_at=message.timestamp
+        ))
+        self.session.commit()
+    
     def get_conversation(self, conversation_id):
-        """Get a conversation by ID, including all messages."""
+        """Get a conversation by ID, including all messages (archived ones included)."""
         conversation = self.session.query(Conversation).filter_by(id=conversation_id).first()
         if conversation:
             messages = self.session.query(Message).filter_by(
                 conversation_id=conversation_id
             ).order_by(Message.timestamp).all()
-            return conversation, messages
+            return conversation, self._archived_messages(conversation) + messages
         return None, []
     
+    def get_conversation_window(self, conversation_id, limit=CONVERSATION_PAGE_SIZE, before=None):
+        """
+        Get a conversation and a window of its most recent messages in one query.
+        
+        Args:
+            conversation_id: Conversation ID
+            limit: Maximum number of messages to return
+            before: (timestamp, message_id) of the oldest message already loaded,
+                    to page further back in the conversation
+            
+        Returns:
+            Tuple of (conversation or None, messages oldest first, whether older messages exist)
+        """
+        window = select(Message.id).where(Message.conversation_id == conversation_id)
+        if before:
+            window = window.where(tuple_(Message.timestamp, Message.id) < tuple_(*before))
+        # One extra row tells us whether there is anything older than this window
+        window = window.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit + 1)
+        
+        rows = self.session.query(Conversation, Message).outerjoin(
+            Message, and_(Message.conversation_id == Conversation.id, Message.id.in_(window))
+        ).filter(Conversation.id == conversation_id).all()
+        if not rows:
+            return None, [], False
+        
+        conversation = rows[0][0]
+        messages = sorted(
+            (message for _, message in rows if message is not None),
+            key=lambda message: (message.timestamp, message.id)
+        )
+        
+        if conversation.archived_at is not None and len(messages) <= limit:
+            # The window reaches back into cold storage, which holds everything older than the live rows
+            archived = self._archived_messages(conversation)
+            if before:
+                archived = [message for message in archived if (message.timestamp, message.id) < tuple(before)]
+            messages = archived + messages
+        
+        has_older = len(messages) > limit
+        if has_older:
+            messages = messages[-limit:]
+        return conversation, messages, has_older
+    
+    def _archived_messages(self, conversation):
+        """Messages of a conversation that live in cold storage, oldest first."""
+        if conversation.archived_at is None:
+            return []
+        archive = self.session.get(ConversationArchive, conversation.id)
+        return _unpack_messages(conversation.id, archive.payload) if archive else []
+    
+    def archive_idle_conversations(self, idle_days=ARCHIVE_IDLE_DAYS, batch_size=100):
+        """
+        Move the messages of idle conversations into compressed cold storage.
+        
+        A conversation is idle when its newest live message is older than idle_days.
+        Its messages (plus anything already archived for it) are packed into one
+        compressed blob and the live rows are deleted, one conversation per transaction.
+        Archived conversations stay readable through get_conversation and
+        get_conversation_window, and can keep receiving new messages.
+        
+        Args:
+            idle_days: Days without activity before a conversation is archived
+            batch_size: Conversations to look up per round trip
+            
+        Returns:
+            Dictionary with counts of conversations and messages archived, and byte sizes
+        """
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=idle_days)
+        totals = {"conversations": 0, "messages": 0, "original_bytes": 0, "compressed_bytes": 0}
+        
+        while True:
+            conversation_ids = [
+                row.conversation_id for row in self.session.query(Message.conversation_id).join(
+                    Conversation, Conversation.id == Message.conversation_id
+                ).group_by(
+                    Message.conversation_id
+                ).having(
+                    func.max(Message.timestamp) < cutoff
+                ).limit(batch_size)
+            ]
+            if not conversation_ids:
+                break
+            
+            for conversation_id in conversation_ids:
+                conversation = self.session.get(Conversation, conversation_id)
+                live = self.session.query(Message).filter_by(
+                    conversation_id=conversation_id
+                ).order_by(Message.timestamp, Message.id).all()
+                messages = self._archived_messages(conversation) + live
+                payload, original_size = _pack_messages(messages)
+                
+                archive = self.session.get(ConversationArchive, conversation_id)
+                if archive is None:
+                    archive = ConversationArchive(conversation_id=conversation_id)
+                    self.session.add(archive)
+                now = datetime.datetime.utcnow()
+                archive.payload = payload
+                archive.message_count = len(messages)
+                archive.original_size = original_size
+                archive.archived_at = now
+                conversation.archived_at = now
+                
+                # Delete exactly the rows that were packed, so a concurrent new message survives
+                self.session.query(Message).filter(
+                    Message.id.in_([message.id for message in live])
+                ).delete(synchronize_session=False)
+                self.session.commit()
+                
+                totals["conversations"] += 1
+                totals["messages"] += len(live)
+                totals["original_bytes"] += original_size
+                totals["compressed_bytes"] += len(payload)
+        
+        return totals
+    
+    @request_memoized
     def get_user_conversations(self, user_id, limit=10):
-        """Get a user's recent conversations."""
+        """
+        Get headers of a user's recent conversations, newest first.
+        
+        Returns read-only snapshots (id, user_id, topic, language, timestamp)
+        that are cached until the user starts a new conversation.
+        """
+        key = f"conversations:{user_id}"
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            # The cached list also answers any request for fewer conversations
+            if cached is not None and (cached["limit"] >= limit or len(cached["headers"]) < cached["limit"]):
+                return cached["headers"][:limit]
+        
         conversations = self.session.query(Conversation).filter_by(
             user_id=user_id
         ).order_by(Conversation.timestamp.desc()).limit(limit).all()
-        return conversations
+        headers = [_snapshot(conversation, _CONVERSATION_HEADER_COLUMNS) for conversation in conversations]
+        if self.cache is not None:
+            self.cache.set(key, {"limit": limit, "headers": headers})
+        return headers
     
     # Progress tracking
     def record_progress(self, user_id, vocab_count=0, conversation_duration=0, 
                        mistakes_made=0, mistakes_corrected=0, fluency_score=None):
-        """Record a user's progress for a session."""
-        # Get the latest progress record for today
-        today = datetime.datetime.utcnow().date()
-        existing = self.session.query(ProgressRecord).filter(
-            ProgressRecord.user_id == user_id,
-            func.date(ProgressRecord.date) == today
-        ).first()
-        
-        if existing:
-            # Update existing record
-            existing.vocabulary_count += vocab_count
-            existing.conversation_duration += conversation_duration
-            existing.mistakes_made += mistakes_made
-            existing.mistakes_corrected += mistakes_corrected
-            if fluency_score is not None:
-                # Average the fluency score
-                if existing.fluency_score > 0:
-                    existing.fluency_score = (existing.fluency_score + fluency_score) / 2
-                else:
-                    existing.fluency_score = fluency_score
-            self.session.commit()
-            return existing
-        else:
-            # Create new record
-            progress = ProgressRecord(
-                user_id=user_id,
-                vocabulary_count=vocab_count,
-                conversation_duration=conversation_duration,
+        """Record a user's progress for a session, accumulating into today's row."""
+        today = self._record_progress(user_id, vocab_count, conversation_duration,
+                                      mistakes_made, mistakes_corrected, fluency_score)
+        self.session.commit()
+        
+        return self.session.query(ProgressRecord).filter_by(user_id=user_id, day=today).first()
+    
+    def _record_progress(self, user_id, vocab_count=0, conversation_duration=0,
+                         mistakes_made=0, mistakes_corrected=0, fluency_score=None):
+        """The work of record_progress, inside the caller's transaction; returns the day written."""
+        now = datetime.datetime.utcnow()
+        today = now.date()
+        table = ProgressRecord.__table__
+        
+        # Atomic upsert on (user_id, day) so concurrent turns can't create duplicate rows
+        stmt = _dialect_insert(table).values(
+            user_id=user_id,
+            day=today,
+            date=now,
+            vocabulary_count=vocab_count,
+            conversation_duration=conversation_duration,
+            mistakes_made=mistakes_made,
+            mistakes_corrected=mistakes_corrected,
+            fluency_score=fluency_score or 0.0,
+            fluency_sum=fluency_score or 0.0,
+            fluency_count=0 if fluency_score is None else 1
+        )
+        updates = {
+            "vocabulary_count": table.c.vocabulary_count + stmt.excluded.vocabulary_count,
+            "conversation_duration": table.c.conversation_duration + stmt.excluded.conversation_duration,
+            "mistakes_made": table.c.mistakes_made + stmt.excluded.mistakes_made,
+            "mistakes_corrected": table.c.mistakes_corrected + stmt.excluded.mistakes_corrected
+        }
+        if fluency_score is not None:
+            # Mean of all the day's fluency samples, independent of the order they arrive in
+            updates["fluency_sum"] = table.c.fluency_sum + stmt.excluded.fluency_sum
+            updates["fluency_count"] = table.c.fluency_count + 1
+            updates["fluency_score"] = (table.c.fluency_sum + stmt.excluded.fluency_sum) / (table.c.fluency_count + 1)
+        self.session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.day],
+            set_=updates
+        ))
+        self._adjust_stats(user_id, vocabulary_learned=vocab_count, conversation_minutes=conversation_duration,
+                           progress_version=1)
+        return today
+    
+    def record_conversation_session(self, user_id, words, duration_minutes, mistakes_made=0,
+                                    fluency_score=None, word_proficiency=None):
+        """
+        Persist everything a finished conversation session produced in one transaction.
+        
+        Adds the session's new words, records progress and re-evaluates the
+        user's level, loading the user once and committing once.
+        
+        Args:
+            user_id: User ID
+            words: Words met in the session (duplicates and blanks are ignored)
+            duration_minutes: Session length in minutes
+            mistakes_made: Number of distinct mistakes
+            fluency_score: Mean fluency for the session, or None if not measured
+            word_proficiency: Optional mapping of word to initial proficiency
+            
+        Returns:
+            Dictionary with the number of words added, whether the level
+            changed and the current level, or None if the user doesn't exist
+        """
+        user = self.session.get(User, user_id)
+        if not user:
+            return None
+        
+        try:
+            counts = self._add_words_to_user(
+                user_id, words, user.target_language,
+                proficiency=0.1, proficiency_delta=None, word_proficiency=word_proficiency
+            )
+            self._record_progress(
+                user_id,
+                vocab_count=counts["added"],
+                conversation_duration=duration_minutes,
                 mistakes_made=mistakes_made,
-                mistakes_corrected=mistakes_corrected,
-                fluency_score=fluency_score or 0.0
+                fluency_score=fluency_score
             )
-            self.session.add(progress)
+            level_changed = self._update_user_level(user)
+            current_level = user.current_level
             self.session.commit()
-            return progress
+        except Exception:
+            self.session.rollback()
+            raise
+        
+        if level_changed:
+            self.invalidate_user(user_id)
+        return {"added": counts["added"], "level_changed": level_changed, "current_level": current_level}
     
+    @request_memoized
     def get_user_progress(self, user_id, days=30):
         """Get a user's progress over a period of time."""
-        cutoff_date = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+        cutoff_day = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).date()
         progress = self.session.query(ProgressRecord).filter(
             ProgressRecord.user_id == user_id,
-            ProgressRecord.date >= cutoff_date
-        ).order_by(ProgressRecord.date).all()
-        return progress
\ No newline at end of file
+            ProgressRecord.day >= cutoff_day
+        ).order_by(ProgressRecord.day).all()
+        return progress
+    
+    @request_memoized
+    def get_daily_progress(self, user_ids=None, days=30):
+        """
+        Aggregate progress per user and day in a single GROUP BY query.
+        
+        The result is columnar (one list per field, rows ordered by user and
+        day), so it can be handed straight to numpy.asarray for reports over
+        many users.
+        
+        Args:
+            user_ids: Iterable of user IDs, or None for every user
+            days: Number of days to include, counting back from today
+            
+        Returns:
+            Dictionary of equal-length lists: user_id, day, vocabulary_count,
+            conversation_duration, mistakes_made, mistakes_corrected,
+            fluency_sum, fluency_count and fluency_score (the day's mean, 0.0
+            when no fluency was recorded)
+        """
+        cutoff_day = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).date()
+        p = ProgressRecord
+        fluency_sum = func.coalesce(func.sum(p.fluency_sum), 0.0)
+        fluency_count = func.coalesce(func.sum(p.fluency_count), 0)
+        stmt = select(
+            p.user_id,
+            p.day,
+            func.coalesce(func.sum(p.vocabulary_count), 0).label("vocabulary_count"),
+            func.coalesce(func.sum(p.conversation_duration), 0).label("conversation_duration"),
+            func.coalesce(func.sum(p.mistakes_made), 0).label("mistakes_made"),
+            func.coalesce(func.sum(p.mistakes_corrected), 0).label("mistakes_corrected"),
+            fluency_sum.label("fluency_sum"),
+            fluency_count.label("fluency_count"),
+            func.coalesce(fluency_sum / func.nullif(fluency_count, 0), 0.0).label("fluency_score")
+        ).where(p.day >= cutoff_day)
+        if user_ids is not None:
+            stmt = stmt.where(p.user_id.in_(list(user_ids)))
+        stmt = stmt.group_by(p.user_id, p.day).order_by(p.user_id, p.day)
+        
+        result = self.session.execute(stmt)
+        columns = {key: [] for key in result.keys()}
+        for row in result:
+            for key, value in zip(columns, row):
+                columns[key].append(value)
+        return columns
+    
+    # Data exports
+    def export_columns(self, dataset):
+        """Column names and SQLAlchemy types of an export dataset, in output order."""
+        return [(column.name, column.type) for column in _export_select(dataset).selected_columns]
+    
+    def iter_export_columns(self, dataset, start=None, end=None, language=None, chunk_size=DB_STREAM_CHUNK_SIZE):
+        """
+        Stream an export dataset in columnar chunks.
+        
+        Rows are read through a server-side cursor on PostgreSQL, so memory use
+        is bounded by chunk_size however large the export is.
+        
+        Args:
+            dataset: One of EXPORT_DATASETS
+            start: First date (datetime.date) to include, or None
+            end: Last date (datetime.date) to include, or None
+            language: Language code to restrict to, or None for all
+            chunk_size: Rows fetched from the database per round trip
+            
+        Yields:
+            Dictionaries of equal-length column lists, in export_columns order
+        """
+        yield from self._stream_columns(_export_select(dataset, start, end, language), chunk_size)
+    
+    # Cohort analytics
+    def iter_progress_columns(self, since_day, chunk_size=DB_STREAM_CHUNK_SIZE):
+        """
+        Stream progress records since a day in columnar chunks, for batch analytics.
+        
+        Args:
+            since_day: First day (datetime.date) to include
+            chunk_size: Rows fetched from the database per round trip
+            
+        Yields:
+            Dictionaries of equal-length lists: user_id, language (the user's
+            target language), day, vocabulary_count, conversation_duration,
+            fluency_sum and fluency_count
+        """
+        p = ProgressRecord
+        stmt = select(
+            p.user_id,
+            User.target_language.label("language"),
+            p.day,
+            func.coalesce(p.vocabulary_count, 0).label("vocabulary_count"),
+            func.coalesce(p.conversation_duration, 0).label("conversation_duration"),
+            func.coalesce(p.fluency_sum, 0.0).label("fluency_sum"),
+            func.coalesce(p.fluency_count, 0).label("fluency_count")
+        ).join(User, User.id == p.user_id).where(p.day >= since_day)
+        yield from self._stream_columns(stmt, chunk_size)
+    
+    def iter_vocabulary_columns(self, chunk_size=DB_STREAM_CHUNK_SIZE):
+        """
+        Stream every user's vocabulary entries in columnar chunks, for batch analytics.
+        
+        Args:
+            chunk_size: Rows fetched from the database per round trip
+            
+        Yields:
+            Dictionaries of equal-length lists: user_id, language (the user's
+            target language) and proficiency
+        """
+        uv = user_vocabulary.c
+        stmt = select(
+            uv.user_id,
+            User.target_language.label("language"),
+            func.coalesce(uv.proficiency, 0.0).label("proficiency")
+        ).join(User, User.id == uv.user_id)
+        yield from self._stream_columns(stmt, chunk_size)
+    
+    def replace_cohort_analytics(self, since_week, weekly, vocabulary, leaderboard):
+        """
+        Replace the cohort summary tables with a new analytics run, in one transaction.
+        
+        Weekly statistics and leaderboards are replaced from since_week on, so
+        older weeks are kept; the vocabulary snapshot is replaced entirely.
+        
+        Args:
+            since_week: First week_start (datetime.date) covered by the run
+            weekly: Row dictionaries for cohort_weekly_stats
+            vocabulary: Row dictionaries for cohort_vocabulary_stats
+            leaderboard: Row dictionaries for leaderboard_entries
+        """
+        try:
+            self.session.query(CohortWeeklyStats).filter(
+                CohortWeeklyStats.week_start >= since_week
+            ).delete(synchronize_session=False)
+            self.session.query(LeaderboardEntry).filter(
+                LeaderboardEntry.week_start >= since_week
+            ).delete(synchronize_session=False)
+            self.session.query(CohortVocabularyStats).delete(synchronize_session=False)
+            for table, rows in ((CohortWeeklyStats.__table__, weekly),
+                                (CohortVocabularyStats.__table__, vocabulary),
+                                (LeaderboardEntry.__table__, leaderboard)):
+                if rows:
+                    self.session.execute(table.insert(), rows)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+    
+    def get_cohort_weekly_stats(self, language=None, weeks=ANALYTICS_WEEKS):
+        """
+        Get weekly cohort statistics, oldest week first.
+        
+        Args:
+            language: Language code, or None for every language
+            weeks: Number of weeks to include, counting back from the current one
+            
+        Returns:
+            List of row dictionaries from cohort_weekly_stats
+        """
+        today = datetime.datetime.utcnow().date()
+        since_week = today - datetime.timedelta(days=today.weekday() + 7 * (weeks - 1))
+        stmt = select(CohortWeeklyStats.__table__).where(CohortWeeklyStats.week_start >= since_week)
+        if language:
+            stmt = stmt.where(CohortWeeklyStats.language == language)
+        stmt = stmt.order_by(CohortWeeklyStats.week_start, CohortWeeklyStats.language)
+        return [dict(row._mapping) for row in self.session.execute(stmt)]
+    
+    def get_cohort_vocabulary_stats(self):
+        """Get the latest per-language vocabulary snapshot, as row dictionaries."""
+        stmt = select(CohortVocabularyStats.__table__).order_by(CohortVocabularyStats.language)
+        return [dict(row._mapping) for row in self.session.execute(stmt)]
+    
+    def get_leaderboard(self, language, week_start=None, limit=LEADERBOARD_SIZE):
+        """
+        Get a language's weekly leaderboard.
+        
+        Args:
+            language: Language code
+            week_start: Monday of the week (datetime.date), or None for the latest computed week
+            limit: Maximum number of entries, or None for the whole board
+            
+        Returns:
+            Tuple of (week_start or None if nothing was computed, list of entry
+            dictionaries with rank, user_id, vocabulary_added,
+            conversation_minutes and mean_fluency)
+        """
+        entry = LeaderboardEntry
+        if week_start is None:
+            week_start = self.session.execute(
+                select(func.max(entry.week_start)).where(entry.language == language)
+            ).scalar()
+            if week_start is None:
+                return None, []
+        
+        stmt = select(
+            entry.rank, entry.user_id, entry.vocabulary_added,
+            entry.conversation_minutes, entry.mean_fluency
+        ).where(
+            entry.language == language, entry.week_start == week_start
+        ).order_by(entry.rank).limit(limit)
+        return week_start, [dict(row._mapping) for row in self.session.execute(stmt)]
+    
+    def get_popular_target_languages(self, limit=None):
+        """
+        Get the languages users are learning, most learners first.
+        
+        Args:
+            limit: Maximum number of languages, or None for all
+            
+        Returns:
+            List of language codes
+        """
+        stmt = select(User.target_language).where(
+            User.target_language.isnot(None)
+        ).group_by(User.target_language).order_by(func.count().desc(), User.target_language)
+        if limit:
+            stmt = stmt.limit(limit)
+        return list(self.session.execute(stmt).scalars())
+    
+    def classify_vocabulary_difficulty(self, language=None, batch_size=1000, reclassify=False):
+        """
+        Set the difficulty level of vocabulary words that have none, from their frequency ranks.
+        
+        Words of languages without a rank table are left unset.
+        
+        Args:
+            language: Only classify words of this language, or None for all
+            batch_size: Words fetched and updated per statement
+            reclassify: Also replace the levels words already have, e.g. after
+                        the rank bands changed
+            
+        Returns:
+            Number of words classified
+        """
+        stmt = select(Vocabulary.id, Vocabulary.word, Vocabulary.language).order_by(Vocabulary.id)
+        if not reclassify:
+            stmt = stmt.where(Vocabulary.difficulty_level.is_(None))
+        if language:
+            stmt = stmt.where(Vocabulary.language == language)
+        
+        classified = 0
+        last_id = 0
+        update_stmt = Vocabulary.__table__.update().where(
+            Vocabulary.id == bindparam("b_id")
+        ).values(difficulty_level=bindparam("b_difficulty_level"))
+        try:
+            while True:
+                rows = self.session.execute(stmt.where(Vocabulary.id > last_id).limit(batch_size)).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                by_language = {}
+                for row in rows:
+                    by_language.setdefault(row.language, []).append(row)
+                updates = []
+                for code, language_rows in by_language.items():
+                    levels = _classify_difficulty([row.word for row in language_rows], code)
+                    updates.extend({"b_id": row.id, "b_difficulty_level": levels[row.word]}
+                                   for row in language_rows if levels[row.word])
+                if updates:
+                    self.session.execute(update_stmt, updates)
+                    classified += len(updates)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return classified
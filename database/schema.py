@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Table, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Index, LargeBinary, Table, Text, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import datetime
 
+from config import SRS_INITIAL_EASE
+
 Base = declarative_base()
 
 # Association table for many-to-many relationship between users and vocabulary words
@@ -12,7 +14,18 @@ user_vocabulary = Table(
     Column('user_id', Integer, ForeignKey('users.id')),
     Column('vocabulary_id', Integer, ForeignKey('vocabulary.id')),
     Column('proficiency', Float, default=0.0),  # 0.0 to 1.0 representing mastery
-    Column('last_reviewed', DateTime, default=datetime.datetime.utcnow)
+    Column('last_reviewed', DateTime, default=datetime.datetime.utcnow),
+    # Spaced-repetition state; new words are due straight away
+    Column('due_at', DateTime, default=datetime.datetime.utcnow),
+    Column('interval_days', Float, default=0.0),
+    Column('ease_factor', Float, default=SRS_INITIAL_EASE),  # Same default as the column added by _upgrade_schema
+    Column('repetitions', Integer, default=0),
+    # Each word appears once per user; lets inserts use ON CONFLICT DO NOTHING
+    Index('uq_user_vocabulary_user_word', 'user_id', 'vocabulary_id', unique=True),
+    # Keyset pagination order for a user's vocabulary list
+    Index('ix_user_vocabulary_review_order', 'user_id', 'last_reviewed', 'vocabulary_id'),
+    # Review queue: a user's due cards, soonest first
+    Index('ix_user_vocabulary_due', 'user_id', 'due_at', 'vocabulary_id')
 )
 
 class User(Base):
@@ -32,9 +45,14 @@ class User(Base):
     vocabulary = relationship("Vocabulary", secondary=user_vocabulary, back_populates="users")
     conversations = relationship("Conversation", back_populates="user")
     progress_records = relationship("ProgressRecord", back_populates="user")
+    stats = relationship("UserStats", uselist=False, back_populates="user")
 
 class Vocabulary(Base):
     __tablename__ = 'vocabulary'
+    __table_args__ = (
+        # Words are stored lower-cased, once per language; lets inserts use ON CONFLICT DO NOTHING
+        Index('uq_vocabulary_language_word', 'language', 'word', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     word = Column(String(100), nullable=False)
@@ -55,13 +73,22 @@ class Conversation(Base):
     topic = Column(String(100))
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
     language = Column(String(5), nullable=False)  # Language code
+    archived_at = Column(DateTime, nullable=True)  # Set once older messages have moved to cold storage
     
     # Relationships
     user = relationship("User", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation")
+    archive = relationship("ConversationArchive", uselist=False, back_populates="conversation")
 
 class Message(Base):
     __tablename__ = 'messages'
+    __table_args__ = (
+        # Windowed reads of a conversation's most recent messages
+        Index('ix_messages_conversation_timestamp', 'conversation_id', 'timestamp', 'id'),
+        # Archiving deletes message rows; SQLite must not hand their ids out again, as
+        # archived messages and their analyses keep them (PostgreSQL sequences never do)
+        {'sqlite_autoincrement': True}
+    )
     
     id = Column(Integer, primary_key=True)
     conversation_id = Column(Integer, ForeignKey('conversations.id'))
@@ -72,17 +99,125 @@ class Message(Base):
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
 
+class MessageAnalysis(Base):
+    """Language analysis of one user message, kept for progress analytics and exports."""
+    __tablename__ = 'message_analyses'
+    __table_args__ = (
+        Index('ix_message_analyses_created', 'created_at'),
+    )
+    
+    # Not a foreign key: message rows move to cold storage, but their analysis stays queryable
+    message_id = Column(Integer, primary_key=True, autoincrement=False)
+    conversation_id = Column(Integer, ForeignKey('conversations.id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    language = Column(String(5), nullable=False)  # Language code the message was written in
+    fluency_score = Column(Float)  # AI-evaluated fluency (0.0 to 1.0)
+    error_count = Column(Integer, default=0)  # Grammar/vocabulary errors found
+    vocabulary_count = Column(Integer, default=0)  # Words/phrases identified
+    grammar_complexity = Column(Float)  # AI-evaluated complexity of the structures used (0.0 to 1.0)
+    analysis = Column(Text)  # Full analysis as returned by the model, JSON
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ConversationArchive(Base):
+    """Compressed cold storage for the messages of an idle conversation."""
+    __tablename__ = 'conversation_archives'
+    
+    conversation_id = Column(Integer, ForeignKey('conversations.id'), primary_key=True)
+    message_count = Column(Integer, default=0)
+    original_size = Column(Integer, default=0)  # Bytes of the uncompressed JSON payload
+    payload = Column(LargeBinary, nullable=False)  # zlib-compressed JSON list of messages
+    archived_at = Column(DateTime, default=datetime.datetime.utcnow)
+    
+    # Relationships
+    conversation = relationship("Conversation", back_populates="archive")
+
 class ProgressRecord(Base):
     __tablename__ = 'progress_records'
+    __table_args__ = (
+        # One row per user per day; also serves as the index for date-range lookups
+        UniqueConstraint('user_id', 'day', name='uq_progress_user_day'),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'))
     date = Column(DateTime, default=datetime.datetime.utcnow)
+    day = Column(Date, nullable=False, default=lambda: datetime.datetime.utcnow().date())  # UTC day the record covers
     vocabulary_count = Column(Integer, default=0)  # Total vocabulary words known
     conversation_duration = Column(Integer, default=0)  # Time spent in conversation (minutes)
     mistakes_made = Column(Integer, default=0)  # Number of grammar/vocabulary mistakes
     mistakes_corrected = Column(Integer, default=0)  # Number of corrections accepted
-    fluency_score = Column(Float, default=0.0)  # AI-evaluated fluency (0.0 to 1.0)
+    fluency_score = Column(Float, default=0.0)  # AI-evaluated fluency (0.0 to 1.0), mean of the day's samples
+    fluency_sum = Column(Float, default=0.0)  # Sum of the day's fluency samples
+    fluency_count = Column(Integer, default=0)  # Number of fluency samples, so means can be combined exactly
     
     # Relationships
-    user = relationship("User", back_populates="progress_records")
\ No newline at end of file
+    user = relationship("User", back_populates="progress_records")
+
+class UserStats(Base):
+    """Per-user learning counters, maintained incrementally by DatabaseHandler write paths."""
+    __tablename__ = 'user_stats'
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    vocab_total = Column(Integer, default=0)  # Words in the user's vocabulary
+    vocab_low = Column(Integer, default=0)  # Words with proficiency < 0.3
+    vocab_medium = Column(Integer, default=0)  # Words with 0.3 <= proficiency < 0.7
+    vocab_high = Column(Integer, default=0)  # Words with proficiency >= 0.7
+    vocabulary_learned = Column(Integer, default=0)  # Sum of recorded progress vocabulary counts
+    conversation_minutes = Column(Integer, default=0)  # Sum of recorded conversation durations
+    next_level_threshold = Column(Integer, default=0)  # Words needed for the next level (0 at the top level)
+    progress_version = Column(Integer, nullable=False, default=0)  # Bumped on every progress write; keys chart caches
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+    
+    # Relationships
+    user = relationship("User", back_populates="stats")
+
+class CohortWeeklyStats(Base):
+    """Per-language weekly cohort statistics, rebuilt by the analytics job (python -m database.analytics)."""
+    __tablename__ = 'cohort_weekly_stats'
+    __table_args__ = (
+        UniqueConstraint('language', 'week_start', name='uq_cohort_weekly_language_week'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    language = Column(String(5), nullable=False)  # Learners' target language
+    week_start = Column(Date, nullable=False)  # Monday of the UTC week
+    active_users = Column(Integer, default=0)  # Users with any progress recorded that week
+    vocabulary_added = Column(Integer, default=0)  # Sum of recorded vocabulary counts
+    conversation_minutes = Column(Integer, default=0)  # Sum of recorded conversation durations
+    fluency_samples = Column(Integer, default=0)  # Fluency samples behind mean_fluency
+    mean_fluency = Column(Float)  # Mean of the week's fluency samples (NULL when there were none)
+    vocab_growth_p25 = Column(Float)  # Percentiles of words added per active user that week
+    vocab_growth_p50 = Column(Float)
+    vocab_growth_p75 = Column(Float)
+    vocab_growth_p90 = Column(Float)
+    computed_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class CohortVocabularyStats(Base):
+    """Per-language snapshot of vocabulary sizes, rebuilt by the analytics job."""
+    __tablename__ = 'cohort_vocabulary_stats'
+    
+    language = Column(String(5), primary_key=True)  # Learners' target language
+    learners = Column(Integer, default=0)  # Users with at least one word
+    vocab_size_p25 = Column(Float)  # Percentiles of vocabulary size per learner
+    vocab_size_p50 = Column(Float)
+    vocab_size_p75 = Column(Float)
+    vocab_size_p90 = Column(Float)
+    mean_proficiency = Column(Float)  # Mean proficiency over all the cohort's words
+    mastered_share = Column(Float)  # Share of words with proficiency >= 0.7
+    computed_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class LeaderboardEntry(Base):
+    """A ranked user in a language's weekly leaderboard, rebuilt by the analytics job."""
+    __tablename__ = 'leaderboard_entries'
+    __table_args__ = (
+        UniqueConstraint('language', 'week_start', 'rank', name='uq_leaderboard_language_week_rank'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    language = Column(String(5), nullable=False)
+    week_start = Column(Date, nullable=False)  # Monday of the UTC week
+    rank = Column(Integer, nullable=False)  # 1 is the top of the board
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    vocabulary_added = Column(Integer, default=0)  # Ranking score: words added that week
+    conversation_minutes = Column(Integer, default=0)  # Tie-breaker: minutes practised that week
+    mean_fluency = Column(Float)  # Mean of the week's fluency samples (NULL when there were none)
@@ -5,14 +5,6 @@ import random
 from typing import List, Dict, Any, Tuple, Optional
 import requests
 
-# For open-source models
-try:
-    import torch
-    from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
-except ImportError:
-    # Not required if using API-based models
-    pass
-
 from config import (
     LLM_PROVIDER, OPENROUTER_API_KEY, OPENROUTER_MODEL,
     HUGGINGFACE_MODEL, MAX_CONVERSATION_HISTORY,
@@ -38,7 +30,11 @@ class LLMHandler:
             }
         
         elif self.provider == "huggingface":
-            # Initialize Hugging Face model
+            # Initialize Hugging Face model; torch and transformers are only needed
+            # (and only imported) for this provider, as they take seconds to load
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+            
             self.model_name = HUGGINGFACE_MODEL
             if torch.cuda.is_available():
                 self.device = "cuda"
@@ -266,7 +262,7 @@ Message: "{user_message}"
 
 Provide the following in a structured JSON format:
 1. Errors: List of grammar or vocabulary errors with corrections
-2. Vocabulary: List of words/phrases used and their difficulty level
+2. Vocabulary: List of words/phrases used and how well the learner uses them
 3. Grammar: Assessment of grammatical structures used
 4. Fluency: Rating from 0.0 to 1.0
 5. Suggestions: Recommended vocabulary or grammar to introduce next
@@ -277,7 +273,7 @@ JSON Format:
     {{"original": "error text", "correction": "corrected text", "explanation": "brief explanation"}}
   ],
   "vocabulary": [
-    {{"word": "word used", "level": "Beginner/Intermediate/Advanced", "mastery": 0.0-1.0}}
+    {{"word": "word used", "mastery": 0.0-1.0}}
   ],
   "grammar": {{"structures": ["structures used"], "complexity": 0.0-1.0, "appropriate_for_level": true/false}},
   "fluency": 0.0-1.0,
@@ -3,18 +3,30 @@ from typing import Dict, List, Any, Optional, Tuple
 import json
 import io
 import base64
-# Add these lines at the top of models/progress_tracker.py
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive Agg backend
-import matplotlib.pyplot as plt
 
+from database.cache import create_cache
 from database.db_handler import DatabaseHandler
-from config import WORDS_PER_LEVEL
+from config import WORDS_PER_LEVEL, CACHE_URL, CHART_CACHE_MAX_ENTRIES, CHART_CACHE_TTL_SECONDS
+
+# Charts served by the progress page
+CHART_TYPES = ("vocabulary", "fluency", "time")
+
+def _figure_class():
+    """Import matplotlib on first use; it is slow to import and only needed to draw charts."""
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-interactive Agg backend
+    from matplotlib.figure import Figure
+    return Figure
 
 class ProgressTracker:
-    def __init__(self, db_handler: DatabaseHandler):
+    def __init__(self, db_handler: DatabaseHandler, chart_cache=None):
         """Initialize the progress tracker with a database handler."""
         self.db = db_handler
+        # Rendered charts, keyed by user, chart type, days and progress data version
+        self.chart_cache = chart_cache if chart_cache is not None else create_cache(
+            CACHE_URL, prefix="linguadex:charts:",
+            max_entries=CHART_CACHE_MAX_ENTRIES, default_ttl=CHART_CACHE_TTL_SECONDS
+        )
     
     def track_conversation(self, 
                          user_id: int, 
@@ -43,70 +55,73 @@ class ProgressTracker:
         
         # Extract errors and vocabulary from analysis results
         all_errors = []
-        all_vocabulary = []
-        avg_fluency = 0.0
+        word_proficiency = {}
+        fluency_scores = []
         
         for analysis in analysis_results:
             if "errors" in analysis:
                 all_errors.extend(analysis.get("errors", []))
             
-            if "vocabulary" in analysis:
-                all_vocabulary.extend(analysis.get("vocabulary", []))
+            # Deduplicate words, keeping the proficiency from their first mention
+            for vocab_item in analysis.get("vocabulary", []):
+                word = vocab_item.get("word", "")
+                if word and word not in word_proficiency:
+                    word_proficiency[word] = vocab_item.get("mastery", 0.1)
             
             if "fluency" in analysis:
-                avg_fluency += analysis.get("fluency", 0)
+                fluency_scores.append(analysis.get("fluency", 0))
         
-        # Calculate average fluency if we have analysis results
-        if analysis_results:
-            avg_fluency /= len(analysis_results)
+        # Average fluency over the analyses that measured it
+        avg_fluency = sum(fluency_scores) / len(fluency_scores) if fluency_scores else None
         
         # Count number of unique errors
         unique_errors = {json.dumps(error): error for error in all_errors}
         errors_count = len(unique_errors)
         
-        # Add vocabulary words to user's dictionary
-        added_vocab_count = 0
-        for vocab_item in all_vocabulary:
-            word = vocab_item.get("word", "")
-            if word:
-                # Determine proficiency from analysis if available
-                proficiency = vocab_item.get("mastery", 0.1)
-                success = self.db.add_word_to_user(
-                    user_id=user_id, 
-                    word=word,
-                    language=self.db.get_user(user_id=user_id).target_language,
-                    proficiency=proficiency
-                )
-                if success:
-                    added_vocab_count += 1
-        
-        # Record progress in database
-        self.db.record_progress(
+        # Add the session's words, record progress and update the level in one transaction
+        result = self.db.record_conversation_session(
             user_id=user_id,
-            vocab_count=added_vocab_count,
-            conversation_duration=duration_minutes,
+            words=list(word_proficiency),
+            duration_minutes=duration_minutes,
             mistakes_made=errors_count,
-            mistakes_corrected=0,  # Would need separate tracking of corrections
-            fluency_score=avg_fluency
+            fluency_score=avg_fluency,
+            word_proficiency=word_proficiency
         )
-        
-        # Update user level based on vocabulary count
-        level_changed = self.db.update_user_level(user_id)
+        if result is None:
+            return {"error": "User not found"}
         
         # Compile statistics
         stats = {
             "session_duration_minutes": duration_minutes,
             "total_words_used": total_words_used,
             "unique_words_used": unique_words_used,
-            "new_vocabulary_added": added_vocab_count,
+            "new_vocabulary_added": result["added"],
             "errors_made": errors_count,
-            "average_fluency": avg_fluency,
-            "level_changed": level_changed,
-            "current_level": self.db.get_user(user_id=user_id).current_level
+            "average_fluency": avg_fluency or 0.0,
+            "level_changed": result["level_changed"],
+            "current_level": result["current_level"]
         }
         
         return stats
     
+    def get_daily_progress(self, user_id: int, days: int = 30) -> Dict[str, List[Any]]:
+        """
+        Get a user's progress aggregated by day.
+        
+        The report, the recommendations and the charts all read the same
+        aggregate; the database handler memoizes it for the current request,
+        so it is queried once.
+        
+        Args:
+            user_id: User ID
+            days: Number of days to include
+            
+        Returns:
+            Columnar daily progress, as returned by DatabaseHandler.get_daily_progress
+        """
+        # A tuple rather than a list, so the call can be memoized
+        return self.db.get_daily_progress(user_ids=(user_id,), days=days)
+    
     def get_recommendations(self, user_id: int) -> Dict[str, Any]:
         """
         Get personalized learning recommendations.
@@ -117,7 +132,7 @@ class ProgressTracker:
         Returns:
             Dictionary with recommendations
         """
-        user = self.db.get_user(user_id=user_id)
+        user = self.db.get_user_profile(user_id)
         if not user:
             return {"error": "User not found"}
         
@@ -128,21 +143,23 @@ class ProgressTracker:
             limit=10
         )
         
-        # Get user's progress history
-        progress_history = self.db.get_user_progress(user_id=user_id, days=30)
+        # Get user's progress history, one entry per active day
+        daily = self.get_daily_progress(user_id, days=30)
         
         # Calculate average fluency trend
-        fluency_trend = [record.fluency_score for record in progress_history if record.fluency_score > 0]
+        fluency_trend = [
+            score for score, samples in zip(daily["fluency_score"], daily["fluency_count"]) if samples
+        ]
         fluency_improving = len(fluency_trend) >= 2 and fluency_trend[-1] > fluency_trend[0]
         
         # Check vocabulary acquisition rate
-        vocab_counts = [record.vocabulary_count for record in progress_history]
+        vocab_counts = daily["vocabulary_count"]
         vocab_rate = sum(vocab_counts) / len(vocab_counts) if vocab_counts else 0
         
         # Determine target vocabulary count for current level
         level_vocab_goals = WORDS_PER_LEVEL
         current_level = user.current_level
-        current_vocab_count = sum([record.vocabulary_count for record in progress_history])
+        current_vocab_count = self.db.get_user_stats(user_id).vocab_total
         next_level = next((level for level, count in level_vocab_goals.items() 
                            if level_vocab_goals.get(current_level, 0) < count), None)
         
@@ -180,51 +197,25 @@ class ProgressTracker:
         Returns:
             Dictionary with progress report
         """
-        user = self.db.get_user(user_id=user_id)
+        user = self.db.get_user_profile(user_id)
         if not user:
             return {"error": "User not found"}
         
-        # Get progress history
-        progress_history = self.db.get_user_progress(user_id=user_id, days=days)
-        
-        # Group by date
-        progress_by_date = {}
-        for record in progress_history:
-            date_str = record.date.strftime("%Y-%m-%d")
-            if date_str not in progress_by_date:
-                progress_by_date[date_str] = {
-                    "vocabulary_count": 0,
-                    "conversation_duration": 0,
-                    "mistakes_made": 0,
-                    "mistakes_corrected": 0,
-                    "fluency_score": 0
-                }
-            
-            progress_by_date[date_str]["vocabulary_count"] += record.vocabulary_count
-            progress_by_date[date_str]["conversation_duration"] += record.conversation_duration
-            progress_by_date[date_str]["mistakes_made"] += record.mistakes_made
-            progress_by_date[date_str]["mistakes_corrected"] += record.mistakes_corrected
-            
-            # Average fluency scores
-            if record.fluency_score > 0:
-                if progress_by_date[date_str]["fluency_score"] > 0:
-                    progress_by_date[date_str]["fluency_score"] = (
-                        progress_by_date[date_str]["fluency_score"] + record.fluency_score
-                    ) / 2
-                else:
-                    progress_by_date[date_str]["fluency_score"] = record.fluency_score
-        
-        # Calculate totals and averages
-        total_vocab = sum(data["vocabulary_count"] for data in progress_by_date.values())
-        total_duration = sum(data["conversation_duration"] for data in progress_by_date.values())
-        avg_fluency = sum(data["fluency_score"] for data in progress_by_date.values()) / len(progress_by_date) if progress_by_date else 0
-        
-        # Get vocabulary proficiency distribution
-        all_vocab = self.db.get_user_vocabulary(user_id=user_id, limit=1000)
+        # Get progress history, aggregated per day
+        daily = self.get_daily_progress(user_id, days=days)
+        
+        # Calculate totals and averages; fluency is the mean of every sample in the period
+        total_vocab = sum(daily["vocabulary_count"])
+        total_duration = sum(daily["conversation_duration"])
+        fluency_samples = sum(daily["fluency_count"])
+        avg_fluency = sum(daily["fluency_sum"]) / fluency_samples if fluency_samples else 0
+        
+        # Get vocabulary proficiency distribution from the maintained stats
+        stats = self.db.get_user_stats(user_id)
         proficiency_distribution = {
-            "low": len([v for v in all_vocab if v.get("proficiency", 0) < 0.3]),
-            "medium": len([v for v in all_vocab if 0.3 <= v.get("proficiency", 0) < 0.7]),
-            "high": len([v for v in all_vocab if v.get("proficiency", 0) >= 0.7])
+            "low": stats.vocab_low,
+            "medium": stats.vocab_medium,
+            "high": stats.vocab_high
         }
         
         # Calculate level progress
@@ -255,23 +246,26 @@ class ProgressTracker:
             },
             "summary": {
                 "period_days": days,
-                "active_days": len(progress_by_date),
+                "active_days": len(daily["day"]),
                 "total_vocabulary_learned": total_vocab,
                 "total_conversation_minutes": total_duration,
                 "average_fluency_score": avg_fluency
             },
             "vocabulary": {
-                "total_words": len(all_vocab),
+                "total_words": stats.vocab_total,
                 "proficiency_distribution": proficiency_distribution
             },
             "daily_progress": [
                 {
-                    "date": date,
-                    "vocabulary_added": data["vocabulary_count"],
-                    "minutes_practiced": data["conversation_duration"],
-                    "fluency_score": data["fluency_score"]
+                    "date": day.strftime("%Y-%m-%d"),
+                    "vocabulary_added": vocabulary_count,
+                    "minutes_practiced": minutes,
+                    "fluency_score": fluency_score
                 }
-                for date, data in progress_by_date.items()
+                for day, vocabulary_count, minutes, fluency_score in zip(
+                    daily["day"], daily["vocabulary_count"],
+                    daily["conversation_duration"], daily["fluency_score"]
+                )
             ]
         }
         
@@ -285,88 +279,110 @@ class ProgressTracker:
             user_id: User ID
             chart_type: Type of chart (vocabulary, fluency, time)
             days: Number of days to include
-            
+        
         Returns:
             Base64-encoded image string or None if error
         """
+        png, _ = self.get_progress_chart(user_id, chart_type, days)
+        return base64.b64encode(png).decode('utf-8') if png else None
+    
+    def get_chart_version(self, user_id: int, chart_type: str, days: int) -> str:
+        """
+        Identify the current rendering of a chart, for cache keys and ETags.
+        
+        The user's progress version changes on every progress write, and the
+        date is included because the chart window moves each day.
+        """
+        version = self.db.get_user_stats(user_id).progress_version
+        return f"{user_id}-{chart_type}-{days}-{version}-{datetime.date.today().isoformat()}"
+    
+    def get_progress_chart(self, user_id: int, chart_type: str = "vocabulary",
+                           days: int = 30) -> Tuple[Optional[bytes], str]:
+        """
+        Get a progress chart as PNG bytes, rendering it only if the data changed.
+        
+        Args:
+            user_id: User ID
+            chart_type: Type of chart (vocabulary, fluency, time)
+            days: Number of days to include
+        
+        Returns:
+            Tuple of (PNG bytes or None if there is no data, chart version)
+        """
+        version = self.get_chart_version(user_id, chart_type, days)
+        key = f"chart:{version}"
+        if self.chart_cache is not None:
+            cached = self.chart_cache.get(key)
+            if cached is not None:
+                return cached or None, version
+        
+        png = self.render_progress_chart(user_id, chart_type, days)
+        if self.chart_cache is not None:
+            # Cache "no data" too, as an empty value, so it isn't recomputed either
+            self.chart_cache.set(key, png or b"")
+        return png, version
+    
+    def render_progress_chart(self, user_id: int, chart_type: str = "vocabulary", days: int = 30) -> Optional[bytes]:
+        """
+        Render a progress chart as PNG bytes.
+        
+        Args:
+            user_id: User ID
+            chart_type: Type of chart (vocabulary, fluency, time)
+            days: Number of days to include
+        
+        Returns:
+            PNG image bytes or None if there is no data or rendering failed
+        """
         try:
-            # Get progress history
-            progress_history = self.db.get_user_progress(user_id=user_id, days=days)
-            
-            # Group by date
-            progress_by_date = {}
-            for record in progress_history:
-                date_str = record.date.strftime("%Y-%m-%d")
-                if date_str not in progress_by_date:
-                    progress_by_date[date_str] = {
-                        "vocabulary_count": 0,
-                        "conversation_duration": 0,
-                        "fluency_score": 0
-                    }
-                
-                progress_by_date[date_str]["vocabulary_count"] += record.vocabulary_count
-                progress_by_date[date_str]["conversation_duration"] += record.conversation_duration
-                
-                # Average fluency scores
-                if record.fluency_score > 0:
-                    if progress_by_date[date_str]["fluency_score"] > 0:
-                        progress_by_date[date_str]["fluency_score"] = (
-                            progress_by_date[date_str]["fluency_score"] + record.fluency_score
-                        ) / 2
-                    else:
-                        progress_by_date[date_str]["fluency_score"] = record.fluency_score
-            
-            # Sort dates
-            dates = sorted(progress_by_date.keys())
+            # Get progress history, aggregated per day
+            daily = self.get_daily_progress(user_id, days=days)
+            dates = [day.strftime("%Y-%m-%d") for day in daily["day"]]
             
             if not dates:
                 return None
             
-            # Set up the plot
-            plt.figure(figsize=(10, 6))
+            # Set up the plot; a standalone Figure rather than pyplot's global state,
+            # so charts can be rendered concurrently by different request threads
+            fig = _figure_class()(figsize=(10, 6))
+            ax = fig.subplots()
             
             if chart_type == "vocabulary":
                 # Cumulative vocabulary over time
                 cumulative_vocab = 0
                 vocab_data = []
-                for date in dates:
-                    cumulative_vocab += progress_by_date[date]["vocabulary_count"]
+                for vocabulary_count in daily["vocabulary_count"]:
+                    cumulative_vocab += vocabulary_count
                     vocab_data.append(cumulative_vocab)
                 
-                plt.plot(dates, vocab_data, marker='o', linewidth=2)
-                plt.title('Vocabulary Growth Over Time')
-                plt.ylabel('Total Words Learned')
-                
+                ax.plot(dates, vocab_data, marker='o', linewidth=2)
+                ax.set_title('Vocabulary Growth Over Time')
+                ax.set_ylabel('Total Words Learned')
+            
             elif chart_type == "fluency":
                 # Fluency scores over time
-                fluency_data = [progress_by_date[date]["fluency_score"] for date in dates]
-                plt.plot(dates, fluency_data, marker='o', linewidth=2, color='green')
-                plt.title('Fluency Score Progression')
-                plt.ylabel('Fluency Score (0-1)')
-                
+                fluency_data = daily["fluency_score"]
+                ax.plot(dates, fluency_data, marker='o', linewidth=2, color='green')
+                ax.set_title('Fluency Score Progression')
+                ax.set_ylabel('Fluency Score (0-1)')
+            
             elif chart_type == "time":
                 # Time spent learning each day
-                time_data = [progress_by_date[date]["conversation_duration"] for date in dates]
-                plt.bar(dates, time_data, color='orange')
-                plt.title('Daily Practice Time')
-                plt.ylabel('Minutes Spent Learning')
+                time_data = daily["conversation_duration"]
+                ax.bar(dates, time_data, color='orange')
+                ax.set_title('Daily Practice Time')
+                ax.set_ylabel('Minutes Spent Learning')
             
-            plt.xlabel('Date')
-            plt.grid(True, linestyle='--', alpha=0.7)
-            plt.xticks(rotation=45)
-            plt.tight_layout()
+            ax.set_xlabel('Date')
+            ax.grid(True, linestyle='--', alpha=0.7)
+            ax.tick_params(axis='x', labelrotation=45)
+            fig.tight_layout()
             
             # Save plot to a bytes buffer
             buf = io.BytesIO()
-            plt.savefig(buf, format='png')
-            buf.seek(0)
-            
-            # Convert to base64
-            img_str = base64.b64encode(buf.read()).decode('utf-8')
-            plt.close()
-            
-            return img_str
-            
+            fig.savefig(buf, format='png')
+            return buf.getvalue()
+        
         except Exception as e:
             print(f"Error generating progress chart: {e}")
-            return None
\ No newline at end of file
+            return None
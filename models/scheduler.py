@@ -0,0 +1,67 @@
+import datetime
+from typing import Dict, Any, Optional
+
+from config import SRS_INITIAL_EASE, SRS_MINIMUM_EASE
+
+# Answer grades, SM-2 style: below PASSING_GRADE the card is relearned from the start
+MIN_GRADE = 0
+MAX_GRADE = 5
+PASSING_GRADE = 3
+
+# Intervals (in days) for the first two successful reviews
+FIRST_INTERVAL = 1.0
+SECOND_INTERVAL = 6.0
+
+def schedule_review(ease_factor: Optional[float], interval_days: Optional[float], repetitions: Optional[int],
+                    proficiency: Optional[float], grade: int,
+                    now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+    """
+    Compute a card's next review using the SM-2 algorithm.
+
+    Args:
+        ease_factor: Current ease factor (None for a card never reviewed)
+        interval_days: Current interval in days
+        repetitions: Consecutive successful reviews so far
+        proficiency: Current proficiency (0.0 to 1.0)
+        grade: Answer quality from 0 (blackout) to 5 (perfect recall)
+        now: Time of the review (defaults to the current UTC time)
+
+    Returns:
+        Dictionary with the new ease_factor, interval_days, repetitions,
+        proficiency, due_at and last_reviewed
+    """
+    if not MIN_GRADE <= grade <= MAX_GRADE:
+        raise ValueError(f"Grade must be between {MIN_GRADE} and {MAX_GRADE}")
+
+    now = now or datetime.datetime.utcnow()
+    ease_factor = ease_factor or SRS_INITIAL_EASE
+    interval_days = interval_days or 0.0
+    repetitions = repetitions or 0
+    proficiency = proficiency or 0.0
+
+    if grade < PASSING_GRADE:
+        repetitions = 0
+        interval_days = FIRST_INTERVAL
+    else:
+        if repetitions == 0:
+            interval_days = FIRST_INTERVAL
+        elif repetitions == 1:
+            interval_days = SECOND_INTERVAL
+        else:
+            interval_days = round(interval_days * ease_factor, 1)
+        repetitions += 1
+
+    miss = MAX_GRADE - grade
+    ease_factor = max(SRS_MINIMUM_EASE, ease_factor + 0.1 - miss * (0.08 + miss * 0.02))
+
+    # Keep the proficiency shown in the UI moving with the answers
+    proficiency = min(1.0, max(0.0, proficiency + (grade - 2.5) * 0.04))
+
+    return {
+        "ease_factor": ease_factor,
+        "interval_days": interval_days,
+        "repetitions": repetitions,
+        "proficiency": proficiency,
+        "due_at": now + datetime.timedelta(days=interval_days),
+        "last_reviewed": now
+    }
@@ -0,0 +1,170 @@
+/**
+ * Virtualized vocabulary list
+ *
+ * Pages the user's vocabulary in from /api/vocabulary using its keyset cursor
+ * and keeps only the rows inside the viewport (plus a small overscan) in the
+ * DOM, so scrolling stays smooth no matter how many words have been loaded.
+ */
+class VirtualVocabularyList {
+    constructor(viewport, options = {}) {
+        this.viewport = viewport;
+        this.rowHeight = options.rowHeight || 56;
+        this.pageSize = options.pageSize || 100;
+        this.overscan = options.overscan || 8;
+
+        // The spacer gives the scrollbar its full height; rows are positioned inside it
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'virtual-spacer';
+        this.rows = document.createElement('div');
+        this.rows.className = 'virtual-rows';
+        this.message = document.createElement('div');
+        this.message.className = 'empty-state hidden';
+        this.spacer.appendChild(this.rows);
+        this.viewport.appendChild(this.spacer);
+        this.viewport.appendChild(this.message);
+
+        this.generation = 0;
+        this.framePending = false;
+        this.viewport.addEventListener('scroll', () => this.scheduleRender());
+        window.addEventListener('resize', () => this.scheduleRender());
+
+        this.reset({});
+    }
+
+    /**
+     * Drop loaded rows and start again from the first page with new filters
+     */
+    reset(filters) {
+        this.filters = filters;
+        this.items = [];
+        this.cursor = null;
+        this.done = false;
+        this.loading = false;
+        this.generation++;
+        this.viewport.scrollTop = 0;
+        this.render();
+        this.loadMore();
+    }
+
+    /**
+     * Fetch the next page, ignoring responses for filters that have since changed
+     */
+    loadMore() {
+        if (this.loading || this.done) {
+            return;
+        }
+        this.loading = true;
+        const generation = this.generation;
+
+        const params = new URLSearchParams({ limit: this.pageSize });
+        if (this.filters.level && this.filters.level !== 'all') {
+            params.set('level', this.filters.level);
+        }
+        if (this.filters.q) {
+            params.set('q', this.filters.q);
+        }
+        if (this.cursor) {
+            params.set('cursor', this.cursor);
+        }
+
+        fetch(`/api/vocabulary?${params.toString()}`)
+            .then(response => response.json())
+            .then(data => {
+                if (generation !== this.generation) {
+                    return;
+                }
+                this.items.push(...(data.items || []));
+                this.cursor = data.next_cursor;
+                this.done = !data.next_cursor;
+            })
+            .catch(error => {
+                console.error('Error loading vocabulary:', error);
+                if (generation === this.generation) {
+                    this.done = true;
+                }
+            })
+            .finally(() => {
+                if (generation === this.generation) {
+                    this.loading = false;
+                    this.render();
+                }
+            });
+    }
+
+    scheduleRender() {
+        if (this.framePending) {
+            return;
+        }
+        this.framePending = true;
+        requestAnimationFrame(() => {
+            this.framePending = false;
+            this.render();
+        });
+    }
+
+    /**
+     * Render only the rows that intersect the viewport
+     */
+    render() {
+        const total = this.items.length;
+        const scrollTop = this.viewport.scrollTop;
+        const height = this.viewport.clientHeight;
+
+        const first = Math.max(0, Math.floor(scrollTop / this.rowHeight) - this.overscan);
+        const last = Math.min(total, Math.ceil((scrollTop + height) / this.rowHeight) + this.overscan);
+
+        this.spacer.style.height = `${total * this.rowHeight}px`;
+        this.rows.style.transform = `translateY(${first * this.rowHeight}px)`;
+        this.rows.innerHTML = this.items.slice(first, last).map(item => this.renderRow(item)).join('');
+
+        if (total === 0 && this.done) {
+            this.message.textContent = this.filters.q
+                ? 'No vocabulary words match your search.'
+                : 'No vocabulary words here yet. Start a conversation or add words manually to build your vocabulary.';
+            this.message.classList.remove('hidden');
+        } else {
+            this.message.classList.add('hidden');
+        }
+
+        // Prefetch the next page before the user reaches the end of what is loaded
+        if (!this.done && last >= total - this.overscan) {
+            this.loadMore();
+        }
+    }
+
+    renderRow(item) {
+        const percent = Math.round((item.proficiency || 0) * 100);
+        const reviewed = item.last_reviewed
+            ? new Date(item.last_reviewed).toLocaleDateString('en-US', { month: 'short', day: '2-digit', year: 'numeric' })
+            : 'N/A';
+        const word = escapeHtml(item.word);
+        const translation = escapeHtml(item.translation || '');
+
+        return `
+            <div class="vocab-row vocab-grid-row" style="height: ${this.rowHeight}px">
+                <div class="vocab-word">${word}</div>
+                <div class="vocab-translation">${translation}</div>
+                <div class="vocab-proficiency">
+                    <div class="proficiency-bar">
+                        <div class="proficiency-fill" style="width: ${percent}%"></div>
+                    </div>
+                    <span class="proficiency-value">${percent}%</span>
+                </div>
+                <div class="vocab-date">${reviewed}</div>
+                <div class="vocab-actions">
+                    <button class="practice-word-btn" data-word="${word}">Practice</button>
+                    <button class="edit-word-btn" data-word="${word}" data-translation="${translation}">Edit</button>
+                </div>
+            </div>
+        `;
+    }
+}
+
+function escapeHtml(text) {
+    return String(text)
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
@@ -0,0 +1,144 @@
+"""
+Shared fixtures for the test suite.
+
+The app reads its configuration from the environment at import time, so the
+test database (a throwaway SQLite file), the in-process cache and an inline
+NLP executor are configured here, before any application module is imported.
+
+Database tests run once per backend. The PostgreSQL run uses the server at
+TEST_POSTGRES_URL, or else a throwaway one started with the initdb and
+pg_ctl found on PATH (or under /usr/lib/postgresql); without either, and as
+root, which PostgreSQL refuses to run as, it is skipped.
+
+Run with: python -m pytest
+"""
+import glob
+import os
+import shutil
+import subprocess
+import tempfile
+
+import pytest
+
+TEST_DIR = tempfile.mkdtemp(prefix="linguadex-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ["CACHE_URL"] = "memory"
+os.environ["ADMIN_API_TOKEN"] = "test-admin-token"
+os.environ["NLP_POOL_WORKERS"] = "0"
+os.environ["SPACY_PRELOAD_LANGUAGES"] = ""
+os.environ["SPACY_PRELOAD_TOP"] = "0"
+
+ADMIN_HEADERS = {"Authorization": "Bearer test-admin-token"}
+
+def _postgres_binary(name):
+    found = shutil.which(name)
+    if found:
+        return found
+    candidates = sorted(glob.glob(f"/usr/lib/postgresql/*/bin/{name}"))
+    return candidates[-1] if candidates else None
+
+@pytest.fixture(scope="session")
+def postgres_url(tmp_path_factory):
+    """URL of a scratch PostgreSQL database, started for this run unless TEST_POSTGRES_URL is set."""
+    if os.getenv("TEST_POSTGRES_URL"):
+        yield os.environ["TEST_POSTGRES_URL"]
+        return
+    initdb, pg_ctl = _postgres_binary("initdb"), _postgres_binary("pg_ctl")
+    if not (initdb and pg_ctl):
+        pytest.skip("PostgreSQL binaries (initdb, pg_ctl) not found")
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        pytest.skip("PostgreSQL won't run as root")
+
+    data_dir = tmp_path_factory.mktemp("postgres")
+    subprocess.run([initdb, "-D", str(data_dir), "-U", "postgres", "--auth=trust", "--encoding=UTF8",
+                    "--no-locale"], check=True, capture_output=True)
+    # Listen only on a socket in the data directory, so no port can clash
+    options = f"-c listen_addresses='' -k {data_dir} -F"
+    subprocess.run([pg_ctl, "-D", str(data_dir), "-o", options, "-l", str(data_dir / "server.log"), "-w", "start"],
+                   check=True, capture_output=True)
+    try:
+        yield f"postgresql+psycopg2://postgres@/postgres?host={data_dir}"
+    finally:
+        subprocess.run([pg_ctl, "-D", str(data_dir), "-m", "immediate", "stop"], capture_output=True)
+
+@pytest.fixture(scope="session")
+def backend_engines():
+    """Engines by backend name, created on first use and disposed of at the end of the run."""
+    from database import db_handler as db_module
+    engines = {"sqlite": db_module.engine}
+    yield engines
+    for name, engine in engines.items():
+        if name != "sqlite":
+            engine.dispose()
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def backend(request, backend_engines):
+    """Point the database layer at each backend in turn."""
+    from sqlalchemy import create_engine, event
+    from database import db_handler as db_module
+    if request.param not in backend_engines:
+        url = request.getfixturevalue("postgres_url")
+        engine = create_engine(url, **db_module._engine_options(url))
+        event.listen(engine, "before_cursor_execute", db_module._count_request_query)
+        backend_engines[request.param] = engine
+
+    default = db_module.engine
+    db_module.remove_session()
+    db_module.engine = backend_engines[request.param]
+    db_module.session_factory.configure(bind=db_module.engine)
+    yield request.param
+    db_module.remove_session()
+    db_module.engine = default
+    db_module.session_factory.configure(bind=default)
+
+@pytest.fixture
+def db(backend):
+    """A DatabaseHandler on freshly created, empty tables of each backend."""
+    from database.db_handler import Base, DatabaseHandler, init_db, remove_session
+    from database import db_handler as db_module
+    remove_session()
+    Base.metadata.drop_all(db_module.engine)
+    init_db()
+    handler = DatabaseHandler()
+    yield handler
+    remove_session()
+
+@pytest.fixture
+def user(db):
+    return db.create_user("learner", "learner@example.com", "secret", "en", "es")
+
+@pytest.fixture
+def flask_app(db, monkeypatch):
+    """The Flask app with empty tables and caches, and the LLM replaced by canned replies."""
+    import app as app_module
+    app_module.db_handler.cache.clear()
+    app_module.language_utils.analysis_cache.clear()
+    monkeypatch.setattr(app_module, "llm_handler", FakeLLM())
+    app_module.app.config.update(TESTING=True)
+    return app_module.app
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.test_client()
+
+def log_in(client, user_id):
+    with client.session_transaction() as flask_session:
+        flask_session["user_id"] = user_id
+
+class FakeLLM:
+    """Stands in for LLMHandler so request tests don't call a model."""
+
+    def __init__(self, vocabulary=("hola", "gracias")):
+        self.vocabulary = list(vocabulary)
+
+    def generate_response(self, user_info, conversation_history, session_goals=None):
+        return "¡Muy bien!"
+
+    def analyze_user_message(self, user_message, language, level):
+        return {
+            "errors": [],
+            "vocabulary": [{"word": word, "mastery": 0.3} for word in self.vocabulary],
+            "grammar": {"structures": [], "complexity": 0.4, "appropriate_for_level": True},
+            "fluency": 0.7,
+            "suggestions": []
+        }
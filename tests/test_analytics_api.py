@@ -0,0 +1,28 @@
+import datetime
+
+from tests.conftest import log_in
+
+def test_leaderboard_hides_other_learners(db, client, user):
+    rival = db.create_user("rival", "rival@example.com", "secret", "en", "es")
+    week = datetime.date(2026, 10, 12)
+    db.replace_cohort_analytics(week, weekly=[], vocabulary=[], leaderboard=[
+        {"language": "es", "week_start": week, "rank": 1, "user_id": rival.id,
+         "vocabulary_added": 40, "conversation_minutes": 30, "mean_fluency": 0.8},
+        {"language": "es", "week_start": week, "rank": 2, "user_id": user.id,
+         "vocabulary_added": 25, "conversation_minutes": 20, "mean_fluency": 0.6}
+    ])
+    log_in(client, user.id)
+
+    body = client.get("/api/analytics/leaderboard?limit=1").get_json()
+    assert body["week_start"] == "2026-10-12"
+    assert body["entries"] == [{"rank": 1, "vocabulary_added": 40, "conversation_minutes": 30,
+                                "mean_fluency": 0.8, "is_you": False}]
+    assert body["you"]["rank"] == 2 and body["you"]["is_you"]
+    assert "rival" not in client.get("/api/analytics/leaderboard").get_data(as_text=True)
+
+    # The board itself never reads usernames
+    _, ranked = db.get_leaderboard("es", week_start=week)
+    assert set(ranked[0]) == {"rank", "user_id", "vocabulary_added", "conversation_minutes", "mean_fluency"}
+
+def test_analytics_require_login(client):
+    assert client.get("/api/analytics/leaderboard").status_code == 302
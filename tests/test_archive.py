@@ -0,0 +1,74 @@
+import datetime
+import warnings
+
+import pytest
+from sqlalchemy import exc, text
+
+from database import db_handler as db_module
+from database.db_handler import _upgrade_schema
+from database.schema import Message
+
+def age_messages(db, conversation_id, days=200):
+    old = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+    db.session.query(Message).filter_by(conversation_id=conversation_id).update({"timestamp": old})
+    db.session.commit()
+
+@pytest.fixture
+def archived_conversation(db, user):
+    """A conversation whose two messages, the newest ids issued, have moved to cold storage."""
+    conversation = db.create_conversation(user.id, "Food and Drink", "es")
+    archived_ids = [db.add_message(conversation.id, is_user, content).id
+                    for is_user, content in ((False, "¡Hola!"), (True, "Hola, quiero un café"))]
+    age_messages(db, conversation.id)
+    assert db.archive_idle_conversations(idle_days=90)["messages"] == 2
+    return conversation.id, archived_ids
+
+def test_archived_message_ids_are_not_reissued(db, archived_conversation):
+    conversation_id, archived_ids = archived_conversation
+    message = db.add_message(conversation_id, True, "Y un té, por favor")
+    assert message.id > max(archived_ids)
+
+def test_revived_conversation_window_merges_cold_and_live_messages(db, archived_conversation):
+    conversation_id, archived_ids = archived_conversation
+    live_ids = [db.add_message(conversation_id, is_user, content).id
+                for is_user, content in ((True, "Y un té"), (False, "¡Claro!"))]
+    db.close()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", exc.SAWarning)
+        conversation, messages, has_older = db.get_conversation_window(conversation_id, limit=10)
+        assert [message.id for message in messages] == archived_ids + live_ids
+        assert not has_older
+
+        # Paging back from the live rows continues into cold storage without gaps or repeats
+        conversation, newest, has_older = db.get_conversation_window(conversation_id, limit=3)
+        assert has_older
+        oldest = newest[0]
+        _, older, has_older = db.get_conversation_window(
+            conversation_id, limit=3, before=(oldest.timestamp, oldest.id)
+        )
+        assert [message.id for message in older + newest] == archived_ids + live_ids
+        assert not has_older
+
+def test_upgrade_adds_autoincrement_after_every_issued_id(db, user, backend):
+    if backend != "sqlite":
+        pytest.skip("rebuilds a SQLite table")
+    with db_module.engine.begin() as conn:
+        conn.execute(text("DROP TABLE messages"))
+        conn.execute(text(
+            "CREATE TABLE messages (id INTEGER NOT NULL PRIMARY KEY, conversation_id INTEGER, "
+            "is_user BOOLEAN, content TEXT NOT NULL, timestamp DATETIME)"
+        ))
+    conversation_id = db.create_conversation(user.id, "Weather", "es").id
+    first = db.add_message(conversation_id, True, "Hace sol").id
+    archived = db.add_message(conversation_id, False, "¡Qué bien!").id
+    age_messages(db, conversation_id)
+    db.archive_idle_conversations(idle_days=90)
+    db.close()
+
+    _upgrade_schema()
+
+    with db_module.engine.connect() as conn:
+        table_sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'messages'")).scalar()
+    assert "AUTOINCREMENT" in table_sql
+    assert db.add_message(conversation_id, True, "Mañana llueve").id > max(first, archived)
@@ -0,0 +1,71 @@
+"""
+SQLite/PostgreSQL parity of the upserts.
+
+Every database test runs on SQLite and on PostgreSQL (see conftest.py).
+The statements the write paths execute are also compiled for both dialects
+and compared, so a construct only one backend understands shows up even
+where no PostgreSQL server is available.
+"""
+import re
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.dml import Insert
+
+from database import db_handler as db_module
+from database.schema import ProgressRecord, Vocabulary, user_vocabulary
+
+DIALECTS = {"sqlite": sqlite.dialect(), "postgresql": postgresql.dialect()}
+
+@pytest.fixture
+def executed_inserts(db):
+    """INSERT constructs executed while the test runs."""
+    inserts = []
+
+    def before_execute(conn, clauseelement, multiparams, params, execution_options):
+        if isinstance(clauseelement, Insert):
+            inserts.append(clauseelement)
+
+    engine = db_module.engine
+    event.listen(engine, "before_execute", before_execute)
+    yield inserts
+    event.remove(engine, "before_execute", before_execute)
+
+def on_conflict_clause(statement, dialect):
+    compiled = str(statement.compile(dialect=dialect))
+    match = re.search(r"ON CONFLICT .*?(?= RETURNING|$)", compiled, re.S)
+    # Bound parameters are written ? on SQLite and %(name)s on psycopg2
+    return re.sub(r"%\(\w+\)s", "?", match.group(0)) if match else None
+
+def test_upserts_compile_to_the_same_conflict_handling_on_both_backends(db, user, executed_inserts):
+    db.add_words_to_user(user.id, ["uno", "dos"], "es")
+    db.add_words_to_user(user.id, ["dos", "tres"], "es")
+    db.add_word_to_user(user.id, "cuatro", "es")
+    db.record_progress(user.id, vocab_count=2, conversation_duration=1, fluency_score=0.5)
+
+    upserts = [statement for statement in executed_inserts if on_conflict_clause(statement, DIALECTS["sqlite"])]
+    targets = {statement.table.name for statement in upserts}
+    assert targets == {"vocabulary", "user_vocabulary", "progress_records"}
+    for statement in upserts:
+        clauses = {name: on_conflict_clause(statement, dialect) for name, dialect in DIALECTS.items()}
+        assert clauses["sqlite"] == clauses["postgresql"]
+
+def test_user_vocabulary_upsert_skips_existing_links(db, user):
+    assert db.add_words_to_user(user.id, ["uno", "dos"], "es") == {"added": 2, "updated": 0}
+    assert db.add_words_to_user(user.id, ["dos", "tres"], "es", proficiency_delta=None) == {"added": 1, "updated": 0}
+    links = db.session.execute(select(func.count()).select_from(user_vocabulary)).scalar()
+    assert links == 3
+    assert db.session.execute(select(func.count()).select_from(Vocabulary)).scalar() == 3
+
+def test_progress_upsert_accumulates_into_one_row_per_day(db, user):
+    db.record_progress(user.id, vocab_count=2, conversation_duration=1, mistakes_made=1, fluency_score=0.4)
+    db.record_progress(user.id, vocab_count=3, conversation_duration=2, mistakes_made=0, fluency_score=0.8)
+    db.record_progress(user.id, conversation_duration=1)
+
+    rows = db.session.query(ProgressRecord).filter_by(user_id=user.id).all()
+    assert len(rows) == 1
+    row = rows[0]
+    assert (row.vocabulary_count, row.conversation_duration, row.mistakes_made) == (5, 4, 1)
+    assert row.fluency_count == 2
+    assert row.fluency_score == pytest.approx(0.6)
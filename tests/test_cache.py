@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import text
+
+from database.cache import MemoryCache, RedisCache, LocalRedis
+from database import db_handler as db_module
+from tests.conftest import log_in
+
+def change_behind_the_cache(sql, **params):
+    with db_module.engine.begin() as conn:
+        conn.execute(text(sql), params)
+
+def test_profile_is_served_from_the_cache(db, user):
+    assert db.get_user_profile(user.id).current_level == "Beginner"
+    change_behind_the_cache("UPDATE users SET current_level = 'Fluent' WHERE id = :id", id=user.id)
+    assert db.get_user_profile(user.id).current_level == "Beginner"
+
+def test_level_change_invalidates_the_cached_profile(db, user):
+    db.get_user_profile(user.id)
+    db.set_user_level(user.id, "Advanced")
+    assert db.get_user_profile(user.id).current_level == "Advanced"
+
+def test_login_invalidates_the_cached_profile(db, user):
+    before = db.get_user_profile(user.id).last_active
+    db.authenticate_user("learner", "secret")
+    assert db.get_user_profile(user.id).last_active > before
+
+def test_settings_update_invalidates_the_cached_profile(flask_app, client, user):
+    from app import db_handler
+    log_in(client, user.id)
+    with flask_app.app_context():
+        assert db_handler.get_user_profile(user.id).target_language == "es"
+
+    response = client.post("/update_settings", data={
+        "form_type": "language", "native_language": "en", "target_language": "fr"
+    })
+    assert response.status_code == 302
+    with flask_app.app_context():
+        assert db_handler.get_user_profile(user.id).target_language == "fr"
+
+def test_new_conversation_invalidates_cached_headers(db, user):
+    db.create_conversation(user.id, "Weather", "es")
+    assert [header.topic for header in db.get_user_conversations(user.id)] == ["Weather"]
+    db.create_conversation(user.id, "Shopping", "es")
+    assert sorted(header.topic for header in db.get_user_conversations(user.id)) == ["Shopping", "Weather"]
+
+@pytest.mark.parametrize("cache", [
+    MemoryCache(max_entries=2, default_ttl=60),
+    RedisCache(LocalRedis(), default_ttl=60)
+], ids=["memory", "redis"])
+def test_cache_backends_share_the_interface(cache):
+    cache.set("a", {"value": 1})
+    assert cache.get("a") == {"value": 1}
+    cache.delete("a", "missing")
+    assert cache.get("a") is None
+    cache.set("b", 2)
+    cache.clear()
+    assert cache.get("b") is None
+
+def test_memory_cache_evicts_least_recently_used_and_expired_entries():
+    cache = MemoryCache(max_entries=2, default_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    cache.set("short", 4, ttl=-1)
+    assert cache.get("short") is None
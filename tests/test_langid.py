@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from utils.langid import MAX_CHARS, get_language_identifier, normalize
+from utils.language_utils import AnalysisCache, LanguageUtils
+
+SENTENCES_PATH = os.path.join(os.path.dirname(__file__), "data", "langid_sentences.tsv")
+
+def labelled_sentences():
+    with open(SENTENCES_PATH, encoding="utf-8") as sentences:
+        return [tuple(line.rstrip("\n").split("\t")) for line in sentences
+                if line.strip() and not line.startswith("#")]
+
+@pytest.mark.parametrize("language_code, text", labelled_sentences())
+def test_labelled_sentences_are_identified(language_code, text):
+    identifier = get_language_identifier()
+    assert identifier.identify(text) == language_code
+    ranked = identifier.rank(text)
+    assert ranked[0][0] == language_code
+    assert [probability for _, probability in ranked] == sorted((p for _, p in ranked), reverse=True)
+    assert 0 < sum(probability for _, probability in ranked) <= 1.0001
+
+def test_texts_without_letters_have_no_language():
+    identifier = get_language_identifier()
+    for text in ("", "   ", "123 !!", "¿?¡! 42"):
+        assert identifier.scores(text) is None
+        assert identifier.identify(text) is None
+        assert identifier.rank(text) == []
+
+def test_normalize_keeps_only_lowercase_letter_runs():
+    assert normalize("¡Hola, Ana!  Son las 10:30.") == " hola ana son las "
+    assert normalize("") == "  "
+    assert len(normalize("a" * (MAX_CHARS + 50))) == MAX_CHARS + 2
+
+def test_only_the_start_of_long_texts_is_looked_at():
+    identifier = get_language_identifier()
+    spanish = "Mañana vamos a la playa con mis amigos. " * 10
+    assert identifier.identify(spanish[:MAX_CHARS] + "The weather is lovely today. " * 20) == "es"
+
+def test_short_or_empty_input_is_unknown():
+    utils = LanguageUtils(analysis_cache=AnalysisCache())
+    for text in (None, "", "   ", "ok", "Hola", "123 !! 456"):
+        assert utils.detect_language(text) == "unknown"
+    assert utils.detect_language("Je voudrais réserver une table pour ce soir.") == "fr"
@@ -0,0 +1,150 @@
+import pytest
+
+from utils.language_utils import AnalysisCache, LanguageUtils
+from utils.word_ranks import get_word_ranks
+
+class StagedModels:
+    """Stands in for SpacyModelManager: no model until one is installed."""
+
+    def __init__(self):
+        self.model_names = {"es": "blank_es"}
+        self.model = None
+
+    def get(self, language_code):
+        return self.model
+
+def test_fallback_analyses_are_not_served_once_the_model_loads():
+    spacy = pytest.importorskip("spacy")
+    models = StagedModels()
+    utils = LanguageUtils(analysis_cache=AnalysisCache(), spacy_models=models)
+    text = "¿Qué tal, amigo?"
+
+    fallback = utils.analyze_texts([text], "es")[0]
+    assert fallback["grammar"] == []
+    assert "¿" not in fallback["tokens"]
+
+    models.model = spacy.blank("es")
+    analysis = utils.analyze_texts([text], "es")[0]
+    assert analysis["tokens"] == ["¿", "Qué", "tal", ",", "amigo", "?"]
+    assert utils.analyze_texts([text], "es")[0] == analysis
+    assert len(utils.analysis_cache) == 2
+
+def test_cache_keys_differ_by_backend():
+    assert AnalysisCache.key("hola", "es", "fallback") != AnalysisCache.key("hola", "es", "spacy:es_core_news_sm")
+    assert AnalysisCache.key("hola", "es", "fallback") == AnalysisCache.key("hola", "es", "fallback")
+
+def without_spacy():
+    return LanguageUtils(analysis_cache=AnalysisCache(), spacy_models=StagedModels())
+
+@pytest.mark.parametrize("language_code, text", [
+    ("es", "Me gusta comer manzanas."),
+    ("en", "I like apples."),
+    ("es", "Hola, me llamo Ana y tengo un perro."),
+    ("fr", "Je mange une pomme rouge."),
+    ("de", "Ich trinke gern Kaffee mit Milch.")
+])
+def test_simple_sentences_are_beginner_level(language_code, text):
+    assert without_spacy().calculate_text_complexity(text, language_code)["estimated_level"] == "Beginner"
+
+def test_rare_words_make_a_text_fluent_level():
+    text = "Notwithstanding the quintessential obfuscation, jurisprudence prevails."
+    assert without_spacy().calculate_text_complexity(text, "en")["estimated_level"] == "Fluent"
+
+def test_long_texts_need_ninety_percent_of_their_words_at_the_level():
+    common = "yo tengo una casa muy grande con mi familia y un perro".split()
+    complexity = without_spacy().calculate_text_complexity(" ".join(common * 2 + ["manzana"] * 3), "es")
+    assert complexity["level_coverage"]["Beginner"] == 0.89
+    assert complexity["estimated_level"] == "Advanced"
+
+def test_words_rank_by_their_lemma():
+    ranks = get_word_ranks()
+    assert ranks.rank("manzanas", "es") > ranks.rank("manzana", "es")
+    assert list(ranks.ranks(["manzanas", "perro"], "es", ["manzana", ""])) == [
+        ranks.rank("manzana", "es"), ranks.rank("perro", "es")]
+    assert ranks.ranks(["xyzzyq"], "es", ["perro"])[0] == ranks.rank("perro", "es")
+
+def test_common_words_are_beginner_level():
+    assert get_word_ranks().difficulty_levels(["perro", "agua", "casa", "hola"], "es") == ["Beginner"] * 4
+    assert get_word_ranks().difficulty_level("dog", "en") == "Beginner"
+    assert get_word_ranks().difficulty_level("jurisprudence", "en") == "Fluent"
+
+def test_languages_without_a_table_have_no_profile():
+    assert get_word_ranks().text_profile(["hola"], "xx") is None
+    assert get_word_ranks().difficulty_levels(["hola"], "xx") == [None]
+    assert get_word_ranks().text_profile(["123", "!"], "es") is None
+
+def test_complexity_uses_the_models_lemmas():
+    spacy = pytest.importorskip("spacy")
+    from spacy.language import Language
+
+    @Language.component("test_lemmas")
+    def set_lemmas(doc):
+        for token in doc:
+            token.lemma_ = {"manzanas": "manzana"}.get(token.lower_, token.lower_)
+        return doc
+
+    models = StagedModels()
+    models.model = spacy.blank("es")
+    models.model.add_pipe("test_lemmas", name="lemmatizer")
+    utils = LanguageUtils(analysis_cache=AnalysisCache(), spacy_models=models)
+    complexity = utils.calculate_text_complexity("manzanas " * 20, "es")
+    assert complexity["word_rank_p50"] == get_word_ranks().rank("manzana", "es")
+
+COMPONENT_RUNS = []  # (component, text) for each doc the recording components process
+
+@pytest.fixture
+def recording_model(monkeypatch):
+    """A blank Spanish pipeline whose "tagger" and "ner" record the texts they see, with pipe() calls logged."""
+    spacy = pytest.importorskip("spacy")
+    from spacy.language import Language
+
+    for role in ("tagger", "ner"):
+        if not Language.has_factory(f"test_record_{role}"):
+            def record(doc, role=role):
+                COMPONENT_RUNS.append((role, doc.text))
+                return doc
+            Language.component(f"test_record_{role}", func=record)
+    nlp = spacy.blank("es")
+    nlp.add_pipe("test_record_tagger", name="tagger")
+    nlp.add_pipe("test_record_ner", name="ner")
+
+    pipe_calls = []
+    pipe = nlp.pipe
+
+    def logged_pipe(texts, **kwargs):
+        pipe_calls.append(kwargs)
+        return pipe(texts, **kwargs)
+
+    monkeypatch.setattr(nlp, "pipe", logged_pipe)
+    COMPONENT_RUNS.clear()
+    return nlp, COMPONENT_RUNS, pipe_calls
+
+def test_texts_are_parsed_in_one_batched_pipe_call(recording_model):
+    nlp, ran, pipe_calls = recording_model
+    models = StagedModels()
+    models.model = nlp
+    utils = LanguageUtils(analysis_cache=AnalysisCache(), spacy_models=models)
+
+    results = utils.analyze_texts(["Hola amigo", "Buenos días", "Hola amigo", "Adiós"], "es",
+                                  tasks=("grammar",), batch_size=2)
+    assert [result["tokens"] for result in results] == [["Hola", "amigo"], ["Buenos", "días"],
+                                                         ["Hola", "amigo"], ["Adiós"]]
+    assert len(pipe_calls) == 1 and pipe_calls[0]["batch_size"] == 2
+    # Only the components grammar checks need ran, once per distinct text
+    assert pipe_calls[0]["disable"] == ["ner"]
+    assert ran == [("tagger", "Hola amigo"), ("tagger", "Buenos días"), ("tagger", "Adiós")]
+
+def test_token_only_tasks_disable_every_component(recording_model):
+    from utils.language_utils import SPACY_BATCH_SIZE
+    nlp, ran, pipe_calls = recording_model
+    models = StagedModels()
+    models.model = nlp
+    utils = LanguageUtils(analysis_cache=AnalysisCache(), spacy_models=models)
+
+    assert utils.tokenize_texts(["Hola amigo", "Adiós"], "es") == [["Hola", "amigo"], ["Adiós"]]
+    assert pipe_calls[0]["disable"] == ["tagger", "ner"] and pipe_calls[0]["batch_size"] == SPACY_BATCH_SIZE
+    assert ran == []
+
+    # Cached tokens don't go through the pipeline again
+    utils.tokenize_texts(["Adiós"], "es")
+    assert len(pipe_calls) == 1
@@ -0,0 +1,56 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+from utils.nlp_executor import NLPExecutor, NLPExecutorBusy
+
+def pool_executor(**kwargs):
+    """An executor that sends every job to a one-slot pool."""
+    return NLPExecutor(max_workers=1, max_pending=1, inline_max_chars=0, **kwargs)
+
+def done(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+async def count_ticks(ticks, interval=0.01):
+    while True:
+        ticks.append(None)
+        await asyncio.sleep(interval)
+
+def test_small_jobs_run_inline():
+    executor = NLPExecutor(max_workers=2, inline_max_chars=400)
+    assert executor.submit("tokenize_texts", ["Hola amigo"], language_code="es").result() == [["Hola", "amigo"]]
+    assert executor.stats()["inline"] == 1 and not executor.stats()["pool_started"]
+
+def test_only_batch_methods_can_be_submitted():
+    with pytest.raises(ValueError):
+        NLPExecutor(max_workers=0).submit("get_stopwords", ["es"])
+
+def test_run_waits_for_a_slot_without_blocking_the_event_loop():
+    executor = pool_executor(submit_timeout=0.2)
+    executor._slots.acquire()  # The pool is full
+
+    async def main():
+        ticks = []
+        ticker = asyncio.create_task(count_ticks(ticks))
+        with pytest.raises(NLPExecutorBusy):
+            await executor.run("tokenize_texts", ["Hola amigo"], language_code="es")
+        ticker.cancel()
+        return ticks
+
+    assert len(asyncio.run(main())) >= 5
+    assert executor.stats()["rejected"] == 1
+
+def test_run_submits_once_a_slot_frees_up(monkeypatch):
+    executor = pool_executor(submit_timeout=5)
+    monkeypatch.setattr(executor, "_submit_to_pool", lambda method, texts, kwargs: done([["Hola"]]))
+    executor._slots.acquire()
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.05, executor._slots.release)
+        return await executor.run("tokenize_texts", ["Hola"], language_code="es")
+
+    assert asyncio.run(main()) == [["Hola"]]
+    assert executor.stats()["offloaded"] == 1 and executor.stats()["pending"] == 0
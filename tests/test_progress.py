@@ -0,0 +1,91 @@
+import datetime
+
+import pytest
+from sqlalchemy import event
+
+from database import db_handler as db_module
+from database.schema import ProgressRecord
+
+@pytest.fixture
+def commits(db):
+    """Number of transactions committed while the test runs."""
+    count = []
+    engine = db_module.engine
+    listener = lambda conn: count.append(True)
+    event.listen(engine, "commit", listener)
+    yield count
+    event.remove(engine, "commit", listener)
+
+def test_two_sessions_on_one_day_accumulate(db, user, commits):
+    user_id = user.id
+    first = db.record_conversation_session(user_id, ["uno", "dos", "Uno", ""], duration_minutes=10,
+                                           mistakes_made=2, fluency_score=0.4)
+    second = db.record_conversation_session(user_id, ["dos", "tres"], duration_minutes=5,
+                                            mistakes_made=1, fluency_score=0.8)
+    assert first == {"added": 2, "level_changed": False, "current_level": "Beginner"}
+    assert second["added"] == 1
+    assert len(commits) == 2  # One transaction per session
+
+    db.close()
+    stats = db.get_user_stats(user_id)
+    assert (stats.vocab_total, stats.vocab_low) == (3, 3)
+    assert (stats.vocabulary_learned, stats.conversation_minutes, stats.progress_version) == (3, 15, 2)
+    rows = db.session.query(ProgressRecord).filter_by(user_id=user_id).all()
+    assert len(rows) == 1
+    row = rows[0]
+    assert (row.vocabulary_count, row.conversation_duration, row.mistakes_made) == (3, 15, 3)
+    assert (row.fluency_count, row.fluency_sum) == (2, pytest.approx(1.2))
+    assert row.fluency_score == pytest.approx(0.6)
+
+def test_a_session_without_fluency_keeps_the_days_mean(db, user):
+    user_id = user.id
+    db.record_conversation_session(user_id, ["uno"], duration_minutes=4, fluency_score=0.5)
+    db.record_conversation_session(user_id, [], duration_minutes=6)
+    db.close()
+    row = db.session.query(ProgressRecord).filter_by(user_id=user_id).one()
+    assert (row.conversation_duration, row.fluency_count) == (10, 1)
+    assert row.fluency_score == pytest.approx(0.5)
+
+def test_a_failed_session_records_nothing(db, user, monkeypatch):
+    user_id = user.id
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("progress write failed")
+
+    monkeypatch.setattr(db, "_record_progress", fail)
+    with pytest.raises(RuntimeError):
+        db.record_conversation_session(user_id, ["uno"], duration_minutes=3)
+    db.close()
+    assert db.get_user_stats(user_id).vocab_total == 0
+    assert db.session.query(ProgressRecord).count() == 0
+
+def test_sessions_of_unknown_users_are_ignored(db):
+    assert db.record_conversation_session(12345, ["uno"], duration_minutes=3) is None
+
+def test_daily_progress_aggregates_per_user_and_day(db, user):
+    other_id = db.create_user("second", "second@example.com", "secret", "en", "fr").id
+    user_id = user.id
+    for fluency in (0.2, 0.5, None, 0.8):
+        db.record_progress(user_id, vocab_count=1, conversation_duration=2, mistakes_made=1, fluency_score=fluency)
+    db.record_progress(other_id, conversation_duration=7)
+    today = datetime.datetime.utcnow().date()
+    db.session.add_all([
+        ProgressRecord(user_id=user_id, day=today - datetime.timedelta(days=3), vocabulary_count=5,
+                       conversation_duration=20, fluency_sum=1.8, fluency_count=2, fluency_score=0.9),
+        ProgressRecord(user_id=user_id, day=today - datetime.timedelta(days=40), vocabulary_count=9)
+    ])
+    db.session.commit()
+
+    progress = db.get_daily_progress(days=30)
+    assert progress["user_id"] == [user_id, user_id, other_id]
+    assert progress["day"] == [today - datetime.timedelta(days=3), today, today]
+    assert progress["vocabulary_count"] == [5, 4, 0]
+    assert progress["conversation_duration"] == [20, 8, 7]
+    assert progress["mistakes_made"] == [0, 4, 0]
+    assert progress["fluency_count"] == [2, 3, 0]
+    assert progress["fluency_sum"] == pytest.approx([1.8, 1.5, 0.0])
+    assert progress["fluency_score"] == pytest.approx([0.9, 0.5, 0.0])
+
+    only_user = db.get_daily_progress(user_ids=[user_id], days=60)
+    assert only_user["vocabulary_count"] == [9, 5, 4]
+    assert db.get_daily_progress(user_ids=[], days=30)["user_id"] == []
@@ -0,0 +1,53 @@
+import pytest
+
+from tests.conftest import log_in
+
+@pytest.fixture
+def renders(flask_app, monkeypatch):
+    """Counts chart renders, which still draw the real PNG."""
+    import app as app_module
+    tracker = app_module.progress_tracker
+    calls = []
+    render = tracker.render_progress_chart
+
+    def counting_render(*args, **kwargs):
+        calls.append(args)
+        return render(*args, **kwargs)
+
+    monkeypatch.setattr(tracker, "render_progress_chart", counting_render)
+    return calls
+
+def test_chart_etag_revalidation_and_invalidation(db, client, user, renders):
+    user_id = user.id
+    db.record_progress(user_id, vocab_count=3, conversation_duration=5, fluency_score=0.5)
+    log_in(client, user_id)
+
+    first = client.get("/progress/chart/vocabulary.png")
+    assert first.status_code == 200 and first.mimetype == "image/png"
+    assert first.data.startswith(b"\x89PNG")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    revalidated = client.get("/progress/chart/vocabulary.png", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.headers["ETag"] == etag
+    assert client.get("/progress/chart/vocabulary.png").data == first.data  # From the render cache
+    assert len(renders) == 1
+
+    # New progress bumps the version, so the old ETag no longer matches
+    db.record_progress(user_id, vocab_count=2, conversation_duration=1, fluency_score=0.9)
+    changed = client.get("/progress/chart/vocabulary.png", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(renders) == 2
+
+def test_chart_etag_depends_on_type_and_window(db, client, user):
+    user_id = user.id
+    db.record_progress(user_id, vocab_count=3, conversation_duration=5, fluency_score=0.5)
+    log_in(client, user_id)
+    etags = {client.get(path).headers["ETag"] for path in (
+        "/progress/chart/vocabulary.png", "/progress/chart/time.png", "/progress/chart/vocabulary.png?days=7")}
+    assert len(etags) == 3
+
+def test_unknown_chart_type(db, client, user):
+    log_in(client, user.id)
+    assert client.get("/progress/chart/nonsense.png").status_code == 404
@@ -0,0 +1,54 @@
+from database.db_handler import get_request_query_count
+from tests.conftest import log_in
+
+def test_reads_are_memoized_within_a_request(flask_app, db, user):
+    user_id = user.id
+    db.add_words_to_user(user_id, ["uno", "dos"], "es")
+    db.close()
+    with flask_app.app_context():
+        words = db.get_user_vocabulary(user_id)
+        queries = get_request_query_count()
+        assert db.get_user_vocabulary(user_id) is words
+        assert db.count_due_reviews(user_id) == 2
+        assert db.count_due_reviews(user_id) == 2
+        assert get_request_query_count() == queries + 1
+        assert db.get_user_vocabulary(user_id, limit=1) is not words
+
+def test_each_request_reads_afresh(flask_app, db, user):
+    user_id = user.id
+    db.close()
+    with flask_app.app_context():
+        first = db.get_user_vocabulary(user_id)
+    with flask_app.app_context():
+        assert db.get_user_vocabulary(user_id) is not first
+
+def test_commit_invalidates_memoized_reads(flask_app, db, user):
+    user_id = user.id
+    db.close()
+    with flask_app.app_context():
+        assert db.count_due_reviews(user_id) == 0
+        db.add_words_to_user(user_id, ["uno"], "es")  # Commits
+        assert db.count_due_reviews(user_id) == 1
+
+def test_rollback_invalidates_memoized_reads(flask_app, db, user):
+    user_id = user.id
+    db.close()
+    with flask_app.app_context():
+        words = db.get_user_vocabulary(user_id)
+        db.session.rollback()
+        queries = get_request_query_count()
+        assert db.get_user_vocabulary(user_id) is not words
+        assert get_request_query_count() == queries + 1
+
+def test_reads_outside_a_request_are_not_memoized(db, user):
+    assert db.get_user_vocabulary(user.id) is not db.get_user_vocabulary(user.id)
+
+def test_query_count_header(flask_app, client, user, monkeypatch):
+    import app as app_module
+    log_in(client, user.id)
+    assert "X-Query-Count" not in client.get("/api/review/queue").headers
+
+    monkeypatch.setattr(app_module, "QUERY_COUNT_HEADER", True)
+    response = client.get("/api/review/queue")
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) == 2  # The due cards and their count
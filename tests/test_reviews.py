@@ -0,0 +1,119 @@
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from config import SRS_INITIAL_EASE, SRS_MINIMUM_EASE
+from database.schema import Vocabulary, user_vocabulary
+from models.scheduler import schedule_review
+from tests.conftest import log_in
+
+NOW = datetime.datetime(2026, 3, 2, 9, 30)
+
+@pytest.mark.parametrize("grade, ease_factor, interval_days, repetitions", [
+    (5, 2.6, 1.0, 1),
+    (4, 2.5, 1.0, 1),
+    (3, 2.36, 1.0, 1),
+    (2, 2.18, 1.0, 0),
+    (1, 1.96, 1.0, 0),
+    (0, 1.7, 1.0, 0)
+])
+def test_first_review_of_each_grade(grade, ease_factor, interval_days, repetitions):
+    state = schedule_review(None, None, None, None, grade, NOW)
+    assert state["ease_factor"] == pytest.approx(ease_factor)
+    assert (state["interval_days"], state["repetitions"]) == (interval_days, repetitions)
+    assert state["due_at"] == NOW + datetime.timedelta(days=interval_days)
+    assert state["last_reviewed"] == NOW
+
+def test_successful_reviews_grow_the_interval_by_the_ease():
+    state = {"ease_factor": SRS_INITIAL_EASE, "interval_days": 0.0, "repetitions": 0, "proficiency": 0.0}
+    intervals = []
+    for _ in range(4):
+        state = schedule_review(state["ease_factor"], state["interval_days"], state["repetitions"],
+                                state["proficiency"], 4, NOW)
+        intervals.append(state["interval_days"])
+    assert intervals == [1.0, 6.0, 15.0, 37.5]
+    assert state["proficiency"] == pytest.approx(0.24)
+
+def test_a_lapse_restarts_the_card_and_lowers_its_ease():
+    state = schedule_review(2.5, 15.0, 3, 0.6, 1, NOW)
+    assert (state["interval_days"], state["repetitions"]) == (1.0, 0)
+    assert state["ease_factor"] == pytest.approx(1.96)
+    assert state["proficiency"] == pytest.approx(0.54)
+
+def test_ease_never_drops_below_the_minimum():
+    assert schedule_review(SRS_MINIMUM_EASE, 1.0, 0, 0.0, 0, NOW)["ease_factor"] == SRS_MINIMUM_EASE
+
+def test_grades_outside_the_scale_are_rejected():
+    with pytest.raises(ValueError):
+        schedule_review(None, None, None, None, 6, NOW)
+
+def vocabulary_ids(db, words):
+    rows = db.session.execute(select(Vocabulary.word, Vocabulary.id).where(Vocabulary.word.in_(words)))
+    return dict(rows.all())
+
+def test_review_queue_lists_due_cards_soonest_first(db, user):
+    db.add_words_to_user(user.id, ["uno", "dos", "tres"], "es")
+    ids = vocabulary_ids(db, ["uno", "dos", "tres"])
+    due = {"uno": NOW - datetime.timedelta(hours=1), "dos": NOW - datetime.timedelta(days=2),
+           "tres": NOW + datetime.timedelta(days=1)}
+    for word, due_at in due.items():
+        db.session.execute(
+            user_vocabulary.update().where(user_vocabulary.c.vocabulary_id == ids[word]).values(due_at=due_at))
+    db.session.commit()
+
+    assert [card["word"] for card in db.get_review_queue(user.id, now=NOW)] == ["dos", "uno"]
+    assert [card["word"] for card in db.get_review_queue(user.id, limit=1, now=NOW)] == ["dos"]
+    assert db.count_due_reviews(user.id, now=NOW) == 2
+
+def test_submitted_reviews_reschedule_in_order_and_move_stats(db, user):
+    db.add_words_to_user(user.id, ["uno", "dos"], "es", proficiency=0.28)
+    ids = vocabulary_ids(db, ["uno", "dos"])
+
+    states = db.submit_reviews(user.id, [
+        {"vocabulary_id": ids["uno"], "grade": 5},
+        {"vocabulary_id": ids["uno"], "grade": 5},
+        {"vocabulary_id": ids["dos"], "grade": 0},
+        {"vocabulary_id": 999999, "grade": 5}
+    ], now=NOW)
+
+    assert set(states) == {ids["uno"], ids["dos"]}
+    assert (states[ids["uno"]]["interval_days"], states[ids["uno"]]["repetitions"]) == (6.0, 2)
+    assert states[ids["uno"]]["ease_factor"] == pytest.approx(2.7)
+    assert states[ids["dos"]]["due_at"] == NOW + datetime.timedelta(days=1)
+    user_id = user.id
+    db.close()
+    stats = db.get_user_stats(user_id)
+    assert (stats.vocab_low, stats.vocab_medium) == (1, 1)
+
+def test_submit_endpoint_moves_the_due_date(db, client, user):
+    db.add_words_to_user(user.id, ["uno"], "es")
+    vocab_id = vocabulary_ids(db, ["uno"])["uno"]
+    log_in(client, user.id)
+    assert [card["id"] for card in client.get("/api/review/queue").get_json()["cards"]] == [vocab_id]
+
+    before = datetime.datetime.utcnow()
+    response = client.post("/api/review/submit", json={"reviews": [{"vocabulary_id": vocab_id, "grade": 4}]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["reviewed"] == 1
+    next_due = datetime.datetime.fromisoformat(body["next_due"][str(vocab_id)])
+    assert before + datetime.timedelta(days=1) <= next_due <= datetime.datetime.utcnow() + datetime.timedelta(days=1)
+
+    db.close()
+    stored = db.session.execute(select(user_vocabulary.c.due_at, user_vocabulary.c.ease_factor)).one()
+    assert stored.due_at == next_due and stored.ease_factor == pytest.approx(2.5)
+    queue = client.get("/api/review/queue").get_json()
+    assert queue == {"cards": [], "due_count": 0}
+
+def test_submit_endpoint_rejects_bad_grades(db, client, user):
+    log_in(client, user.id)
+    response = client.post("/api/review/submit", json={"reviews": [{"vocabulary_id": 1, "grade": 7}]})
+    assert response.status_code == 400
+
+def test_new_links_start_at_the_configured_ease(db, user):
+    db.add_words_to_user(user.id, ["uno"], "es")
+    db.add_word_to_user(user.id, "dos", "es")
+    eases = db.session.execute(select(user_vocabulary.c.ease_factor)).scalars().all()
+    assert eases == [SRS_INITIAL_EASE, SRS_INITIAL_EASE]
+    assert user_vocabulary.c.ease_factor.default.arg == SRS_INITIAL_EASE
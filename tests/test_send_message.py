@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from concurrent.futures import Future
+
+from database.schema import MessageAnalysis
+from tests.conftest import ADMIN_HEADERS, log_in
+from tests.test_archive import age_messages
+from utils.nlp_executor import NLPExecutorBusy
+
+def send(client, conversation_id, message):
+    return client.post("/api/send_message", json={"conversation_id": conversation_id, "message": message})
+
+def test_send_message_records_analysis_words_and_progress(db, client, user):
+    conversation_id = db.create_conversation(user.id, "Greetings and Introductions", "es").id
+    log_in(client, user.id)
+
+    response = send(client, conversation_id, "Hola, gracias")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["ai_message"]["content"] == "¡Muy bien!"
+
+    db.close()
+    analysis = db.session.get(MessageAnalysis, body["user_message"]["id"])
+    assert analysis.fluency_score == 0.7 and analysis.vocabulary_count == 2
+    assert db.get_user_stats(user.id).vocab_total == 2
+
+def test_send_message_after_archiving(db, client, user):
+    conversation_id = db.create_conversation(user.id, "Food and Drink", "es").id
+    log_in(client, user.id)
+    first = send(client, conversation_id, "Quiero un café").get_json()["user_message"]["id"]
+
+    age_messages(db, conversation_id)
+    assert db.archive_idle_conversations(idle_days=90)["messages"] == 2
+
+    response = send(client, conversation_id, "Y un té, por favor")
+    assert response.status_code == 200
+    second = response.get_json()["user_message"]["id"]
+    assert second > first
+
+    db.close()
+    assert {analysis.message_id for analysis in db.session.query(MessageAnalysis)} == {first, second}
+    export = client.get("/admin/export/message_analysis", headers=ADMIN_HEADERS).get_data(as_text=True)
+    assert sorted(int(row["message_id"]) for row in csv.DictReader(io.StringIO(export))) == [first, second]
+
+def test_send_message_runs_text_analysis_through_the_nlp_executor(db, client, user):
+    from app import nlp_executor
+    conversation_id = db.create_conversation(user.id, "Travel", "es").id
+    log_in(client, user.id)
+    inline = nlp_executor.stats()["inline"]
+
+    body = send(client, conversation_id, "Quiero viajar a Madrid.").get_json()
+    assert nlp_executor.stats()["inline"] == inline + 1
+    text_analysis = body["analysis"]["text_analysis"]
+    assert text_analysis["complexity"]["estimated_level"] != "Unknown"
+    assert text_analysis["grammar_errors"] == []
+
+    db.close()
+    stored = json.loads(db.session.get(MessageAnalysis, body["user_message"]["id"]).analysis)
+    assert stored["text_analysis"] == text_analysis
+
+def test_send_message_without_text_analysis_when_the_pool_is_busy(db, client, user, monkeypatch):
+    from app import nlp_executor
+
+    def busy(*args, **kwargs):
+        raise NLPExecutorBusy("NLP pool has 32 jobs pending")
+
+    monkeypatch.setattr(nlp_executor, "submit", busy)
+    conversation_id = db.create_conversation(user.id, "Travel", "es").id
+    log_in(client, user.id)
+
+    response = send(client, conversation_id, "Quiero viajar a Madrid.")
+    assert response.status_code == 200
+    assert "text_analysis" not in response.get_json()["analysis"]
+    assert response.get_json()["analysis"]["fluency"] == 0.7
+
+def test_send_message_analyses_inline_when_the_pool_times_out(db, client, user, monkeypatch):
+    from app import nlp_executor
+    monkeypatch.setattr(nlp_executor, "submit", lambda *args, **kwargs: Future())  # Never finishes
+    monkeypatch.setattr(nlp_executor, "submit_timeout", 0.05)
+    conversation_id = db.create_conversation(user.id, "Travel", "es").id
+    log_in(client, user.id)
+
+    response = send(client, conversation_id, "Quiero viajar a Madrid.")
+    assert response.status_code == 200
+    assert response.get_json()["analysis"]["text_analysis"]["complexity"]["estimated_level"] == "Beginner"
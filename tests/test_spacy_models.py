@@ -0,0 +1,69 @@
+import threading
+
+from utils.spacy_models import DEFAULT_MODEL_BYTES, MODEL_MEMORY_FACTOR, SpacyModelManager
+
+MODEL_NAMES = {"en": "en_test_model", "es": "es_test_model", "fr": "fr_test_model"}
+
+def test_models_without_a_package_are_sized_by_the_fixed_estimate():
+    manager = SpacyModelManager(model_names=MODEL_NAMES, loader=lambda name: object())
+    manager.get("en")
+    assert manager.stats()["models"]["en"]["size_bytes"] == DEFAULT_MODEL_BYTES
+    assert manager.bytes == DEFAULT_MODEL_BYTES
+
+def test_directory_models_are_sized_by_their_disk_size_scaled_to_memory(tmp_path):
+    (tmp_path / "weights").write_bytes(b"\0" * 4096)
+    (tmp_path / "meta.json").write_text("{}")
+    manager = SpacyModelManager(model_names={"en": str(tmp_path)}, loader=lambda name: object())
+    manager.get("en")
+    assert manager.bytes == (4096 + 2) * MODEL_MEMORY_FACTOR
+    assert MODEL_MEMORY_FACTOR > 1
+
+def test_concurrent_loads_are_sized_independently():
+    started = threading.Barrier(2)
+
+    def loader(name):
+        started.wait(timeout=5)  # Both loads are in progress at once
+        bytearray(8 * 2 ** 20)
+        return name
+
+    manager = SpacyModelManager(model_names=MODEL_NAMES, loader=loader)
+    threads = [threading.Thread(target=manager.get, args=(code,)) for code in ("en", "es")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sizes = {code: counters["size_bytes"] for code, counters in manager.stats()["models"].items()}
+    assert sizes == {"en": DEFAULT_MODEL_BYTES, "es": DEFAULT_MODEL_BYTES}
+
+def test_least_recently_used_model_is_evicted_over_budget():
+    manager = SpacyModelManager(memory_budget=2 * DEFAULT_MODEL_BYTES, model_names=MODEL_NAMES,
+                                loader=lambda name: name)
+    manager.get("en")
+    manager.get("es")
+    manager.get("en")
+    manager.get("fr")
+    assert manager.loaded() == ["en", "fr"]
+    assert manager.bytes == 2 * DEFAULT_MODEL_BYTES
+    assert manager.stats()["models"]["es"]["evictions"] == 1
+
+def test_evict_only_drops_the_managers_reference():
+    manager = SpacyModelManager(model_names=MODEL_NAMES, loader=lambda name: [name])
+    model = manager.get("en")
+    assert manager.evict("en")
+    assert manager.bytes == 0 and manager.loaded() == []
+    assert model == ["en_test_model"]  # Still usable by whoever holds it
+    assert manager.get("en") is not model
+    assert not manager.evict("de")
+
+def test_failed_loads_are_not_retried():
+    calls = []
+
+    def loader(name):
+        calls.append(name)
+        raise OSError("not installed")
+
+    manager = SpacyModelManager(model_names=MODEL_NAMES, loader=loader)
+    assert manager.get("en") is None
+    assert manager.get("en") is None
+    assert calls == ["en_test_model"]
+    assert manager.stats()["unavailable"] == ["en"]
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy stacks that must only load when first used, not when the app is imported
+LAZY_PACKAGES = ("spacy", "nltk", "numpy", "matplotlib", "torch", "transformers", "pyarrow")
+
+def modules_loaded_by_import(module, tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}", INIT_DB_ON_STARTUP="false")
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print(' '.join(sys.modules))"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return {name.split(".")[0] for name in result.stdout.split()}
+
+@pytest.mark.parametrize("module", ["app", "utils.language_utils", "database.db_handler"])
+def test_import_does_not_load_heavy_packages(module, tmp_path):
+    assert not modules_loaded_by_import(module, tmp_path) & set(LAZY_PACKAGES)
+
+def test_startup_does_not_download_nltk_data(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}", INIT_DB_ON_STARTUP="false",
+               NLTK_DATA_DIR=str(tmp_path / "nltk_data"))
+    subprocess.run([sys.executable, "-c", "import app"], cwd=ROOT, env=env, check=True, capture_output=True)
+    assert not (tmp_path / "nltk_data").exists()
+
+def test_import_leaves_the_schema_to_init_db(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != "INIT_DB_ON_STARTUP"}
+    env["DATABASE_URL"] = f"sqlite:///{tmp_path / 'startup.db'}"
+    tables = ("import app; from sqlalchemy import inspect; from database.db_handler import engine; "
+              "print(sorted(inspect(engine).get_table_names()))")
+    result = subprocess.run([sys.executable, "-c", tables], cwd=ROOT, env=env, capture_output=True, text=True,
+                            check=True)
+    assert result.stdout.splitlines()[-1] == "[]"
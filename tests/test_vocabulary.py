@@ -0,0 +1,108 @@
+from sqlalchemy import event, select, text
+
+from database import db_handler as db_module
+from database.db_handler import _upgrade_schema
+from database.schema import Vocabulary, user_vocabulary
+
+def vocabulary_words(db):
+    return sorted(word for (word,) in db.session.execute(select(Vocabulary.word)))
+
+def on_first_insert_into(table_name, action):
+    """Run action on a separate connection just before the first INSERT into a table, as a concurrent request would."""
+    fired = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not fired and statement.startswith(f"INSERT INTO {table_name} "):
+            fired.append(True)
+            with db_module.engine.begin() as other:
+                action(other)
+
+    engine = db_module.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return lambda: event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def test_words_are_matched_case_insensitively(db, user):
+    assert db.add_words_to_user(user.id, ["Hola", "hola", " HOLA "], "es") == {"added": 1, "updated": 0}
+    assert db.add_words_to_user(user.id, ["hOLA"], "es") == {"added": 0, "updated": 1}
+    assert db.add_word_to_user(user.id, "Hola", "es") is False
+    assert db.update_word_proficiency(user.id, "HOLA", "es", 0.1)
+    assert vocabulary_words(db) == ["hola"]
+    assert db.get_user_stats(user.id).vocab_total == 1
+
+def test_per_word_details_and_proficiency_ignore_case(db, user):
+    db.add_words_to_user(user.id, ["Gato"], "es", details={"GATO": {"translation": "cat"}},
+                         word_proficiency={"gato": 0.8})
+    vocab = db.session.query(Vocabulary).filter_by(word="gato").one()
+    assert vocab.translation == "cat"
+    proficiency = db.session.execute(select(user_vocabulary.c.proficiency)).scalar()
+    assert proficiency == 0.8
+
+def test_stats_count_only_links_really_inserted(db, user):
+    vocab_id = db.add_vocabulary("casa", "es").id
+    db.add_vocabulary("perro", "es")
+    db.session.commit()
+
+    def link_casa(conn):
+        conn.execute(user_vocabulary.insert().values(user_id=user.id, vocabulary_id=vocab_id, proficiency=0.2))
+
+    remove = on_first_insert_into("user_vocabulary", link_casa)
+    try:
+        counts = db.add_words_to_user(user.id, ["casa", "perro"], "es")
+    finally:
+        remove()
+    assert counts["added"] == 1
+    assert db.get_user_stats(user.id).vocab_total == 1  # The concurrent request counts its own word
+
+def test_a_word_added_concurrently_is_reused(db, user):
+    added_concurrently = []
+
+    def add_word(conn):
+        conn.execute(Vocabulary.__table__.insert().values(word="libro", language="es"))
+        added_concurrently.append(True)
+
+    remove = on_first_insert_into("vocabulary", add_word)
+    try:
+        counts = db.add_words_to_user(user.id, ["libro"], "es")
+    finally:
+        remove()
+    assert added_concurrently
+    assert counts == {"added": 1, "updated": 0}
+    assert vocabulary_words(db) == ["libro"]
+
+def test_upgrade_merges_words_differing_in_case(db, user):
+    other = db.create_user("second", "second@example.com", "secret", "en", "es")
+    with db_module.engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_vocabulary_language_word"))
+        conn.execute(Vocabulary.__table__.insert(), [
+            {"id": 1, "word": "Agua", "language": "es"},
+            {"id": 2, "word": "agua", "language": "es"},
+            {"id": 3, "word": "Agua", "language": "pt"}
+        ])
+        conn.execute(user_vocabulary.insert(), [
+            {"user_id": user.id, "vocabulary_id": 1, "proficiency": 0.5},
+            {"user_id": user.id, "vocabulary_id": 2, "proficiency": 0.9},
+            {"user_id": other.id, "vocabulary_id": 2, "proficiency": 0.1}
+        ])
+        conn.execute(text("UPDATE user_stats SET vocab_total = 2, vocab_medium = 1, vocab_high = 1 "
+                          f"WHERE user_id = {user.id}"))
+
+    _upgrade_schema()
+    db.session.expire_all()
+
+    rows = db.session.execute(select(Vocabulary.id, Vocabulary.word, Vocabulary.language).order_by(Vocabulary.id))
+    assert [tuple(row) for row in rows] == [(1, "agua", "es"), (3, "agua", "pt")]
+    links = db.session.execute(select(user_vocabulary.c.user_id, user_vocabulary.c.vocabulary_id))
+    assert sorted(tuple(link) for link in links) == [(user.id, 1), (other.id, 1)]
+    stats = db.get_user_stats(user.id)
+    assert (stats.vocab_total, stats.vocab_medium, stats.vocab_high) == (1, 1, 0)
+
+def test_new_words_get_their_frequency_level(db):
+    assert db.add_vocabulary("Perro", "es").difficulty_level == "Beginner"
+    assert db.add_vocabulary("jurisprudencia", "es").difficulty_level == "Fluent"
+
+def test_reclassify_replaces_existing_levels(db):
+    db.add_vocabulary("perro", "es", difficulty_level="Intermediate")
+    assert db.classify_vocabulary_difficulty() == 0
+    assert db.classify_vocabulary_difficulty(reclassify=True) == 1
+    db.close()
+    assert db.session.execute(select(Vocabulary.difficulty_level)).scalar_one() == "Beginner"
@@ -0,0 +1,55 @@
+import datetime
+import io
+
+from database.schema import user_vocabulary
+from utils.vocabulary_io import read_vocabulary_rows, write_vocabulary_rows
+
+def export(words, fmt):
+    return "".join(write_vocabulary_rows(words, fmt))
+
+def test_csv_reads_proficiency_and_last_reviewed_clamped():
+    text = ("word,translation,proficiency,last_reviewed\n"
+            "gato,cat,0.75,2024-03-01T10:30:00\n"
+            "perro,dog,1.7,2999-01-01T00:00:00\n"
+            "casa,house,-2,2024-03-01T12:00:00+02:00\n"
+            "libro,book,lots,yesterday\n")
+    entries = {entry["word"]: entry for entry in read_vocabulary_rows(io.StringIO(text), "csv")}
+
+    assert entries["gato"]["proficiency"] == 0.75
+    assert entries["gato"]["last_reviewed"] == datetime.datetime(2024, 3, 1, 10, 30)
+    assert entries["perro"]["proficiency"] == 1.0
+    assert entries["perro"]["last_reviewed"] <= datetime.datetime.utcnow()
+    assert entries["casa"]["proficiency"] == 0.0
+    assert entries["casa"]["last_reviewed"] == datetime.datetime(2024, 3, 1, 10, 0)
+    assert entries["libro"]["proficiency"] is None
+    assert entries["libro"]["last_reviewed"] is None
+
+def test_tsv_round_trips_tabs_newlines_and_backslashes():
+    words = [{"word": "tab\there", "translation": "line one\nline two \\ back"}]
+    entries = list(read_vocabulary_rows(io.StringIO(export(words, "tsv"), newline=""), "tsv"))
+    assert [(entry["word"], entry["translation"]) for entry in entries] == [
+        ("tab\there", "line one\nline two \\ back")
+    ]
+
+def test_csv_export_then_import_keeps_progress(db, user):
+    reviewed = datetime.datetime(2024, 5, 2, 8, 15)
+    db.add_words_to_user(user.id, ["gato", "perro"], "es", word_proficiency={"gato": 0.9, "perro": 0.4},
+                         word_last_reviewed={"gato": reviewed})
+    exported = export(db.iter_user_vocabulary(user.id), "csv")
+
+    learner = db.create_user("importer", "importer@example.com", "secret", "en", "es")
+    entries = list(read_vocabulary_rows(io.StringIO(exported, newline=""), "csv"))
+    assert db.import_vocabulary_chunk(learner.id, entries, "es")["added"] == 2
+
+    rows = db.session.execute(
+        user_vocabulary.select().where(user_vocabulary.c.user_id == learner.id)
+    ).all()
+    progress = {row.vocabulary_id: (row.proficiency, row.last_reviewed) for row in rows}
+    original = {
+        row.vocabulary_id: (row.proficiency, row.last_reviewed)
+        for row in db.session.execute(user_vocabulary.select().where(user_vocabulary.c.user_id == user.id))
+    }
+    assert progress == original
+    assert progress[min(progress)] == (0.9, reviewed)
+    stats = db.get_user_stats(learner.id)
+    assert (stats.vocab_total, stats.vocab_medium, stats.vocab_high) == (2, 1, 1)
@@ -0,0 +1,50 @@
+import datetime
+
+from tests.conftest import log_in
+
+def walk(client, **params):
+    """Every item of /api/vocabulary, following next_cursor page by page."""
+    items, pages, cursor = [], 0, None
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        body = client.get("/api/vocabulary", query_string=query).get_json()
+        items.extend(body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if not cursor:
+            return items, pages
+
+def test_cursors_walk_every_word_once_despite_tied_timestamps(db, client, user):
+    tied = datetime.datetime(2026, 1, 5, 8, 0)
+    words = [f"palabra{n:02d}" for n in range(23)]
+    # Two groups share one last_reviewed each; the rest share the time they were added
+    db.add_words_to_user(user.id, words[:9], "es", word_last_reviewed={word: tied for word in words[:9]})
+    db.add_words_to_user(user.id, words[9:17], "es",
+                         word_last_reviewed={word: tied + datetime.timedelta(days=1) for word in words[9:17]})
+    db.add_words_to_user(user.id, words[17:], "es")
+    other = db.create_user("second", "second@example.com", "secret", "en", "es")
+    db.add_words_to_user(other.id, ["ajeno", "palabra03"], "es")
+    log_in(client, user.id)
+
+    items, pages = walk(client, limit=5)
+    assert pages == 5
+    assert sorted(item["word"] for item in items) == words
+    keys = [(item["last_reviewed"], item["id"]) for item in items]
+    assert keys == sorted(keys) and len(set(keys)) == len(keys)
+
+    # A page size that divides the list exactly ends without an empty page
+    assert walk(client, limit=23) == (items, 1)
+
+def test_cursors_walk_filtered_lists(db, client, user):
+    db.add_words_to_user(user.id, [f"gato{n}" for n in range(7)], "es", proficiency=0.1)
+    db.add_words_to_user(user.id, [f"perro{n}" for n in range(6)], "es", proficiency=0.9)
+    log_in(client, user.id)
+
+    low, _ = walk(client, level="beginner", limit=3)
+    assert sorted(item["word"] for item in low) == [f"gato{n}" for n in range(7)]
+    found, pages = walk(client, q="perro", limit=4)
+    assert sorted(item["word"] for item in found) == [f"perro{n}" for n in range(6)] and pages == 2
+
+def test_invalid_cursor(db, client, user):
+    log_in(client, user.id)
+    assert client.get("/api/vocabulary?cursor=not-a-cursor").status_code == 400
@@ -0,0 +1,129 @@
+import csv
+import importlib.util
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import types
+
+# pyarrow is optional; without it only CSV exports are available. It is slow
+# to import, so it is only imported when a Parquet export is written.
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+def available_formats() -> List[str]:
+    """Export formats usable with the installed libraries."""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or PYARROW_AVAILABLE]
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+def write_csv_chunks(columns: List[Tuple[str, Any]], chunks: Iterable[Dict[str, List[Any]]]) -> Iterator[str]:
+    """
+    Serialize columnar chunks as CSV text, one piece per chunk.
+
+    Args:
+        columns: (name, SQLAlchemy type) pairs, e.g. from DatabaseHandler.export_columns
+        chunks: Dictionaries of column lists, e.g. from DatabaseHandler.iter_export_columns
+
+    Yields:
+        Pieces of the file, starting with the header row
+    """
+    names = [name for name, _ in columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(names)
+    yield buffer.getvalue()
+
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in zip(*(chunk[name] for name in names)):
+            writer.writerow([_csv_value(value) for value in row])
+        yield buffer.getvalue()
+
+def _arrow_type(column_type: Any) -> "pa.DataType":
+    """Map a SQLAlchemy column type to the Arrow type used in Parquet exports."""
+    import pyarrow as pa
+    if isinstance(column_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, (types.Float, types.Numeric)):
+        return pa.float64()
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, types.Date):
+        return pa.date32()
+    return pa.string()
+
+class _StreamSink:
+    """
+    Write-only file object that hands back what was written since the last drain.
+
+    It keeps counting bytes across drains, since the Parquet footer records
+    absolute offsets taken from tell().
+    """
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._buffer.write(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+def write_parquet_chunks(columns: List[Tuple[str, Any]], chunks: Iterable[Dict[str, List[Any]]],
+                         compression: str = "snappy") -> Iterator[bytes]:
+    """
+    Serialize columnar chunks as a Parquet file, one row group per chunk.
+
+    Only one chunk is held in memory at a time; each row group is yielded as
+    soon as it is written, and the footer comes last.
+
+    Args:
+        columns: (name, SQLAlchemy type) pairs, e.g. from DatabaseHandler.export_columns
+        chunks: Dictionaries of column lists, e.g. from DatabaseHandler.iter_export_columns
+        compression: Parquet compression codec
+
+    Yields:
+        Pieces of the file, suitable for a streaming HTTP response
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export requires the pyarrow package")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, _arrow_type(column_type)) for name, column_type in columns])
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression=compression)
+    try:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pydict(chunk, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
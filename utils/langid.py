@@ -0,0 +1,199 @@
+"""
+Character n-gram language identification.
+
+A multinomial naive Bayes model over character 1- to 3-grams of the
+lowercased text, hashed into NUM_BUCKETS buckets. The model is one
+(NUM_BUCKETS x languages) table of per-language log-probabilities,
+quantized to 8 bits and shipped in utils/data/langid.npz (under 300 KB), so
+identifying a message is a vectorized hash plus one table gather.
+
+The table is built from word-frequency lists: wordfreq for every supported
+language except Thai, which comes from pythainlp's word list. Both are only
+needed to rebuild the model:
+
+    pip install wordfreq pythainlp
+    python -m utils.langid [--words 20000]
+
+Words whose CRC32 is divisible by HOLDOUT_MODULUS are left out of training,
+so benchmarks/langid_benchmark.py can measure accuracy on unseen words.
+"""
+import argparse
+import os
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "langid.npz")
+
+BUCKET_BITS = 14
+NUM_BUCKETS = 1 << BUCKET_BITS
+MAX_ORDER = 3  # Longest character n-gram
+MAX_CHARS = 300  # Only the start of long texts is looked at
+HOLDOUT_MODULUS = 10
+
+# Source word lists for the supported languages that differ from our codes
+WORDFREQ_CODES = {"no": "nb"}
+
+# Digits, punctuation and symbols carry no language signal; runs of them become one space
+NON_LETTERS = re.compile(r"[\W\d_]+")
+
+_MULTIPLIER = np.uint64(0x100000001B3)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_SHIFT = np.uint64(64 - BUCKET_BITS)
+
+def normalize(text: str) -> str:
+    """Lowercase, collapse non-letters to single spaces and pad with spaces at both ends."""
+    return " " + NON_LETTERS.sub(" ", text[:MAX_CHARS].lower()).strip() + " "
+
+def ngram_buckets(normalized: str) -> np.ndarray:
+    """
+    Hash every character 1- to MAX_ORDER-gram of a normalized text into a bucket.
+
+    Returns:
+        Array of bucket indices, one per n-gram
+    """
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    hashes = [codes]
+    current = codes
+    for order in range(2, MAX_ORDER + 1):
+        # Extend every (order - 1)-gram by the next character; uint64 arithmetic wraps
+        current = current[:-1] * _MULTIPLIER + codes[order - 1:]
+        hashes.append(current + np.uint64(order))
+    return ((np.concatenate(hashes) * _MIX) >> _SHIFT).astype(np.intp)
+
+def is_holdout_word(word: str) -> bool:
+    """Whether a word is reserved for evaluation and left out of training."""
+    return zlib.crc32(word.encode("utf-8")) % HOLDOUT_MODULUS == 0
+
+class LanguageIdentifier:
+    """Identifies the language of a text with the packaged character n-gram model."""
+
+    def __init__(self, path: str = MODEL_PATH):
+        with np.load(path, allow_pickle=False) as model:
+            self.languages = [str(code) for code in model["languages"]]
+            # Dequantize once: a (NUM_BUCKETS x languages) float32 table of log-probabilities
+            self.weights = (model["weights"].astype(np.float32) * np.float32(model["scale"])
+                            + np.float32(model["offset"]))
+        if self.weights.shape[0] != NUM_BUCKETS:
+            raise ValueError(f"Language model in {path} was built with different hashing parameters")
+
+    def scores(self, text: str) -> Optional[np.ndarray]:
+        """
+        Mean log-likelihood per n-gram of a text under each language.
+
+        Returns:
+            Array aligned with self.languages, or None if the text has no letters
+        """
+        normalized = normalize(text)
+        if len(normalized) <= 2:
+            return None
+        buckets = ngram_buckets(normalized)
+        return self.weights[buckets].sum(axis=0) / len(buckets)
+
+    def identify(self, text: str) -> Optional[str]:
+        """Most likely language code of a text, or None if it has no letters."""
+        scores = self.scores(text)
+        if scores is None:
+            return None
+        return self.languages[int(scores.argmax())]
+
+    def rank(self, text: str, top: int = 3) -> List[Tuple[str, float]]:
+        """
+        The most likely languages of a text with their probabilities.
+
+        Probabilities are a softmax over the per-n-gram scores, a relative
+        confidence rather than a calibrated probability.
+        """
+        scores = self.scores(text)
+        if scores is None:
+            return []
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        order = np.argsort(-probabilities)[:top]
+        return [(self.languages[i], float(probabilities[i])) for i in order]
+
+_identifier = None
+_identifier_lock = threading.Lock()
+
+def get_language_identifier() -> LanguageIdentifier:
+    """The shared identifier, loading the model on first use."""
+    global _identifier
+    if _identifier is None:
+        with _identifier_lock:
+            if _identifier is None:
+                _identifier = LanguageIdentifier()
+    return _identifier
+
+def load_word_frequencies(language_code: str, max_words: int) -> Dict[str, float]:
+    """
+    Training words of a language with their relative frequencies, holdout words excluded.
+
+    Requires wordfreq, or pythainlp for Thai (which wordfreq doesn't cover).
+    """
+    if language_code == "th":
+        from pythainlp.corpus import thai_words
+        # A plain word list without frequencies: prefer short words, and count every word the same
+        words = sorted(thai_words(), key=lambda word: (len(word), word))[:max_words]
+        frequencies = {word: 1.0 for word in words}
+    else:
+        from wordfreq import get_frequency_dict, top_n_list
+        source = WORDFREQ_CODES.get(language_code, language_code)
+        # Read the stored frequencies: word_frequency would re-tokenize (and need MeCab for ja/ko)
+        table = get_frequency_dict(source)
+        frequencies = {word: table[word] for word in top_n_list(source, max_words)}
+    return {word: frequency for word, frequency in frequencies.items()
+            if not is_holdout_word(word) and NON_LETTERS.sub("", word)}
+
+def build_model(language_codes: Iterable[str], max_words: int = 20000, smoothing: float = 1e-6,
+                path: str = MODEL_PATH) -> None:
+    """
+    Build the n-gram table from word-frequency lists and save it.
+
+    Args:
+        language_codes: Languages to cover
+        max_words: Most frequent words used per language
+        smoothing: Probability mass added to every bucket of a language's
+                   normalized distribution, so unseen n-grams aren't impossible
+        path: Output .npz file
+    """
+    language_codes = list(language_codes)
+    log_probabilities = np.empty((NUM_BUCKETS, len(language_codes)), dtype=np.float64)
+    for column, code in enumerate(language_codes):
+        buckets, weights = [], []
+        for word, frequency in load_word_frequencies(code, max_words).items():
+            word_buckets = ngram_buckets(normalize(word))
+            buckets.append(word_buckets)
+            weights.append(np.full(len(word_buckets), frequency))
+        counts = np.bincount(np.concatenate(buckets), np.concatenate(weights), NUM_BUCKETS)
+        probabilities = (counts / counts.sum() + smoothing) / (1 + smoothing * NUM_BUCKETS)
+        log_probabilities[:, column] = np.log(probabilities)
+        print(f"{code}: {len(buckets)} words")
+
+    offset = log_probabilities.min()
+    scale = (log_probabilities.max() - offset) / 255
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(
+        path,
+        languages=np.array(language_codes),
+        weights=np.round((log_probabilities - offset) / scale).astype(np.uint8),
+        scale=np.float32(scale),
+        offset=np.float32(offset)
+    )
+
+def main():
+    from config import SUPPORTED_LANGUAGES
+
+    parser = argparse.ArgumentParser(description="Build the character n-gram language identification model.")
+    parser.add_argument("--words", type=int, default=20000, help="most frequent words used per language")
+    parser.add_argument("--smoothing", type=float, default=1e-6, help="additive smoothing per bucket")
+    parser.add_argument("--output", default=MODEL_PATH, help="model file to write")
+    args = parser.parse_args()
+
+    build_model(sorted(SUPPORTED_LANGUAGES), max_words=args.words, smoothing=args.smoothing, path=args.output)
+    print(f"Model written to {args.output} ({os.path.getsize(args.output) / 1024:.0f} KiB)")
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,340 @@
 import re
+import sys
 import json
-from typing import List, Dict, Any, Tuple, Set
+import hashlib
+import argparse
+import threading
+import importlib.util
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple, Set, Iterable, Iterator, Optional
 
-# Try to import NLP libraries, but handle if not available
-try:
+from config import NLTK_DATA_DIR, SPACY_BATCH_SIZE, SPACY_N_PROCESS, NLP_CACHE_MAX_ENTRIES, NLP_CACHE_MAX_MB
+from utils.spacy_models import SpacyModelManager
+
+# NLP libraries are optional and slow to import, so only check that they are
+# installed here; they are imported on first use
+NLTK_AVAILABLE = importlib.util.find_spec("nltk") is not None
+SPACY_AVAILABLE = importlib.util.find_spec("spacy") is not None
+
+# NLTK resources used at runtime. They are never downloaded implicitly; fetch
+# them into NLTK_DATA_DIR once with: python -m utils.language_utils
+NLTK_RESOURCES = ("punkt", "punkt_tab", "stopwords")
+
+# Map of available NLTK stopwords for different languages
+NLTK_STOPWORD_LANGUAGES = {
+    'en': 'english',
+    'es': 'spanish',
+    'fr': 'french',
+    'de': 'german',
+    'it': 'italian',
+    'pt': 'portuguese',
+    'ru': 'russian',
+    'nl': 'dutch',
+    'fi': 'finnish',
+    'hu': 'hungarian',
+    'no': 'norwegian',
+    'ro': 'romanian',
+    'sv': 'swedish',
+    'tr': 'turkish',
+    'da': 'danish',
+    'pl': 'polish',
+    'ar': 'arabic',
+    'id': 'indonesian'
+    # Some languages may not have stopwords in NLTK
+}
+
+def _import_nltk():
+    """Import NLTK, looking for resources in NLTK_DATA_DIR before its default locations."""
     import nltk
-    from nltk.tokenize import word_tokenize
-    from nltk.corpus import stopwords
-    # Download necessary NLTK data
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    NLTK_AVAILABLE = True
-except ImportError:
-    NLTK_AVAILABLE = False
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return nltk
 
-try:
-    import spacy
-    SPACY_AVAILABLE = True
-except ImportError:
-    SPACY_AVAILABLE = False
+def download_nltk_resources(download_dir: str = NLTK_DATA_DIR) -> None:
+    """Fetch the NLTK resources LanguageUtils uses into the local data directory."""
+    nltk = _import_nltk()
+    for resource in NLTK_RESOURCES:
+        nltk.download(resource, download_dir=download_dir, quiet=True)
+
+# spaCy components each analysis needs; all others are disabled while it runs.
+# Tokenization is not a pipeline component, so token-only tasks disable everything.
+SPACY_TASK_COMPONENTS = {
+    "tokens": set(),
+    "vocabulary": set(),
+    "complexity": {"transformer", "tok2vec", "tagger", "morphologizer", "attribute_ruler", "lemmatizer"},  # Lemmas
+    "grammar": {"transformer", "tok2vec", "tagger", "morphologizer", "attribute_ruler"}  # Part-of-speech tags
+}
+ANALYSIS_TASKS = ("vocabulary", "complexity", "grammar")
+
+def _approximate_size(value: Any) -> int:
+    """Rough deep size in bytes of a cached analysis made of strings, numbers, tuples and dicts."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_approximate_size(key) + _approximate_size(item) for key, item in value.items())
+    elif isinstance(value, (tuple, list)):
+        size += sum(_approximate_size(item) for item in value)
+    return size
+
+class AnalysisCache:
+    """
+    Thread-safe LRU of text analyses, bounded by entry count and approximate memory.
+    
+    Keys are (language code, backend, BLAKE2b digest of the text), so the
+    texts themselves are not kept and what a fallback tokenizer produced is
+    never served once the spaCy model is available. Values are dictionaries of analysis results
+    ("tokens" plus one key per task) that must not be mutated once stored.
+    """
+    
+    def __init__(self, max_entries: int = NLP_CACHE_MAX_ENTRIES, max_bytes: int = NLP_CACHE_MAX_MB * 2 ** 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (size, value), least recently used first
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def key(text: str, language_code: str, backend: str) -> Tuple[str, str, bytes]:
+        return (language_code, backend, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest())
+    
+    def get(self, key: Tuple[str, str, bytes], fields: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached analysis, or None if there is none.
+        
+        It counts as a hit only if it has all the given fields; a partial
+        analysis is still returned so the caller can extend it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            value = entry[1]
+            if all(field in value for field in fields):
+                self.hits += 1
+            else:
+                self.misses += 1
+            return value
+    
+    def set(self, key: Tuple[str, str, bytes], value: Dict[str, Any]) -> None:
+        """Store an analysis, evicting the least recently used ones beyond either bound."""
+        size = _approximate_size(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[0]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (size, value)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                evicted_size, _ = self._entries.popitem(last=False)[1]
+                self.bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Remove every entry; statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate, size and evictions since the cache was created."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions
+            }
+    
+    def __len__(self):
+        return len(self._entries)
 
 class LanguageUtils:
-    def __init__(self):
-        """Initialize language utilities with available NLP tools."""
-        self.nlp_models = {}
+    def __init__(self, analysis_cache: Optional[AnalysisCache] = None,
+                 spacy_models: Optional[SpacyModelManager] = None):
+        """
+        Initialize language utilities; NLP tools and data are loaded on demand.
+        
+        Args:
+            analysis_cache: Cache of tokenizations and analyses; a new one sized
+                            from NLP_CACHE_MAX_ENTRIES and NLP_CACHE_MAX_MB by default
+            spacy_models: Loaded spaCy models; a new manager with the
+                          SPACY_MODEL_MEMORY_MB budget by default
+        """
+        self.spacy_models = spacy_models if spacy_models is not None else SpacyModelManager()
         self.stopwords = {}
+        self._nltk_tokenizer_ready = NLTK_AVAILABLE
+        self.analysis_cache = analysis_cache if analysis_cache is not None else AnalysisCache()
+    
+    def get_stopwords(self, language_code: str) -> Set[str]:
+        """
+        Get (or load) the NLTK stopword set for a language.
         
-        # Initialize NLTK if available
-        if NLTK_AVAILABLE:
-            # Map of available NLTK stopwords for different languages
-            nltk_languages = {
-                'en': 'english',
-                'es': 'spanish',
-                'fr': 'french',
-                'de': 'german',
-                'it': 'italian',
-                'pt': 'portuguese',
-                'ru': 'russian',
-                'nl': 'dutch',
-                'fi': 'finnish',
-                'hu': 'hungarian',
-                'no': 'norwegian',
-                'ro': 'romanian',
-                'sv': 'swedish',
-                'tr': 'turkish',
-                'da': 'danish',
-                'pl': 'polish',
-                'ar': 'arabic',
-                'id': 'indonesian'
-                # Some languages may not have stopwords in NLTK
-            }
-            
-            # Initialize available stopwords
-            for lang_code, nltk_name in nltk_languages.items():
+        Returns an empty set if NLTK, its stopwords corpus or the language
+        is unavailable.
+        """
+        if language_code not in self.stopwords:
+            words = set()
+            nltk_name = NLTK_STOPWORD_LANGUAGES.get(language_code)
+            if NLTK_AVAILABLE and nltk_name:
                 try:
-                    self.stopwords[lang_code] = set(stopwords.words(nltk_name))
-                except:
-                    # If language not available in NLTK, continue without it
+                    _import_nltk()
+                    from nltk.corpus import stopwords
+                    words = set(stopwords.words(nltk_name))
+                except LookupError:
+                    # Corpus not downloaded; run python -m utils.language_utils
                     pass
-        
-        # Initialize spaCy if available
-        if SPACY_AVAILABLE:
-            # Models will be loaded on demand to save memory
-            pass
+            self.stopwords[language_code] = words
+        return self.stopwords[language_code]
     
     def get_spacy_model(self, language_code: str):
-        """Get (or load) a spaCy model for a specific language."""
+        """Get (or load) a spaCy model for a specific language, within the model memory budget."""
         if not SPACY_AVAILABLE:
             return None
+        return self.spacy_models.get(language_code)
+    
+    def _parse_texts(self, nlp, texts: List[str], tasks: Iterable[str],
+                     batch_size: Optional[int] = None, n_process: Optional[int] = None) -> Iterator[Any]:
+        """
+        Tokenize (and tag, if a task needs it) a batch of texts in one pass.
+        
+        With a spaCy model the texts go through nlp.pipe with every component
+        the tasks don't need disabled; with None they are tokenized with NLTK
+        or a regular expression.
         
-        if language_code not in self.nlp_models:
+        Yields:
+            A spaCy Doc or a list of token strings for each text, in order
+        """
+        if nlp is None:
+            for text in texts:
+                yield self._fallback_tokens(text)
+            return
+        
+        needed = set().union(*(SPACY_TASK_COMPONENTS[task] for task in tasks))
+        yield from nlp.pipe(
+            (text or "" for text in texts),
+            disable=[name for name in nlp.pipe_names if name not in needed],
+            batch_size=batch_size or SPACY_BATCH_SIZE,
+            n_process=n_process or SPACY_N_PROCESS
+        )
+    
+    def _fallback_tokens(self, text: str) -> List[str]:
+        """Tokenize without spaCy: NLTK if its tokenizer data is installed, else a regex."""
+        if not text:
+            return []
+        if self._nltk_tokenizer_ready:
             try:
-                # Map language codes to spaCy model names
-                model_name = {
-                    'en': 'en_core_web_sm',
-                    'es': 'es_core_news_sm',
-                    'fr': 'fr_core_news_sm',
-                    'de': 'de_core_news_sm',
-                    'it': 'it_core_news_sm',
-                    'pt': 'pt_core_news_sm',
-                    'ja': 'ja_core_news_sm',
-                    'zh': 'zh_core_web_sm',
-                    'nl': 'nl_core_news_sm',
-                    'ru': 'ru_core_news_sm',
-                    'el': 'el_core_news_sm',
-                    'pl': 'pl_core_news_sm',
-                    'ro': 'ro_core_news_sm',
-                    'lt': 'lt_core_news_sm',
-                    'nb': 'nb_core_news_sm',  # Norwegian
-                    'da': 'da_core_news_sm',
-                    'fi': 'fi_core_news_sm',
-                    'sv': 'sv_core_news_sm',
-                    'uk': 'uk_core_news_sm',
-                    'ca': 'ca_core_news_sm',
-                    'hr': 'hr_core_news_sm',
-                    'fa': 'fa_core_news_sm',
-                    # Not all languages have spaCy models
-                }.get(language_code)
-                
-                if model_name:
-                    self.nlp_models[language_code] = spacy.load(model_name)
-                else:
-                    return None
-            except:
-                # Model not installed or not available
-                return None
+                _import_nltk()
+                from nltk.tokenize import word_tokenize
+                return word_tokenize(text)
+            except LookupError:
+                self._nltk_tokenizer_ready = False
         
-        return self.nlp_models.get(language_code)
+        # Most basic fallback: split on whitespace and punctuation
+        return re.findall(r'\b\w+\b', text)
+    
+    def analyze_texts(self, texts: Iterable[str], language_code: str = 'en',
+                      tasks: Iterable[str] = ANALYSIS_TASKS, batch_size: Optional[int] = None,
+                      n_process: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Run several analyses over a batch of texts, parsing each text only once.
+        
+        Args:
+            texts: Texts to analyze
+            language_code: Language code (e.g., 'en', 'es')
+            tasks: Any of "vocabulary", "complexity" and "grammar"
+            batch_size: Texts per spaCy batch (SPACY_BATCH_SIZE by default)
+            n_process: spaCy worker processes (SPACY_N_PROCESS by default)
+            
+        Returns:
+            One dictionary per text with its "tokens" and a key per task, holding
+            what extract_vocabulary, calculate_text_complexity and
+            detect_grammar_errors return for it
+        """
+        tasks = tuple(tasks)
+        unknown = set(tasks) - set(ANALYSIS_TASKS)
+        if unknown:
+            raise ValueError(f"Unknown analysis tasks: {', '.join(sorted(unknown))}")
+        
+        results = []
+        for entry in self._cached_analyses(list(texts), language_code, tasks, batch_size, n_process):
+            # Copies, so callers can't change what later lookups get
+            result = {"tokens": list(entry["tokens"])}
+            if "vocabulary" in tasks:
+                result["vocabulary"] = list(entry["vocabulary"])
+            if "complexity" in tasks:
+                result["complexity"] = {key: dict(value) if isinstance(value, dict) else value
+                                        for key, value in entry["complexity"].items()}
+            if "grammar" in tasks:
+                result["grammar"] = [dict(error) for error in entry["grammar"]]
+            results.append(result)
+        return results
+    
+    def _cached_analyses(self, texts: List[str], language_code: str, tasks: Tuple[str, ...],
+                         batch_size: Optional[int], n_process: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        Analyses of a batch of texts, parsing only the distinct texts the cache can't answer.
+        
+        Returns:
+            One cache entry per text with "tokens" and every task, holding
+            tuples and dicts shared with the cache
+        """
+        # Resolve the backend first, so results are keyed by what produced them
+        nlp = self.get_spacy_model(language_code)
+        backend = "fallback" if nlp is None else f"spacy:{self.spacy_models.model_names[language_code]}"
+        keys = [AnalysisCache.key(text or "", language_code, backend) for text in texts]
+        entries = [self.analysis_cache.get(key, tasks) for key in keys]
+        
+        # Texts to (re)parse, each distinct text once
+        pending = {}
+        for text, key, entry in zip(texts, keys, entries):
+            if key not in pending and (entry is None or any(task not in entry for task in tasks)):
+                pending[key] = (text, entry)
+        if not pending:
+            return entries
+        
+        pending_texts = [text for text, _ in pending.values()]
+        parsed_texts = self._parse_texts(nlp, pending_texts, tasks, batch_size, n_process)
+        for (key, (text, entry)), parsed in zip(pending.items(), parsed_texts):
+            tokens = parsed if isinstance(parsed, list) else [token.text for token in parsed]
+            # Keep the tasks a previous call already computed
+            entry = dict(entry or {})
+            entry["tokens"] = tuple(tokens)
+            if "vocabulary" in tasks:
+                entry["vocabulary"] = tuple(self._vocabulary_from_tokens(tokens, language_code))
+            if "complexity" in tasks:
+                lemmas = None if isinstance(parsed, list) else [token.lemma_ for token in parsed]
+                entry["complexity"] = self._complexity_from_tokens(text, tokens, language_code, lemmas)
+            if "grammar" in tasks:
+                entry["grammar"] = () if isinstance(parsed, list) else tuple(
+                    self._grammar_errors_from_doc(parsed, language_code))
+            self.analysis_cache.set(key, entry)
+            pending[key] = (text, entry)
+        return [pending[key][1] if key in pending else entry for key, entry in zip(keys, entries)]
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit rate, size and evictions of the analysis cache."""
+        return self.analysis_cache.stats()
+    
+    def model_stats(self) -> Dict[str, Any]:
+        """Memory use, load times and evictions of the loaded spaCy models."""
+        return self.spacy_models.stats()
+    
+    def tokenize_texts(self, texts: Iterable[str], language_code: str = 'en',
+                       batch_size: Optional[int] = None, n_process: Optional[int] = None) -> List[List[str]]:
+        """Tokenize a batch of texts; see tokenize_text."""
+        return [list(entry["tokens"]) for entry in
+                self._cached_analyses(list(texts), language_code, ("tokens",), batch_size, n_process)]
     
     def tokenize_text(self, text: str, language_code: str = 'en') -> List[str]:
         """
@@ -121,19 +349,13 @@ class LanguageUtils:
         """
         if not text:
             return []
-        
-        # Try to use spaCy first if available
-        nlp = self.get_spacy_model(language_code)
-        if nlp:
-            doc = nlp(text)
-            return [token.text for token in doc]
-        
-        # Fall back to NLTK if available
-        if NLTK_AVAILABLE:
-            return word_tokenize(text)
-        
-        # Most basic fallback: split on whitespace and punctuation
-        return re.findall(r'\b\w+\b', text)
+        return self.tokenize_texts([text], language_code)[0]
+    
+    def extract_vocabulary_batch(self, texts: Iterable[str], language_code: str = 'en',
+                                 batch_size: Optional[int] = None, n_process: Optional[int] = None) -> List[List[str]]:
+        """Extract vocabulary from a batch of texts; see extract_vocabulary."""
+        return [result["vocabulary"] for result in
+                self.analyze_texts(texts, language_code, ("vocabulary",), batch_size, n_process)]
     
     def extract_vocabulary(self, text: str, language_code: str = 'en') -> List[str]:
         """
@@ -146,11 +368,11 @@ class LanguageUtils:
         Returns:
             List of vocabulary words
         """
-        # Tokenize the text
-        tokens = self.tokenize_text(text, language_code)
-        
+        return self.extract_vocabulary_batch([text], language_code)[0]
+    
+    def _vocabulary_from_tokens(self, tokens: List[str], language_code: str) -> List[str]:
         # Filter out stopwords and non-alphabetic tokens
-        stopword_set = self.stopwords.get(language_code, set())
+        stopword_set = self.get_stopwords(language_code)
         vocab = [token.lower() for token in tokens if token.isalpha() and token.lower() not in stopword_set]
         
         # Remove duplicates while preserving order
@@ -161,7 +383,7 @@ class LanguageUtils:
     
     def detect_language(self, text: str) -> str:
         """
-        Attempt to detect the language of the text.
+        Detect the language of the text with the packaged character n-gram model.
         
         Args:
             text: Text to analyze
@@ -172,35 +394,26 @@ class LanguageUtils:
         if not text or len(text.strip()) < 10:
             return 'unknown'
         
-        # Try to use spaCy for language detection if available models
-        if SPACY_AVAILABLE:
-            # Test each available model
-            max_score = 0
-            detected_lang = 'unknown'
-            
-            for lang_code in self.nlp_models:
-                nlp = self.nlp_models[lang_code]
-                doc = nlp(text[:min(len(text), 100)])  # Limit text length for efficiency
-                
-                # Count tokens that the model recognizes (not marked as unknown)
-                recognized = sum(1 for token in doc if not token.is_oov)
-                score = recognized / max(1, len(doc))
-                
-                if score > max_score:
-                    max_score = score
-                    detected_lang = lang_code
-            
-            if max_score > 0.5:  # Threshold for confident detection
-                return detected_lang
-        
-        # Add fallbacks or other language detection methods if needed
-        
-        return 'unknown'
+        # Imported on first use so that importing this module doesn't load NumPy
+        from utils.langid import get_language_identifier
+        return get_language_identifier().identify(text) or 'unknown'
+    
+    def calculate_text_complexity_batch(self, texts: Iterable[str], language_code: str = 'en',
+                                        batch_size: Optional[int] = None,
+                                        n_process: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Calculate complexity metrics for a batch of texts; see calculate_text_complexity."""
+        return [result["complexity"] for result in
+                self.analyze_texts(texts, language_code, ("complexity",), batch_size, n_process)]
     
     def calculate_text_complexity(self, text: str, language_code: str = 'en') -> Dict[str, Any]:
         """
         Calculate various complexity metrics for a text.
         
+        Where the language has a word-frequency rank table, the estimated level
+        comes from the ranks of the text's words, or of their lemmas with a
+        spaCy model (see WordRanks.text_profile, whose metrics are included);
+        otherwise it is guessed from word and sentence lengths.
+        
         Args:
             text: Text to analyze
             language_code: Language code
@@ -208,17 +421,11 @@ class LanguageUtils:
         Returns:
             Dictionary with complexity metrics
         """
-        if not text:
-            return {
-                "avg_word_length": 0,
-                "avg_sentence_length": 0,
-                "unique_words_ratio": 0,
-                "estimated_level": "Unknown"
-            }
-        
-        # Tokenize text
-        tokens = self.tokenize_text(text, language_code)
-        if not tokens:
+        return self.calculate_text_complexity_batch([text], language_code)[0]
+    
+    def _complexity_from_tokens(self, text: str, tokens: List[str], language_code: str,
+                                lemmas: Optional[List[str]] = None) -> Dict[str, Any]:
+        if not text or not tokens:
             return {
                 "avg_word_length": 0,
                 "avg_sentence_length": 0,
@@ -252,13 +459,30 @@ class LanguageUtils:
         else:
             level = "Fluent"
         
-        return {
+        complexity = {
             "avg_word_length": round(avg_word_length, 2),
             "avg_sentence_length": round(avg_sentence_length, 2),
             "unique_words_ratio": round(unique_words_ratio, 2),
             "complexity_score": round(complexity_score, 2),
             "estimated_level": level
         }
+        
+        # How common the words are says more about difficulty than their length;
+        # imported on first use so that importing this module doesn't load NumPy
+        from utils.word_ranks import get_word_ranks
+        profile = get_word_ranks().text_profile(tokens, language_code, lemmas)
+        if profile:
+            complexity.update(profile)
+            complexity["estimated_level"] = profile["lexical_level"]
+        
+        return complexity
+    
+    def detect_grammar_errors_batch(self, texts: Iterable[str], language_code: str = 'en',
+                                    batch_size: Optional[int] = None,
+                                    n_process: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """Detect grammar errors in a batch of texts; see detect_grammar_errors."""
+        return [result["grammar"] for result in
+                self.analyze_texts(texts, language_code, ("grammar",), batch_size, n_process)]
     
     def detect_grammar_errors(self, text: str, language_code: str = 'en') -> List[Dict[str, Any]]:
         """
@@ -272,27 +496,26 @@ class LanguageUtils:
         Returns:
             List of detected errors with descriptions
         """
+        return self.detect_grammar_errors_batch([text], language_code)[0]
+    
+    def _grammar_errors_from_doc(self, doc: Any, language_code: str) -> List[Dict[str, Any]]:
+        """Grammar checks over a spaCy Doc that has part-of-speech tags."""
         errors = []
         
-        # Use spaCy for basic grammar checking if available
-        nlp = self.get_spacy_model(language_code)
-        if nlp:
-            doc = nlp(text)
-            
-            # Grammar error detection is language-specific
-            if language_code == 'en':
-                # Subject-verb agreement in English
-                for i, token in enumerate(doc):
-                    if i > 0 and token.pos_ == "VERB":
-                        # Very basic check - just an example
-                        if doc[i-1].text.lower() in ['i', 'you', 'we', 'they'] and token.text.endswith('s'):
-                            errors.append({
-                                "type": "subject-verb agreement",
-                                "position": (token.idx, token.idx + len(token.text)),
-                                "description": f"Possible subject-verb agreement error with '{doc[i-1].text} {token.text}'"
-                            })
-            
-            # Add more language-specific grammar checks for other languages as needed
+        # Grammar error detection is language-specific
+        if language_code == 'en':
+            # Subject-verb agreement in English
+            for i, token in enumerate(doc):
+                if i > 0 and token.pos_ == "VERB":
+                    # Very basic check - just an example
+                    if doc[i-1].text.lower() in ['i', 'you', 'we', 'they'] and token.text.endswith('s'):
+                        errors.append({
+                            "type": "subject-verb agreement",
+                            "position": (token.idx, token.idx + len(token.text)),
+                            "description": f"Possible subject-verb agreement error with '{doc[i-1].text} {token.text}'"
+                        })
+        
+        # Add more language-specific grammar checks for other languages as needed
         
         return errors
     
@@ -360,4 +583,15 @@ class LanguageUtils:
                 "questions": questions
             }
         
-        return {"error": f"Exercise type '{exercise_type}' not supported"}
\ No newline at end of file
+        return {"error": f"Exercise type '{exercise_type}' not supported"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the NLTK resources used by LanguageUtils.")
+    parser.add_argument("--download-dir", default=NLTK_DATA_DIR,
+                        help="directory to store the resources in (NLTK_DATA_DIR by default)")
+    args = parser.parse_args()
+    download_nltk_resources(args.download_dir)
+    print(f"NLTK resources {', '.join(NLTK_RESOURCES)} stored in {args.download_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Process pool for CPU-bound LanguageUtils work.
+
+spaCy and NLTK hold the GIL while they tokenize and tag, so analysing text in
+a request thread stalls every other request on the same worker. NLPExecutor
+runs LanguageUtils batch methods in a pool of worker processes instead. Each
+process keeps its own LanguageUtils, so its spaCy models and analysis cache
+stay warm between jobs.
+
+- submit() returns a concurrent.futures.Future; run() awaits the same from
+  asyncio code without blocking the event loop while it waits for a slot.
+- Jobs whose texts total at most NLP_INLINE_MAX_CHARS characters run inline
+  in the calling thread, where pickling and IPC would cost more than the work.
+- At most NLP_POOL_MAX_PENDING jobs are queued or running. Submitters wait up
+  to NLP_POOL_SUBMIT_TIMEOUT seconds for a slot, then get NLPExecutorBusy.
+
+Workers start with the "spawn" method by default, which is safe in a
+threaded server but re-imports the main module in each worker: scripts that
+use the executor need the usual `if __name__ == "__main__":` guard.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import (
+    NLP_POOL_WORKERS, NLP_POOL_MAX_PENDING, NLP_POOL_SUBMIT_TIMEOUT, NLP_POOL_START_METHOD,
+    NLP_INLINE_MAX_CHARS, SPACY_PRELOAD_LANGUAGES
+)
+from utils.language_utils import LanguageUtils, SPACY_AVAILABLE
+from utils.spacy_models import SpacyModelManager
+
+# LanguageUtils methods that can run in the pool; each takes a list of texts
+# first and returns picklable results
+POOL_METHODS = (
+    "analyze_texts",
+    "tokenize_texts",
+    "extract_vocabulary_batch",
+    "calculate_text_complexity_batch",
+    "detect_grammar_errors_batch"
+)
+
+# How often run() checks for a free slot while the pool is full
+SLOT_POLL_SECONDS = 0.01
+
+class NLPExecutorBusy(RuntimeError):
+    """The pool's queue stayed full for longer than the submit timeout."""
+
+# The worker process's own LanguageUtils, created by _init_worker
+_worker_utils = None
+
+def _init_worker(preload_languages: List[str], model_names: Optional[Dict[str, str]]) -> None:
+    global _worker_utils
+    _worker_utils = LanguageUtils(spacy_models=SpacyModelManager(model_names=model_names))
+    if SPACY_AVAILABLE and preload_languages:
+        _worker_utils.spacy_models.preload(preload_languages)
+
+def _run_in_worker(method: str, texts: List[str], kwargs: Dict[str, Any]) -> Any:
+    return getattr(_worker_utils, method)(texts, **kwargs)
+
+class NLPExecutor:
+    """Runs LanguageUtils batch methods in worker processes, or inline for small jobs."""
+
+    def __init__(self, language_utils: Optional[LanguageUtils] = None, max_workers: int = NLP_POOL_WORKERS,
+                 max_pending: int = NLP_POOL_MAX_PENDING, submit_timeout: float = NLP_POOL_SUBMIT_TIMEOUT,
+                 inline_max_chars: int = NLP_INLINE_MAX_CHARS, start_method: str = NLP_POOL_START_METHOD,
+                 preload_languages: Iterable[str] = SPACY_PRELOAD_LANGUAGES,
+                 model_names: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            language_utils: Runs inline jobs (a new LanguageUtils by default)
+            max_workers: Worker processes; 0 runs every job inline
+            max_pending: Jobs queued or running in the pool before submit() waits
+            submit_timeout: Seconds submit() waits for a slot before raising NLPExecutorBusy
+            inline_max_chars: Jobs with at most this many characters of text run inline
+            start_method: multiprocessing start method for the workers
+            preload_languages: Languages whose spaCy models each worker loads at start
+            model_names: spaCy model name or path per language for the workers
+                         (SPACY_MODEL_NAMES by default)
+        """
+        self.language_utils = language_utils if language_utils is not None else LanguageUtils()
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.submit_timeout = submit_timeout
+        self.inline_max_chars = inline_max_chars
+        self.start_method = start_method
+        self.preload_languages = list(preload_languages)
+        self.model_names = model_names
+        self._pool = None  # Started on the first job that needs it
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._counter_lock = threading.Lock()
+        self.pending = 0
+        self.inline = 0
+        self.offloaded = 0
+        self.rejected = 0
+        self.pool_restarts = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker,
+                    initargs=(self.preload_languages, self.model_names)
+                )
+            return self._pool
+
+    def _restart_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Replace a pool whose worker died; jobs already submitted to it fail."""
+        with self._pool_lock:
+            if self._pool is broken:
+                self._pool = None
+                self.pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_to_pool(self, method: str, texts: List[str], kwargs: Dict[str, Any]) -> Future:
+        pool = self._get_pool()
+        try:
+            return pool.submit(_run_in_worker, method, texts, kwargs)
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            return self._get_pool().submit(_run_in_worker, method, texts, kwargs)
+
+    def _run_inline(self, method: str, texts: List[str], kwargs: Dict[str, Any]) -> Future:
+        future = Future()
+        try:
+            future.set_result(getattr(self.language_utils, method)(texts, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        with self._counter_lock:
+            self.inline += 1
+        return future
+
+    def _job_done(self, future: Future) -> None:
+        with self._counter_lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def _runs_inline(self, method: str, texts: List[str]) -> bool:
+        if method not in POOL_METHODS:
+            raise ValueError(f"{method} can't run in the NLP pool")
+        return self.max_workers <= 0 or sum(len(text or "") for text in texts) <= self.inline_max_chars
+
+    def _reject(self) -> None:
+        with self._counter_lock:
+            self.rejected += 1
+        raise NLPExecutorBusy(f"NLP pool has {self.max_pending} jobs pending")
+
+    def submit(self, method: str, texts: Iterable[str], **kwargs) -> Future:
+        """
+        Run a LanguageUtils batch method, in the pool unless the job is small.
+
+        Args:
+            method: One of POOL_METHODS
+            texts: Texts to process
+            **kwargs: Further arguments of the method, e.g. language_code
+
+        Returns:
+            Future of what the method returns; small jobs have run by the time it is returned
+
+        Raises:
+            NLPExecutorBusy: If the pool stays full for submit_timeout seconds
+        """
+        texts = list(texts)
+        if self._runs_inline(method, texts):
+            return self._run_inline(method, texts, kwargs)
+
+        # Back-pressure: wait for a free slot rather than queueing without bound
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            self._reject()
+        return self._submit_with_slot(method, texts, kwargs)
+
+    def _submit_with_slot(self, method: str, texts: List[str], kwargs: Dict[str, Any]) -> Future:
+        """Submit a job to the pool once the caller holds one of the pending slots."""
+        try:
+            future = self._submit_to_pool(method, texts, kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._counter_lock:
+            self.pending += 1
+            self.offloaded += 1
+        future.add_done_callback(self._job_done)
+        return future
+
+    def call(self, method: str, texts: Iterable[str], timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a LanguageUtils batch method and wait for its result; see submit."""
+        return self.submit(method, texts, **kwargs).result(timeout)
+
+    async def run(self, method: str, texts: Iterable[str], **kwargs) -> Any:
+        """
+        Await a LanguageUtils batch method from asyncio code; see submit.
+
+        While the pool is full, it waits for a free slot (up to
+        submit_timeout seconds) by polling, so the event loop keeps running.
+        """
+        # Imported here: asyncio is slow to import and most callers are synchronous
+        import asyncio
+        texts = list(texts)
+        if self._runs_inline(method, texts):
+            return await asyncio.wrap_future(self._run_inline(method, texts, kwargs))
+
+        deadline = time.monotonic() + self.submit_timeout
+        while not self._slots.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                self._reject()
+            await asyncio.sleep(SLOT_POLL_SECONDS)
+        return await asyncio.wrap_future(self._submit_with_slot(method, texts, kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and job counters since the executor was created."""
+        with self._counter_lock:
+            return {
+                "workers": self.max_workers,
+                "pool_started": self._pool is not None,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "inline": self.inline,
+                "offloaded": self.offloaded,
+                "rejected": self.rejected,
+                "pool_restarts": self.pool_restarts
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes; a later job starts a new pool."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
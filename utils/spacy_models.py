@@ -0,0 +1,230 @@
+"""
+Memory-budgeted cache of loaded spaCy pipelines.
+
+A small spaCy pipeline takes tens of megabytes once loaded, so a worker that
+has seen learners of twenty languages can't keep them all. SpacyModelManager
+keeps the most recently used ones within SPACY_MODEL_MEMORY_MB, evicting the
+least recently used when a load would go over, and records per-model sizes,
+load times, hits and evictions.
+
+A model's size is an estimate of its resident memory: its size on disk
+times MODEL_MEMORY_FACTOR, or a fixed estimate for models that aren't a
+package or directory. Loaded pipelines take several times their disk size
+(vocab, string store and lexeme tables are unpacked from compact files), so
+the disk size alone would let the cache overshoot its budget. Measuring
+resident memory directly would be wrong whenever two models load at once or
+a load reuses freed pages.
+Evicting a model only drops the manager's reference: its memory is freed
+once no caller is still using it.
+"""
+import importlib.util
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import SPACY_MODEL_MEMORY_MB
+
+# spaCy pipelines per language code; not all languages have one
+SPACY_MODEL_NAMES = {
+    'en': 'en_core_web_sm',
+    'es': 'es_core_news_sm',
+    'fr': 'fr_core_news_sm',
+    'de': 'de_core_news_sm',
+    'it': 'it_core_news_sm',
+    'pt': 'pt_core_news_sm',
+    'ja': 'ja_core_news_sm',
+    'zh': 'zh_core_web_sm',
+    'nl': 'nl_core_news_sm',
+    'ru': 'ru_core_news_sm',
+    'el': 'el_core_news_sm',
+    'pl': 'pl_core_news_sm',
+    'ro': 'ro_core_news_sm',
+    'lt': 'lt_core_news_sm',
+    'nb': 'nb_core_news_sm',  # Norwegian
+    'no': 'nb_core_news_sm',
+    'da': 'da_core_news_sm',
+    'fi': 'fi_core_news_sm',
+    'sv': 'sv_core_news_sm',
+    'uk': 'uk_core_news_sm',
+    'ca': 'ca_core_news_sm',
+    'hr': 'hr_core_news_sm',
+    'fa': 'fa_core_news_sm',
+}
+
+# Resident memory assumed for a model that isn't an installed package or a directory
+DEFAULT_MODEL_BYTES = 50 * 2 ** 20
+# Resident memory of a loaded pipeline per byte on disk; the small packages
+# take about 3x (e.g. es_core_news_sm: ~13 MB on disk, ~40 MB loaded)
+MODEL_MEMORY_FACTOR = 3
+
+def _disk_bytes(model_name: str) -> int:
+    """Size on disk of a model given as a package name or a directory, or 0 if it can't be found."""
+    path = model_name
+    if not os.path.isdir(path):
+        try:
+            spec = importlib.util.find_spec(model_name)
+        except (ImportError, ValueError):
+            return 0
+        if spec is None or not spec.submodule_search_locations:
+            return 0
+        path = list(spec.submodule_search_locations)[0]
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+class SpacyModelManager:
+    """Thread-safe LRU of spaCy pipelines within a memory budget."""
+
+    def __init__(self, memory_budget: int = SPACY_MODEL_MEMORY_MB * 2 ** 20,
+                 model_names: Optional[Dict[str, str]] = None,
+                 loader: Optional[Callable[[str], Any]] = None):
+        """
+        Args:
+            memory_budget: Bytes the loaded models may take together. A model
+                           larger than the whole budget is still loaded, alone.
+            model_names: Model name or path per language code (SPACY_MODEL_NAMES by default)
+            loader: Loads a model by name (spacy.load by default)
+        """
+        self.memory_budget = memory_budget
+        self.model_names = SPACY_MODEL_NAMES if model_names is None else model_names
+        self.loader = loader
+        self._models = OrderedDict()  # language code -> (size, model), least recently used first
+        self._load_locks = {}  # language code -> lock held while that model loads
+        self._unavailable = set()  # Language codes whose model failed to load
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self._metrics = {}  # language code -> counters, see stats()
+
+    def _counters(self, language_code: str) -> Dict[str, Any]:
+        return self._metrics.setdefault(language_code, {
+            "hits": 0, "loads": 0, "load_seconds": 0.0, "last_load_seconds": None,
+            "size_bytes": None, "evictions": 0, "failures": 0
+        })
+
+    def get(self, language_code: str) -> Any:
+        """
+        Get the model for a language, loading it (and evicting others) if needed.
+
+        Returns:
+            A spaCy Language, or None if the language has no model or it can't be loaded
+        """
+        return self._get(language_code, preloading=False)
+
+    def _get(self, language_code: str, preloading: bool) -> Any:
+        with self._lock:
+            entry = self._models.get(language_code)
+            if entry is not None:
+                self._models.move_to_end(language_code)
+                self._counters(language_code)["hits"] += 1
+                return entry[1]
+            if language_code in self._unavailable or language_code not in self.model_names:
+                return None
+            load_lock = self._load_locks.setdefault(language_code, threading.Lock())
+
+        # One thread loads a given model; others wanting it wait here, the rest aren't blocked
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(language_code)
+                if entry is not None:
+                    self._models.move_to_end(language_code)
+                    self._counters(language_code)["hits"] += 1
+                    return entry[1]
+            return self._load(language_code, preloading)
+
+    def _load(self, language_code: str, preloading: bool) -> Any:
+        model_name = self.model_names[language_code]
+        loader = self.loader
+        if loader is None:
+            import spacy
+            loader = spacy.load
+        started = time.perf_counter()
+        try:
+            model = loader(model_name)
+        except Exception as e:
+            # Model not installed or broken; don't retry on every call
+            print(f"Warning: could not load spaCy model {model_name}: {e}")
+            with self._lock:
+                self._unavailable.add(language_code)
+                self._counters(language_code)["failures"] += 1
+            return None
+        seconds = time.perf_counter() - started
+        size = _disk_bytes(model_name) * MODEL_MEMORY_FACTOR or DEFAULT_MODEL_BYTES
+
+        with self._lock:
+            counters = self._counters(language_code)
+            counters["loads"] += 1
+            counters["load_seconds"] += seconds
+            counters["last_load_seconds"] = round(seconds, 3)
+            counters["size_bytes"] = size
+            if preloading:
+                if self._models and self.bytes + size > self.memory_budget:
+                    # Preloading goes from hotter to colder languages: keep the hotter ones
+                    return model
+                self._models[language_code] = (size, model)
+                self._models.move_to_end(language_code, last=False)
+                self.bytes += size
+                return model
+            self._models[language_code] = (size, model)
+            self.bytes += size
+            while self.bytes > self.memory_budget and len(self._models) > 1:
+                evicted, (evicted_size, _) = self._models.popitem(last=False)
+                self.bytes -= evicted_size
+                self._counters(evicted)["evictions"] += 1
+        return model
+
+    def preload(self, language_codes: Iterable[str]) -> List[str]:
+        """
+        Load models ahead of use, hottest language first, while they fit the budget.
+
+        Each preloaded model is ranked below the ones loaded before it, so the
+        hottest language is the last to be evicted.
+
+        Returns:
+            Language codes whose models are loaded afterwards
+        """
+        for language_code in language_codes:
+            if language_code not in self.model_names or self._get(language_code, preloading=True) is None:
+                continue
+            with self._lock:
+                if language_code not in self._models:
+                    break
+        return self.loaded()
+
+    def evict(self, language_code: str) -> bool:
+        """
+        Unload a model; returns whether it was loaded.
+
+        Only the manager's reference is dropped, so the memory is freed once
+        no caller still holds the model (a pipe in progress, say).
+        """
+        with self._lock:
+            entry = self._models.pop(language_code, None)
+            if entry is None:
+                return False
+            self.bytes -= entry[0]
+            self._counters(language_code)["evictions"] += 1
+            return True
+
+    def loaded(self) -> List[str]:
+        """Language codes of the loaded models, least recently used first."""
+        with self._lock:
+            return list(self._models)
+
+    def stats(self) -> Dict[str, Any]:
+        """Memory use against the budget, plus load times, sizes, hits and evictions per model."""
+        with self._lock:
+            return {
+                "memory_budget_bytes": self.memory_budget,
+                "loaded_bytes": self.bytes,
+                "loaded": list(self._models),
+                "evictions": sum(counters["evictions"] for counters in self._metrics.values()),
+                "unavailable": sorted(self._unavailable),
+                "models": {
+                    language_code: dict(counters, load_seconds=round(counters["load_seconds"], 3))
+                    for language_code, counters in self._metrics.items()
+                }
+            }
+
+    def __len__(self):
+        return len(self._models)
@@ -0,0 +1,177 @@
+import csv
+import datetime
+import io
+import math
+import re
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+# Columns understood in CSV uploads and written by exports, in export order
+VOCABULARY_COLUMNS = ["word", "translation", "part_of_speech", "example_sentence", "proficiency", "last_reviewed"]
+
+# Column widths from the vocabulary schema; longer values are truncated (or skipped, for the word)
+MAX_WORD_LENGTH = 100
+MAX_TRANSLATION_LENGTH = 100
+MAX_PART_OF_SPEECH_LENGTH = 20
+
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Anki-style TSV, written and read alike: tabs, newlines and backslashes in fields are backslash-escaped
+TSV_FORMAT = {"delimiter": "\t", "quoting": csv.QUOTE_NONE, "escapechar": "\\"}
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    """
+    Decide whether an upload is CSV or Anki-style TSV.
+
+    Args:
+        filename: Name of the uploaded file
+        requested: Explicit format ("csv" or "tsv"), which wins if given
+
+    Returns:
+        "csv" or "tsv"
+    """
+    if requested in ("csv", "tsv"):
+        return requested
+    if filename and filename.lower().endswith((".tsv", ".txt")):
+        return "tsv"
+    return "csv"
+
+def read_vocabulary_rows(stream: TextIO, fmt: str = "csv") -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally parse vocabulary entries from a text stream.
+
+    CSV files may start with a header row naming any of VOCABULARY_COLUMNS;
+    without one the columns are taken as word, translation, part_of_speech,
+    example_sentence. Proficiency is clamped to [0, 1] and last_reviewed to
+    the present; unreadable values are left out. Anki-style TSV exports are
+    read as front/back pairs, skipping the leading "#" directive lines and
+    stripping HTML from the fields.
+
+    Args:
+        stream: Text stream positioned at the start of the file
+        fmt: "csv" or "tsv"
+
+    Yields:
+        Entry dictionaries with word, translation, part_of_speech, example_sentence,
+        proficiency and last_reviewed (None where not given)
+    """
+    if fmt == "tsv":
+        reader = csv.reader(_skip_directives(stream), **TSV_FORMAT)
+        columns = ["word", "translation"]
+    else:
+        reader = csv.reader(stream)
+        columns = VOCABULARY_COLUMNS[:4]
+
+    first = True
+    for row in reader:
+        if not row or not any(field.strip() for field in row):
+            continue
+        if first and fmt == "csv":
+            first = False
+            header = [field.strip().lower() for field in row]
+            if "word" in header:
+                columns = header
+                continue
+        first = False
+
+        values = dict(zip(columns, row))
+        word = _clean(values.get("word"), fmt)
+        if not word or len(word) > MAX_WORD_LENGTH:
+            continue
+        yield {
+            "word": word,
+            "translation": _clean(values.get("translation"), fmt)[:MAX_TRANSLATION_LENGTH] or None,
+            "part_of_speech": _clean(values.get("part_of_speech"), fmt)[:MAX_PART_OF_SPEECH_LENGTH] or None,
+            "example_sentence": _clean(values.get("example_sentence"), fmt) or None,
+            "proficiency": _parse_proficiency(values.get("proficiency")),
+            "last_reviewed": _parse_last_reviewed(values.get("last_reviewed"))
+        }
+
+def _skip_directives(stream: TextIO) -> Iterator[str]:
+    """Lines of an Anki export after its "#" header directives."""
+    lines = iter(stream)
+    for line in lines:
+        if not line.startswith("#"):
+            yield line
+            break
+    yield from lines
+
+def _parse_proficiency(value: Optional[str]) -> Optional[float]:
+    """Proficiency from an export, clamped to [0, 1], or None if missing or not a number."""
+    try:
+        proficiency = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(proficiency):
+        return None
+    return min(1.0, max(0.0, proficiency))
+
+def _parse_last_reviewed(value: Optional[str]) -> Optional[datetime.datetime]:
+    """Naive UTC review time from an ISO 8601 value, no later than now, or None if missing or invalid."""
+    try:
+        reviewed = datetime.datetime.fromisoformat(value.strip())
+    except (AttributeError, ValueError):
+        return None
+    if reviewed.tzinfo is not None:
+        reviewed = reviewed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return min(reviewed, datetime.datetime.utcnow())
+
+def _clean(value: Optional[str], fmt: str) -> str:
+    """Trim a field, stripping Anki's HTML markup from TSV exports."""
+    if not value:
+        return ""
+    if fmt == "tsv":
+        value = HTML_TAG_PATTERN.sub("", value).replace("&nbsp;", " ")
+    return value.strip()
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to size items from an iterable without materialising it."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def write_vocabulary_rows(words: Iterable[Dict[str, Any]], fmt: str = "csv",
+                          rows_per_chunk: int = 500) -> Iterator[str]:
+    """
+    Serialize vocabulary dictionaries as CSV or Anki-style TSV text chunks.
+
+    Args:
+        words: Word dictionaries, e.g. from DatabaseHandler.iter_user_vocabulary
+        fmt: "csv" (all columns, with a header) or "tsv" (front/back pairs for Anki)
+        rows_per_chunk: Rows serialized per yielded string
+
+    Yields:
+        Pieces of the file, suitable for a streaming HTTP response
+    """
+    buffer = io.StringIO()
+    if fmt == "tsv":
+        writer = csv.writer(buffer, lineterminator="\n", **TSV_FORMAT)
+        buffer.write("#separator:tab\n#html:false\n")
+    else:
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(VOCABULARY_COLUMNS)
+
+    for chunk in chunked(words, rows_per_chunk):
+        for word in chunk:
+            if fmt == "tsv":
+                writer.writerow([word["word"], word.get("translation") or ""])
+            else:
+                last_reviewed = word.get("last_reviewed")
+                writer.writerow([
+                    word["word"],
+                    word.get("translation") or "",
+                    word.get("part_of_speech") or "",
+                    word.get("example_sentence") or "",
+                    round(word.get("proficiency") or 0.0, 3),
+                    last_reviewed.isoformat() if last_reviewed else ""
+                ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header-only output for an empty vocabulary
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,244 @@
+"""
+Word-frequency rank tables for difficulty estimation.
+
+For every supported language the most frequent words are stored as a sorted
+array of CRC32 hashes with each word's frequency rank alongside, in
+utils/data/word_ranks.npz. A lookup is a binary search (numpy.searchsorted)
+over 10,000 entries, and a language's table takes 60 KB once loaded; tables
+are loaded per language on first use.
+
+Ranks map to learning levels through RANK_LEVEL_LIMITS: a word among the
+2,000 most frequent is a Beginner word, and so on up to Fluent for words
+rarer than the table's Advanced band or missing from it. The tables rank
+word forms, so callers that know a word's lemma (from a spaCy model) pass it
+too, and the better of the two ranks counts: "manzanas" ranks as "manzana".
+
+The tables are built from wordfreq, and for Thai, which wordfreq doesn't
+cover, from pythainlp's Thai Textbook Corpus frequencies. Both are only
+needed to rebuild them:
+
+    pip install wordfreq pythainlp
+    python -m utils.word_ranks [--words 10000]
+"""
+import argparse
+import os
+import threading
+import unicodedata
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import LEARNING_LEVELS, SUPPORTED_LANGUAGES
+
+WORD_RANKS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "word_ranks.npz")
+
+# Highest frequency rank of each level's words; rarer and unknown words are LEARNING_LEVELS[-1].
+# These are ranks of word forms, over which inflection spreads each lemma, so the bands
+# hold about twice as many entries as the lemmas a learner at each level knows.
+RANK_LEVEL_LIMITS = (2000, 5000, 9000)  # Beginner, Intermediate, Advanced
+TEXT_COVERAGE = 0.9  # Share of a text's words a reader must know for the text to suit their level
+# Shorter texts are judged as if padded with Beginner words to this length, so that
+# one name or topic word in a short message doesn't decide its level
+MIN_PROFILE_WORDS = 20
+
+# Source word lists for the supported languages that differ from our codes
+WORDFREQ_CODES = {"no": "nb"}
+
+def normalize_word(word: str) -> str:
+    return unicodedata.normalize("NFC", word.strip()).lower()
+
+def is_word(token: str) -> bool:
+    """Whether a token is made of letters, allowing the combining marks of scripts like Thai and Hindi."""
+    return (any(char.isalpha() for char in token)
+            and all(unicodedata.category(char)[0] in "LM" for char in token))
+
+def word_hash(word: str) -> int:
+    """Key of a word in the rank tables."""
+    return zlib.crc32(normalize_word(word).encode("utf-8"))
+
+class WordRanks:
+    """Thread-safe, lazily loaded per-language frequency-rank tables."""
+
+    def __init__(self, path: str = WORD_RANKS_PATH):
+        self.path = path
+        self._tables = {}  # language code -> (sorted hashes, ranks) or None
+        self._lock = threading.Lock()
+
+    def _table(self, language_code: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        if language_code not in self._tables:
+            with self._lock:
+                if language_code not in self._tables:
+                    table = None
+                    if os.path.exists(self.path):
+                        with np.load(self.path, allow_pickle=False) as data:
+                            if f"{language_code}_hashes" in data.files:
+                                table = (data[f"{language_code}_hashes"], data[f"{language_code}_ranks"])
+                    self._tables[language_code] = table
+        return self._tables[language_code]
+
+    def has_language(self, language_code: str) -> bool:
+        return self._table(language_code) is not None
+
+    def ranks(self, words: Iterable[str], language_code: str,
+              lemmas: Optional[Iterable[str]] = None) -> Optional[np.ndarray]:
+        """
+        Frequency ranks of words, 1 for the most frequent.
+
+        Args:
+            words: Words to look up
+            language_code: Language of the words
+            lemmas: Lemma of each word, or "" where unknown; a word then
+                    gets the better of its own rank and its lemma's
+
+        Returns:
+            Array with 0 for words not in the table, or None if the language has no table
+        """
+        table = self._table(language_code)
+        if table is None:
+            return None
+        hashes, ranks = table
+        words = list(words)
+        query = np.fromiter((word_hash(word) for word in words), dtype=np.uint32, count=len(words))
+        positions = np.searchsorted(hashes, query)
+        positions[positions == len(hashes)] = 0
+        found = np.where(hashes[positions] == query, ranks[positions], 0).astype(np.int64)
+        if lemmas is None:
+            return found
+        lemmas = list(lemmas)
+        lemma_ranks = self.ranks(lemmas, language_code)
+        lemma_ranks[np.array([not lemma for lemma in lemmas], dtype=bool)] = 0
+        both = (found > 0) & (lemma_ranks > 0)
+        return np.where(both, np.minimum(found, lemma_ranks), np.maximum(found, lemma_ranks))
+
+    def rank(self, word: str, language_code: str) -> Optional[int]:
+        """Frequency rank of a word, or None if it isn't in the language's table."""
+        ranks = self.ranks([word], language_code)
+        return int(ranks[0]) if ranks is not None and ranks[0] else None
+
+    def _level_indices(self, ranks: np.ndarray) -> np.ndarray:
+        levels = np.searchsorted(np.array(RANK_LEVEL_LIMITS), ranks, side="left")
+        levels[ranks == 0] = len(RANK_LEVEL_LIMITS)
+        return levels
+
+    def difficulty_levels(self, words: Iterable[str], language_code: str,
+                          lemmas: Optional[Iterable[str]] = None) -> List[Optional[str]]:
+        """
+        Learning level of each word from its frequency rank (see ranks).
+
+        Returns:
+            A LEARNING_LEVELS name per word, or None for every word if the
+            language has no table
+        """
+        words = list(words)
+        ranks = self.ranks(words, language_code, lemmas)
+        if ranks is None:
+            return [None] * len(words)
+        return [LEARNING_LEVELS[level] for level in self._level_indices(ranks)]
+
+    def difficulty_level(self, word: str, language_code: str) -> Optional[str]:
+        return self.difficulty_levels([word], language_code)[0]
+
+    def text_profile(self, tokens: Iterable[str], language_code: str,
+                     lemmas: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Rank distribution of a text's words and the level it suits.
+
+        Args:
+            tokens: Tokens of the text; only words (see is_word) are counted
+            language_code: Language of the text
+            lemmas: Lemma of each token, or "" where unknown (see ranks)
+
+        Returns:
+            Dictionary with word_rank_p50 and word_rank_p90 (unknown words
+            count as one past the table), unknown_word_ratio, level_coverage
+            (share of words at or below each level) and lexical_level (the
+            lowest level covering TEXT_COVERAGE of the words, counting at
+            least MIN_PROFILE_WORDS words), or None if the language has no
+            table or the text has no words
+        """
+        tokens = list(tokens)
+        lemmas = list(lemmas) if lemmas is not None else [""] * len(tokens)
+        pairs = [(token, lemma) for token, lemma in zip(tokens, lemmas) if is_word(token)]
+        words = [token for token, _ in pairs]
+        ranks = self.ranks(words, language_code, [lemma for _, lemma in pairs]) if words else None
+        if ranks is None:
+            return None
+        beyond = len(self._table(language_code)[0]) + 1
+        counts = np.bincount(self._level_indices(ranks), minlength=len(LEARNING_LEVELS))
+        coverage = np.cumsum(counts) / len(words)
+        padding = max(0, MIN_PROFILE_WORDS - len(words))
+        padded_coverage = (np.cumsum(counts) + padding) / (len(words) + padding)
+        level = int(np.argmax(padded_coverage >= TEXT_COVERAGE - 1e-9))
+        p50, p90 = np.percentile(np.where(ranks == 0, beyond, ranks), (50, 90))
+        return {
+            "word_rank_p50": int(p50),
+            "word_rank_p90": int(p90),
+            "unknown_word_ratio": round(float(np.mean(ranks == 0)), 2),
+            "level_coverage": {name: round(float(share), 2) for name, share in zip(LEARNING_LEVELS, coverage)},
+            "lexical_level": LEARNING_LEVELS[level]
+        }
+
+_word_ranks = None
+_word_ranks_lock = threading.Lock()
+
+def get_word_ranks() -> WordRanks:
+    """The shared rank tables."""
+    global _word_ranks
+    if _word_ranks is None:
+        with _word_ranks_lock:
+            if _word_ranks is None:
+                _word_ranks = WordRanks()
+    return _word_ranks
+
+def load_ranked_words(language_code: str, max_words: int) -> List[str]:
+    """
+    A language's most frequent words, most frequent first.
+
+    Requires wordfreq, or pythainlp for Thai.
+    """
+    if language_code == "th":
+        from pythainlp.corpus import ttc
+        frequencies = sorted(ttc.word_freqs(), key=lambda item: -item[1])
+        words = [word for word, _ in frequencies]
+    else:
+        from wordfreq import top_n_list
+        words = top_n_list(WORDFREQ_CODES.get(language_code, language_code), max_words * 2)
+    ranked, seen = [], set()
+    for word in words:
+        word = normalize_word(word)
+        if is_word(word) and word not in seen:
+            seen.add(word)
+            ranked.append(word)
+            if len(ranked) == max_words:
+                break
+    return ranked
+
+def build_tables(language_codes: Iterable[str], max_words: int = 10000, path: str = WORD_RANKS_PATH) -> None:
+    """Build the rank tables from word-frequency lists and save them."""
+    arrays = {}
+    for code in language_codes:
+        words = load_ranked_words(code, max_words)
+        hashes = np.array([word_hash(word) for word in words], dtype=np.uint32)
+        ranks = np.arange(1, len(words) + 1, dtype=np.uint16)
+        # Sort by hash; on a collision keep the more frequent word
+        order = np.lexsort((ranks, hashes))
+        hashes, ranks = hashes[order], ranks[order]
+        first = np.concatenate(([True], hashes[1:] != hashes[:-1]))
+        arrays[f"{code}_hashes"] = hashes[first]
+        arrays[f"{code}_ranks"] = ranks[first]
+        print(f"{code}: {int(first.sum())} words")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, **arrays)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the word-frequency rank tables.")
+    parser.add_argument("--words", type=int, default=10000, help="most frequent words kept per language")
+    parser.add_argument("--output", default=WORD_RANKS_PATH, help="tables file to write")
+    args = parser.parse_args()
+
+    build_tables(sorted(SUPPORTED_LANGUAGES), max_words=args.words, path=args.output)
+    print(f"Tables written to {args.output} ({os.path.getsize(args.output) / 1024:.0f} KiB)")
+
+if __name__ == "__main__":
+    main()